@@ -1,5 +1,9 @@
 import streamlit as st
-from database import create_user, check_password, get_db, get_user_details_by_email, get_user_stats
+from database import get_db, get_user_by_email, get_user_stats, reset_query_count
+from auth_service import authenticate, register_user, RateLimited, AuthBusy
+from identity import login_identity, get_current_identity, clear_identity, invalidate_identity, render_query_count
+from model_loader import start_model_warmup, render_model_status
+from metrics import start_exporters
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -9,6 +13,12 @@ st.set_page_config(
     initial_sidebar_state="collapsed" # Collapse sidebar for the landing page
 )
 
+reset_query_count()
+
+# Model ko background me load karna shuru karo, taaki pehla "Run Analysis" wait na kare
+start_model_warmup()
+start_exporters() # METRICS_EXPORT_PATH / METRICS_HTTP_PORT, agar set hai
+
 # --- SESSION STATE INITIALIZATION ---
 if 'logged_in' not in st.session_state:
     st.session_state['logged_in'] = False
@@ -35,12 +45,18 @@ def render_landing_page():
             email = st.text_input("Email", key="login_email")
             password = st.text_input("Password", type="password", key="login_password")
             if st.button("Login", key="login_button", use_container_width=True, type="primary"):
-                if check_password(email, password):
+                try:
+                    valid = authenticate(email, password, client_ip=getattr(st.context, "ip_address", None))
+                except (RateLimited, AuthBusy) as e:
+                    valid = None
+                    st.error(str(e))
+                if valid:
                     st.session_state['logged_in'] = True
                     st.session_state['user_email'] = email
+                    login_identity(email) # profile ek hi baar load hota hai, sab pages yahi use karte hai
                     st.success("Login successful! Redirecting to your dashboard...")
                     st.rerun()
-                else:
+                elif valid is False:
                     st.error("Invalid email or password.")
 
         with signup_tab:
@@ -52,10 +68,11 @@ def render_landing_page():
             
             if st.button("Sign Up", key="signup_button", use_container_width=True):
                 db_session = next(get_db())
-                if get_user_details_by_email(db_session, new_email):
+                if get_user_by_email(db_session, new_email):
                     st.warning("Email already registered.")
                 else:
-                    create_user(db_session, new_name, new_email, new_age, new_gender, new_password)
+                    register_user(db_session, new_name, new_email, new_age, new_gender, new_password)
+                    invalidate_identity(new_email) # pehle ka cached "no such user" login pe na mile
                     st.success("Account created successfully! Please proceed to the Login tab.")
                 db_session.close()
 
@@ -96,7 +113,7 @@ def render_dashboard():
 
     db_session = next(get_db())
     try:
-        user = get_user_details_by_email(db_session, st.session_state['user_email'])
+        user = get_current_identity()
         if user:
             st.title(f"Welcome back, {user.name}!")
             st.subheader("Your Personal Health Dashboard")
@@ -124,9 +141,13 @@ def render_dashboard():
     with st.sidebar:
         st.title("Navigation")
         st.info(f"Logged in as: **{st.session_state['user_email']}**")
+        render_model_status()
         if st.button("Logout", width='stretch'):
             st.session_state['logged_in'] = False
             st.session_state['user_email'] = None
+            clear_identity()
+            for key in ("chat_session", "chat_context_sent_id", "chat_messages", "chat_user_id"):
+                st.session_state.pop(key, None) # agla user pichhle ki chat aur history na dekhe
             st.rerun()
 
 # --- MAIN APP ROUTER ---
@@ -135,4 +156,5 @@ if not st.session_state['logged_in']:
 else:
     # When logged in, the sidebar will be built by Streamlit based on files in /pages,
     # and the main area will show the dashboard.
-    render_dashboard()
\ No newline at end of file
+    render_dashboard()
+render_query_count()
\ No newline at end of file
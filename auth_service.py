@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+import config
+from database import get_db, get_user_by_email, create_user, update_password_hash
+
+class RateLimited(Exception):
+    """Too many login attempts for this email or IP address."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many login attempts. Try again in {retry_after:.0f} seconds.")
+        self.retry_after = retry_after
+
+class AuthBusy(Exception):
+    """The hashing pool is saturated; the login should be retried shortly."""
+
+class RateLimiter:
+    """Sliding-window attempt counter per key (e.g. "email:..." or "ip:...")."""
+
+    def __init__(self, window_s):
+        self.window_s = window_s
+        self._attempts = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+
+    def hit(self, key, limit):
+        """Records an attempt; raises RateLimited if `key` already used `limit` attempts in the window."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._pruned_at > self.window_s:
+                self._prune(now)
+            attempts = self._attempts[key]
+            while attempts and now - attempts[0] > self.window_s:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                raise RateLimited(self.window_s - (now - attempts[0]))
+            attempts.append(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def _prune(self, now):
+        # window se bahar ki keys hata do, warna random emails se memory badhti rahegi
+        stale = [key for key, attempts in self._attempts.items() if not attempts or now - attempts[-1] > self.window_s]
+        for key in stale:
+            del self._attempts[key]
+        self._pruned_at = now
+
+    def __len__(self):
+        with self._lock:
+            return len(self._attempts)
+
+# bcrypt GIL chhod deta hai, isliye threads kaafi hai; pool size hi CPU ka budget hai
+_pool = ThreadPoolExecutor(max_workers=max(1, config.AUTH_HASH_WORKERS), thread_name_prefix="bcrypt")
+_pending = threading.BoundedSemaphore(max(1, config.AUTH_MAX_PENDING))
+_limiter = RateLimiter(config.AUTH_WINDOW_S)
+_dummy_hash = None
+_dummy_lock = threading.Lock()
+
+def _run_hash(fn, *args):
+    """Runs a bcrypt call on the bounded pool and waits for it."""
+    if not _pending.acquire(timeout=10):
+        raise AuthBusy("The login service is busy. Please try again.")
+    try:
+        return _pool.submit(fn, *args).result()
+    finally:
+        _pending.release()
+
+def hash_password(password, rounds=None):
+    """Hashes a password with the configured bcrypt cost on the worker pool."""
+    salt = bcrypt.gensalt(rounds or config.BCRYPT_ROUNDS)
+    return _run_hash(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+def hash_rounds(hashed_password):
+    """Cost factor stored in a bcrypt hash ("$2b$12$..." -> 12)."""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+def _get_dummy_hash():
+    """A hash to check unknown emails against, so they take as long as real ones."""
+    global _dummy_hash
+    with _dummy_lock:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password("not-a-real-password")
+        return _dummy_hash
+
+def register_user(db_session, name, email, age, gender, password):
+    """Creates a user, hashing the password off the script thread."""
+    return create_user(db_session, name, email, age, gender, hash_password(password))
+
+def authenticate(email, password, client_ip=None):
+    """
+    Verifies a user's password. Returns True/False.
+    Raises RateLimited when the email or IP has too many recent attempts, and AuthBusy
+    when the hashing pool is saturated. Unknown emails are checked against a dummy hash,
+    so the response time does not reveal whether an account exists. Hashes with a lower
+    cost than BCRYPT_ROUNDS are upgraded transparently after a successful login.
+    """
+    # IP pehle: jo request IP limit pe ruk gayi, wo victim ka email lock na kare
+    if client_ip:
+        _limiter.hit(f"ip:{client_ip}", config.AUTH_MAX_ATTEMPTS_PER_IP)
+    email_key = f"email:{email.strip().lower()}"
+    _limiter.hit(email_key, config.AUTH_MAX_ATTEMPTS_PER_EMAIL)
+
+    # hash check ke dauran DB connection pakad ke nahi rakhna; login storm pool khali kar deta
+    db_session = next(get_db())
+    try:
+        user = get_user_by_email(db_session, email)
+        user_id, stored_hash = (user.id, user.hashed_password) if user else (None, None)
+    finally:
+        db_session.close()
+
+    valid = _run_hash(bcrypt.checkpw, password.encode('utf-8'), (stored_hash or _get_dummy_hash()).encode('utf-8'))
+    if not (user_id and valid):
+        return False
+
+    _limiter.reset(email_key)
+    if hash_rounds(stored_hash) < config.BCRYPT_ROUNDS:
+        new_hash = hash_password(password)
+        db_session = next(get_db())
+        try:
+            update_password_hash(db_session, user_id, new_hash)
+        finally:
+            db_session.close()
+    return True
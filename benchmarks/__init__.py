@@ -0,0 +1,5 @@
+"""
+Headless benchmarks for the analysis path. Run each one from the project root, e.g.
+`python -m benchmarks.predict_latency`, or the whole end-to-end suite with baseline
+comparison via `python -m benchmarks --baseline benchmark_baseline.json`.
+"""
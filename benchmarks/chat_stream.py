@@ -0,0 +1,51 @@
+import argparse
+import threading
+
+def run(sessions=8, turns=5, token_delay_ms=20.0, faq_ratio=0.5):
+    """
+    Runs `sessions` concurrent chats of `turns` questions each against the offline stub
+    backend through llm_client. A `faq_ratio` share of the questions are shared FAQs, the
+    rest are unique. Returns time-to-first-token, tokens/sec and cache hit rate.
+    """
+    from llm_client import LLMClient, StubBackend
+
+    client = LLMClient(StubBackend(token_delay_ms), retry_backoff_s=0.0)
+    context = [
+        {"role": "user", "parts": ["Here is the patient's medical history: no checkups yet."]},
+        {"role": "model", "parts": ["Understood."]},
+    ]
+    faq_every = max(1, round(1 / faq_ratio)) if faq_ratio > 0 else None
+
+    def chat(index):
+        session = client.start_chat(context)
+        for turn in range(turns):
+            if faq_every and (index + turn) % faq_every == 0:
+                question = f"What does a {(index + turn) % 3 * 25}% result mean?" # small FAQ pool
+            else:
+                question = f"Session {index} question {turn}: how should I read my last scan?"
+            for _ in session.stream(question):
+                pass
+
+    threads = [threading.Thread(target=chat, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = client.stats()
+    stats["cache_hit_rate"] = stats["cache_hits"] / max(1, stats["requests"])
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat streaming latency and response-cache hit rate with the stub LLM backend.")
+    parser.add_argument("-s", "--sessions", type=int, default=8)
+    parser.add_argument("-n", "--turns", type=int, default=5)
+    parser.add_argument("-d", "--token-delay-ms", type=float, default=20.0)
+    parser.add_argument("-f", "--faq-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.turns, args.token_delay_ms, args.faq_ratio)
+    print(f"{results['requests']} replies, {results['cache_hits']} from cache ({results['cache_hit_rate']:.0%})")
+    print(f"TTFT p50 {results['ttft_ms_p50']:.1f} ms  p95 {results['ttft_ms_p95']:.1f} ms  {results['tokens_per_s_mean']:.1f} tokens/s")
+
+if __name__ == "__main__":
+    main()
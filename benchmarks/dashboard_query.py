@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+def grow_table(engine, start_id, target_rows, users):
+    """Bulk-inserts synthetic predictions until the table holds `target_rows` rows."""
+    base = datetime(2024, 1, 1)
+    rng = random.Random(start_id)
+    chunk = 50_000
+    next_id = start_id
+    with engine.begin() as connection:
+        while next_id <= target_rows:
+            rows = []
+            for row_id in range(next_id, min(next_id + chunk, target_rows + 1)):
+                date = base + timedelta(seconds=rng.randrange(0, 60 * 60 * 24 * 700))
+                rows.append((row_id, rng.randrange(1, users + 1), date.strftime("%Y-%m-%d %H:%M:%S.%f"), rng.random(), "synthetic"))
+            connection.exec_driver_sql(
+                "INSERT INTO predictions (id, user_id, date, probability, result_text) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            next_id += len(rows)
+    return next_id
+
+def time_dashboard(Session, users, samples=300):
+    """p50/p99 latency of get_user_stats (the dashboard query) for random users."""
+    import database
+    timings = []
+    session = Session()
+    try:
+        for _ in range(samples):
+            user_id = random.randrange(1, users + 1)
+            start = time.perf_counter()
+            database.get_user_stats(session, user_id)
+            timings.append((time.perf_counter() - start) * 1000.0)
+    finally:
+        session.close()
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99))
+
+def run(sizes=(10_000, 100_000, 1_000_000), users=1000):
+    from sqlalchemy.orm import sessionmaker
+    import database
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        engine = database.create_db_engine(f"sqlite:///{os.path.join(folder, 'dashboard.db')}")
+        database.migrate_schema(engine)
+        Session = sessionmaker(bind=engine)
+        next_id = 1
+        for size in sizes:
+            next_id = grow_table(engine, next_id, size, users)
+            p50, p99 = time_dashboard(Session, users)
+            results.append({"rows": size, "rows_per_user": size // users, "p50_ms": p50, "p99_ms": p99})
+        engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard stats query latency as the predictions table grows.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'rows/user':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for row in run(args.sizes, args.users):
+        print(f"{row['rows']:>10} {row['rows_per_user']:>10} {row['p50_ms']:>10.3f} {row['p99_ms']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
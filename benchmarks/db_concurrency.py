@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+def build(url, tuned=True):
+    """Engine + session factory for `url`, either through database.create_db_engine or a bare create_engine."""
+    import sqlalchemy as db
+    from sqlalchemy.orm import sessionmaker
+    import database
+    engine = database.create_db_engine(url) if tuned else db.create_engine(url)
+    database.migrate_schema(engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def seed_users(Session, count):
+    import database
+    session = Session()
+    try:
+        users = [database.User(name=f"Load {i}", email=f"load{i}_{random.random()}@example.com", hashed_password="x") for i in range(count)]
+        session.add_all(users)
+        session.commit()
+        return [user.id for user in users]
+    finally:
+        session.close()
+
+def worker(Session, action, user_ids, deadline, results, lock):
+    """Runs `action` against fresh sessions until `deadline`, recording latencies and errors."""
+    import database
+    latencies, errors = [], 0
+    while time.monotonic() < deadline:
+        user_id = random.choice(user_ids)
+        session = Session()
+        start = time.perf_counter()
+        try:
+            if action == "write":
+                database.add_prediction(session, user_id, datetime.now(), random.random(), "load test")
+            else:
+                database.get_predictions_by_user_id(session, user_id)
+                database.get_user_stats(session, user_id)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+        except Exception:
+            errors += 1
+            session.rollback()
+        finally:
+            session.close()
+    with lock:
+        results[action]["latencies"].extend(latencies)
+        results[action]["errors"] += errors
+
+def run(url, writers=8, readers=16, seconds=10.0, users=50, tuned=True):
+    engine, Session = build(url, tuned)
+    user_ids = seed_users(Session, users)
+    results = {"write": {"latencies": [], "errors": 0}, "read": {"latencies": [], "errors": 0}}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+    threads = [threading.Thread(target=worker, args=(Session, "write", user_ids, deadline, results, lock)) for _ in range(writers)]
+    threads += [threading.Thread(target=worker, args=(Session, "read", user_ids, deadline, results, lock)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    summary = {}
+    for action, data in results.items():
+        samples = np.array(data["latencies"]) if data["latencies"] else np.zeros(1)
+        summary[action] = {
+            "ops_per_s": len(data["latencies"]) / seconds,
+            "errors": data["errors"],
+            "p50_ms": float(np.percentile(samples, 50)),
+            "p99_ms": float(np.percentile(samples, 99)),
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent writers/readers against the database layer.")
+    parser.add_argument("--url", help="Database URL (default: a temporary SQLite file)")
+    parser.add_argument("-w", "--writers", type=int, default=8)
+    parser.add_argument("-r", "--readers", type=int, default=16)
+    parser.add_argument("-t", "--seconds", type=float, default=10.0)
+    parser.add_argument("--compare-untuned", action="store_true", help="Also run with a bare create_engine()")
+    args = parser.parse_args()
+
+    modes = [("tuned", True)] + ([("untuned", False)] if args.compare_untuned else [])
+    for label, tuned in modes:
+        with tempfile.TemporaryDirectory() as folder:
+            url = args.url or f"sqlite:///{os.path.join(folder, 'load.db')}"
+            summary = run(url, args.writers, args.readers, args.seconds, tuned=tuned)
+        print(f"--- {label} engine ({args.writers} writers, {args.readers} readers, {args.seconds:.0f}s) ---")
+        for action, stats in summary.items():
+            print(f"{action:<6} {stats['ops_per_s']:8.1f} ops/s  p50 {stats['p50_ms']:7.2f} ms  "
+                  f"p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}")
+
+if __name__ == "__main__":
+    main()
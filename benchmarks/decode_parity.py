@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+TOLERANCE = 0.02 # max mean |pixel delta| (0-1 scale) allowed vs the legacy PIL path
+
+def synthetic_scans(size=2048):
+    """
+    Smooth MRI-like test images as encoded bytes: grey PNG and JPEG, plus a tinted colour JPEG
+    with 4:2:0 chroma subsampling ("synthetic_<side>_color.jpg"), where libjpeg's own colour
+    to grey conversion in the reduced decode can drift from the PIL -> RGB -> gray path.
+    """
+    import cv2
+    y, x = np.mgrid[:size, :size].astype(np.float32) / size
+    gray = 110 + 80 * np.exp(-((x - 0.5) ** 2 + (y - 0.5) ** 2) / 0.08) + 25 * np.sin(12 * x) * np.cos(9 * y)
+    image = cv2.cvtColor(np.clip(gray, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+    # channels alag-alag: jaise false-colour / annotated MRI exports
+    color = np.clip(np.stack([0.6 * gray + 60 * y, 0.9 * gray, 1.1 * gray - 40 * x], axis=-1), 0, 255).astype(np.uint8)
+    scans = {}
+    for side in (256, 1024, size):
+        resized = cv2.resize(image, (side, side), interpolation=cv2.INTER_AREA)
+        scans[f"synthetic_{side}.png"] = cv2.imencode(".png", resized)[1].tobytes()
+        scans[f"synthetic_{side}.jpg"] = cv2.imencode(".jpg", resized, [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+        scans[f"synthetic_{side}_color.jpg"] = cv2.imencode(
+            ".jpg", cv2.resize(color, (side, side), interpolation=cv2.INTER_AREA),
+            [cv2.IMWRITE_JPEG_QUALITY, 92, cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420],
+        )[1].tobytes()
+    return scans
+
+def folder_scans(folder):
+    scans = {}
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(folder, name), "rb") as f:
+                scans[name] = f.read()
+    return scans
+
+def legacy_tensor(data):
+    """The original path: PIL decode -> RGB -> cv2 gray -> resize -> /255."""
+    import io
+    from PIL import Image
+    from mri_preprocessing import MRI_IMAGE_SIZE, preprocess_into
+    out = np.empty(MRI_IMAGE_SIZE, dtype=np.float32)
+    return preprocess_into(Image.open(io.BytesIO(data)), out)
+
+def bytes_tensor(data, reduced):
+    from mri_preprocessing import MRI_IMAGE_SIZE, preprocess_into
+    out = np.empty(MRI_IMAGE_SIZE, dtype=np.float32)
+    return preprocess_into(data, out, reduced=reduced)
+
+def best_time(fn, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000.0
+
+def run(scans, with_model=False):
+    """Compares the legacy decode with the direct bytes path (full and reduced) for every scan."""
+    runner = None
+    if with_model:
+        from model_loader import load_mri_runner
+        runner = load_mri_runner()
+    rows = []
+    for name, data in scans.items():
+        legacy = legacy_tensor(data)
+        row = {"scan": name, "legacy_ms": best_time(lambda: legacy_tensor(data))}
+        for label, reduced in (("direct", False), ("reduced", True)):
+            tensor = bytes_tensor(data, reduced)
+            row[f"{label}_ms"] = best_time(lambda: bytes_tensor(data, reduced))
+            row[f"{label}_mean_abs"] = float(np.abs(tensor - legacy).mean())
+            row[f"{label}_max_abs"] = float(np.abs(tensor - legacy).max())
+            if runner is not None:
+                probabilities = runner(np.stack([legacy, tensor])[..., np.newaxis])
+                row[f"{label}_prob_delta"] = float(abs(probabilities[0] - probabilities[1]))
+        rows.append(row)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Numerical parity and speed of the direct cv2.imdecode path vs the PIL path.")
+    parser.add_argument("folder", nargs="?", help="Folder of real scans (default: synthetic images)")
+    parser.add_argument("--model", action="store_true", help="Also compare model probabilities")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Max allowed mean |pixel delta| (0-1 scale)")
+    args = parser.parse_args()
+
+    scans = folder_scans(args.folder) if args.folder else synthetic_scans()
+    rows = run(scans, args.model)
+    failed = False
+    for row in rows:
+        line = (f"{row['scan']:<24} legacy {row['legacy_ms']:7.2f} ms | direct {row['direct_ms']:7.2f} ms "
+                f"(mean {row['direct_mean_abs']:.4f}) | reduced {row['reduced_ms']:7.2f} ms (mean {row['reduced_mean_abs']:.4f})")
+        if args.model:
+            line += f" | prob delta {row['direct_prob_delta']:.4f} / {row['reduced_prob_delta']:.4f}"
+        print(line)
+        failed |= max(row["direct_mean_abs"], row["reduced_mean_abs"]) > args.tolerance
+    if failed:
+        print(f"FAIL: mean pixel delta above tolerance {args.tolerance}")
+        return 1
+    print("OK: direct decode matches the legacy path within tolerance")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
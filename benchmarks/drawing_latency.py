@@ -0,0 +1,104 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.predict_latency import percentiles, time_calls
+
+def synthetic_drawings(count, seed=0):
+    """PNG-encoded wave drawings (dark ink on light paper) with increasing tremor."""
+    import cv2
+    rng = np.random.default_rng(seed)
+    drawings = []
+    for i in range(count):
+        canvas = np.full((480, 640, 3), 235, dtype=np.uint8)
+        x = np.linspace(40, 600, 600)
+        y = 240 + 90 * np.sin(x / 45.0) + rng.normal(0, 0.5 + i % 5, x.size)
+        cv2.polylines(canvas, [np.stack([x, y], axis=1).astype(np.int32)], False, (30, 30, 30), 3)
+        drawings.append(cv2.imencode(".png", canvas)[1].tobytes())
+    return drawings
+
+def check_hog_parity(drawings):
+    """Max difference from skimage.feature.hog on the binarized drawings, or None without scikit-image."""
+    try:
+        from skimage.feature import hog
+    except ImportError:
+        return None
+    from drawing_preprocessing import (
+        DRAWING_IMAGE_SIZE, HOG_CELLS_PER_BLOCK, HOG_ORIENTATIONS, HOG_PIXELS_PER_CELL, binarize_into, hog_features,
+    )
+    binary = np.empty((len(drawings), *DRAWING_IMAGE_SIZE), dtype=np.uint8)
+    for i, drawing in enumerate(drawings):
+        binarize_into(drawing, binary[i])
+    reference = np.stack([
+        hog(image, orientations=HOG_ORIENTATIONS, pixels_per_cell=HOG_PIXELS_PER_CELL,
+            cells_per_block=HOG_CELLS_PER_BLOCK, transform_sqrt=True, block_norm="L1")
+        for image in binary
+    ])
+    return float(np.abs(reference - hog_features(binary)).max())
+
+def run(model_path, iterations=200, batch_size=64, workers=0):
+    """
+    Per-drawing latency of feature extraction, model scoring and the whole path for a single
+    upload, plus the amortized per-drawing cost when scoring in batches.
+    """
+    from drawing_model import DrawingScorer, iter_drawing_predictions_parallel, load_drawing_model, score_features
+    from drawing_preprocessing import extract_drawing_features
+
+    try:
+        model = load_drawing_model(model_path)
+    except Exception as e:
+        raise SystemExit(f"The drawing model could not be loaded: {e}")
+    drawings = synthetic_drawings(batch_size)
+    single = DrawingScorer(model, batch_size=1)
+    features = extract_drawing_features(drawings[:1])
+
+    results = {}
+    for name, fn, arg in (
+        ("features", extract_drawing_features, drawings[:1]),
+        ("model", lambda f: score_features(model, f), features),
+        ("end_to_end", single.score, drawings[:1]),
+    ):
+        p50, p99 = percentiles(time_calls(fn, arg, iterations))
+        results[name] = {"p50_ms": p50, "p99_ms": p99}
+
+    batched = DrawingScorer(model, batch_size)
+    samples = [ms / batch_size for ms in time_calls(batched.score, drawings, max(5, iterations // 20))]
+    results["batched_per_drawing"] = dict(zip(("p50_ms", "p99_ms"), percentiles(samples)))
+
+    if workers > 0:
+        with tempfile.TemporaryDirectory() as folder:
+            paths = []
+            for i in range(batch_size * 8):
+                paths.append(os.path.join(folder, f"{i}.png"))
+                with open(paths[-1], "wb") as f:
+                    f.write(drawings[i % batch_size])
+            start = time.perf_counter()
+            for _ in iter_drawing_predictions_parallel(model_path, paths, workers, batch_size):
+                pass
+            elapsed = time.perf_counter() - start
+        results["parallel"] = {"workers": workers, "drawings_per_s": len(paths) / elapsed}
+
+    results["hog_parity_max_diff"] = check_hog_parity(drawings[:8])
+    return results
+
+def main():
+    import config
+    parser = argparse.ArgumentParser(description="Per-drawing latency of the WAVE.pkl spiral/wave drawing path.")
+    parser.add_argument("-m", "--model", default=config.DRAWING_MODEL_PATH)
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    parser.add_argument("-b", "--batch-size", type=int, default=64)
+    parser.add_argument("-w", "--workers", type=int, default=0, help="also time bulk scoring with this many processes")
+    args = parser.parse_args()
+
+    results = run(args.model, args.iterations, args.batch_size, args.workers)
+    print(f"{'stage':<20} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for name in ("features", "model", "end_to_end", "batched_per_drawing"):
+        print(f"{name:<20} {results[name]['p50_ms']:>10.2f} {results[name]['p99_ms']:>10.2f}")
+    if "parallel" in results:
+        print(f"{results['parallel']['workers']} workers: {results['parallel']['drawings_per_s']:.1f} drawings/sec")
+    if results["hog_parity_max_diff"] is not None:
+        print(f"HOG max difference vs skimage: {results['hog_parity_max_diff']:.2e}")
+
+if __name__ == "__main__":
+    main()
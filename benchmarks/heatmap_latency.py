@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "") # CPU numbers only
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import numpy as np
+
+DEFAULT_BUDGET = 2.5 # the Grad-CAM pass may cost at most this many times a plain forward pass (p50)
+
+def time_calls(fn, iterations, warmup=3):
+    """Calls fn() repeatedly and returns the p50 latency in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return float(np.percentile(samples, 50))
+
+def run(iterations=50):
+    """
+    Model level: a plain forward pass vs the Grad-CAM pass that returns probability and heatmap.
+    End to end: predict_mri with the heatmap off (engine, including its batching window) and on,
+    the naive prediction-then-heatmap approach, and a cached heatmap lookup.
+    """
+    import config
+    config.MRI_CACHE_MAX_ENTRIES = 0 # har call model tak pahunche
+    config.MRI_CACHE_PERSIST = False
+    import model_loader
+    from benchmarks.decode_parity import synthetic_scans
+
+    scan = synthetic_scans(1024)["synthetic_1024.jpg"]
+    if model_loader.explain_mri(scan)[1] is None:
+        raise SystemExit("Grad-CAM needs the Keras MRI model.")
+
+    active = model_loader.get_model_manager().active
+    gradcam_runner = model_loader._gradcam_runner(active.spec.version, active.model)
+    batch = model_loader.preprocess_mri(scan)[np.newaxis]
+
+    def naive():
+        model_loader.predict_mri(scan)
+        model_loader.explain_mri(scan)
+
+    model_loader.get_heatmap("benchmark", scan)
+    return {
+        "forward_pass_ms": time_calls(lambda: active.runner(batch), iterations),
+        "gradcam_pass_ms": time_calls(lambda: gradcam_runner(batch), iterations),
+        "heatmap_off_ms": time_calls(lambda: model_loader.predict_mri(scan), iterations),
+        "heatmap_on_ms": time_calls(lambda: model_loader.predict_mri(scan, heatmap=True), iterations),
+        "naive_two_pass_ms": time_calls(naive, iterations),
+        "cached_heatmap_ms": time_calls(lambda: model_loader.get_heatmap("benchmark", scan), iterations),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latency budget check: MRI scoring with the Grad-CAM heatmap on vs off.")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="allowed Grad-CAM pass / forward pass ratio")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations)
+    print(f"{'path':<26} {'p50 (ms)':>10}")
+    for name, value in results.items():
+        print(f"{name[:-3]:<26} {value:>10.2f}")
+    ratio = results["gradcam_pass_ms"] / results["forward_pass_ms"]
+    print(f"heatmap on costs {ratio:.2f}x a forward pass (budget {args.budget:.2f}x); "
+          f"end to end {results['heatmap_on_ms'] / results['heatmap_off_ms']:.2f}x")
+    if ratio > args.budget:
+        print("Over budget.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
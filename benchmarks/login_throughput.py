@@ -0,0 +1,75 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+def run(users=20, concurrency=16, seconds=10.0, unknown_ratio=0.25):
+    """
+    Logs in from `concurrency` threads for `seconds` through auth_service.authenticate
+    against a temporary database. Returns logins/sec and latency percentiles.
+    """
+    import numpy as np
+    import config
+    config.AUTH_MAX_ATTEMPTS_PER_EMAIL = 10**9 # benchmark ko rate limiter se mat roko
+    import auth_service
+    from database import get_db, get_user_by_email
+
+    db_session = next(get_db())
+    try:
+        emails = []
+        for i in range(users):
+            email = f"bench{i}@example.com"
+            if not get_user_by_email(db_session, email):
+                auth_service.register_user(db_session, f"Bench {i}", email, 40, "Other", "correct horse")
+            emails.append(email)
+    finally:
+        db_session.close()
+
+    latencies, lock = [], threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(index):
+        local, attempt = [], 0
+        while time.monotonic() < deadline:
+            attempt += 1
+            unknown = (attempt * 7 + index) % 100 < unknown_ratio * 100
+            email = f"nobody{index}@example.com" if unknown else emails[(index + attempt) % len(emails)]
+            start = time.perf_counter()
+            auth_service.authenticate(email, "correct horse")
+            local.append((time.perf_counter() - start) * 1000.0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    samples = np.array(latencies)
+    return {
+        "logins_per_s": len(samples) / seconds,
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "hash_workers": config.AUTH_HASH_WORKERS,
+        "bcrypt_rounds": config.BCRYPT_ROUNDS,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput and latency through auth_service under concurrency.")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-t", "--seconds", type=float, default=10.0)
+    parser.add_argument("-u", "--users", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        # database ko import karne se pehle URL set karo
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(folder, 'auth.db')}"
+        results = run(args.users, args.concurrency, args.seconds)
+        from database import engine
+        engine.dispose()
+    print(f"bcrypt rounds {results['bcrypt_rounds']}, {results['hash_workers']} hash workers, {args.concurrency} clients")
+    print(f"{results['logins_per_s']:.1f} logins/sec  p50 {results['p50_ms']:.1f} ms  p99 {results['p99_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import time
+
+def run(iterations=200_000):
+    """Cost per metrics.timer() block with recording enabled and disabled, in nanoseconds."""
+    import metrics
+
+    results = {}
+    for enabled in (False, True):
+        metrics.set_enabled(enabled)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with metrics.timer("benchmark"):
+                pass
+        results["enabled" if enabled else "disabled"] = (time.perf_counter() - start) / iterations * 1e9
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    results["empty_loop"] = (time.perf_counter() - start) / iterations * 1e9
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead of metrics.timer() per instrumented block.")
+    parser.add_argument("-n", "--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    for name, ns in results.items():
+        print(f"{name:<12} {ns:>8.0f} ns/call")
+
+if __name__ == "__main__":
+    main()
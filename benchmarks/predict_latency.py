@@ -0,0 +1,54 @@
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "") # CPU numbers only
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import numpy as np
+
+def percentiles(samples_ms):
+    """Returns the p50 and p99 of a list of latencies in milliseconds."""
+    return float(np.percentile(samples_ms, 50)), float(np.percentile(samples_ms, 99))
+
+def time_calls(fn, batch, iterations, warmup=5):
+    """Calls fn(batch) repeatedly and returns each call's latency in milliseconds."""
+    for _ in range(warmup):
+        fn(batch)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(batch)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+def run(iterations=200):
+    """Compares model.predict against the compiled tf.function path for a single scan."""
+    from model_loader import MRI_IMAGE_SIZE, build_mri_runner, load_h5_model
+
+    model = load_h5_model()
+    if model is None:
+        raise SystemExit("The MRI model could not be loaded.")
+    batch = np.random.default_rng(0).random((1, *MRI_IMAGE_SIZE, 1), dtype=np.float32)
+
+    results = {}
+    for mode in ("predict", "compiled"):
+        runner = build_mri_runner(model, mode)
+        p50, p99 = percentiles(time_calls(runner, batch, iterations))
+        results[mode] = {"p50_ms": p50, "p99_ms": p99}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-scan MRI latency: model.predict vs compiled call.")
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    print(f"{'path':<10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for mode, stats in results.items():
+        print(f"{mode:<10} {stats['p50_ms']:>10.2f} {stats['p99_ms']:>10.2f}")
+    speedup = results["predict"]["p50_ms"] / results["compiled"]["p50_ms"]
+    print(f"p50 speed-up: {speedup:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+def make_scans(folder, count, size):
+    """Writes `count` synthetic JPEG scans of size x size pixels and returns their paths."""
+    import cv2
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"scan_{i:05d}.jpg")
+        cv2.imwrite(path, np.roll(base, i, axis=0))
+        paths.append(path)
+    return paths
+
+def serial_rate(paths, batch_size):
+    """Images/sec when decoding in this process into one reused buffer."""
+    from mri_preprocessing import MRI_IMAGE_SIZE, preprocess_into
+    buffer = np.empty((batch_size, *MRI_IMAGE_SIZE), dtype=np.float32)
+    start = time.perf_counter()
+    for i, path in enumerate(paths):
+        preprocess_into(path, buffer[i % batch_size])
+    return len(paths) / (time.perf_counter() - start)
+
+def pool_rate(paths, batch_size, workers):
+    """Images/sec through the process pool + shared-memory ring (pool start-up excluded)."""
+    from preprocess_pool import PreprocessPipeline
+    with PreprocessPipeline(workers, batch_size) as pipeline:
+        list(pipeline.iter_batches(paths[:workers])) # workers start karne ka time mat gino
+        start = time.perf_counter()
+        for _ in pipeline.iter_batches(paths):
+            pass
+        return len(paths) / (time.perf_counter() - start)
+
+def run(count=512, size=1024, batch_size=64, worker_counts=None):
+    worker_counts = worker_counts or sorted({1, 2, 4, os.cpu_count() or 1})
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_scans(folder, count, size)
+        results = {"serial": serial_rate(paths, batch_size)}
+        for workers in worker_counts:
+            results[f"workers={workers}"] = pool_rate(paths, batch_size, workers)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing throughput (images/sec) as decode workers scale.")
+    parser.add_argument("-n", "--count", type=int, default=512, help="Synthetic scans to decode")
+    parser.add_argument("-s", "--size", type=int, default=1024, help="Side length of each synthetic scan")
+    parser.add_argument("-b", "--batch-size", type=int, default=64)
+    parser.add_argument("-w", "--workers", type=int, nargs="*", help="Worker counts to try")
+    args = parser.parse_args()
+
+    results = run(args.count, args.size, args.batch_size, args.workers)
+    serial = results["serial"]
+    for name, rate in results.items():
+        print(f"{name:<12} {rate:9.1f} images/sec  ({rate / serial:4.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+def sample_reports(count, images=True, start_id=1, jpeg=True):
+    """
+    ReportData for `count` synthetic predictions, with a scan thumbnail and Grad-CAM overlay,
+    converted to JPEG like the app does (jpeg=False keeps the stored WebP and a PNG overlay).
+    """
+    from benchmarks.decode_parity import synthetic_scans
+    from gradcam import render_overlay
+    from reports import ReportData, encode_jpeg
+    from PIL import Image
+    from scan_store import make_thumbnail
+
+    thumbnail = heatmap = None
+    if images:
+        scan = synthetic_scans(1024)["synthetic_1024.jpg"]
+        thumbnail = make_thumbnail(scan, 256)
+        cam = np.random.default_rng(0).integers(0, 256, (128, 128), dtype=np.uint8)
+        overlay = render_overlay(scan, cam)
+        if jpeg:
+            thumbnail, heatmap = encode_jpeg(thumbnail), encode_jpeg(overlay)
+        else:
+            buffer = io.BytesIO()
+            Image.fromarray(overlay).save(buffer, format="PNG")
+            heatmap = buffer.getvalue()
+    return [
+        ReportData(
+            prediction_id=start_id + i, patient_name="Bench Patient", patient_age=64, patient_gender="Other",
+            date=datetime(2024, 1, 1, 9, 30), modality="MRI scan", probability=0.42 + (i % 50) / 100,
+            result_text="The MRI scan analysis indicates a low probability of Parkinson's disease.",
+            uncertainty=0.03 if i % 2 else None, model_version="mri_model@0123456789ab",
+            thumbnail=thumbnail, heatmap=heatmap,
+        )
+        for i in range(count)
+    ]
+
+def service_throughput(workers, count):
+    """Reports/s through a ReportService with `workers` processes, after its workers are warm."""
+    from reports import ReportService
+    service = ReportService(workers=workers, cache_entries=count * 2)
+    try:
+        for future in [service.report(data) for data in sample_reports(max(workers, 1) * 2, start_id=-1000)]:
+            future.result() # spawn + fpdf import timing me na aaye
+        batch = sample_reports(count)
+        start = time.perf_counter()
+        for future in [service.report(data) for data in batch]:
+            future.result()
+        return count / (time.perf_counter() - start)
+    finally:
+        service.close()
+
+def run(count=200, workers=(0, 1, 2, 4)):
+    """
+    Reports per second for single-page reports rendered inline, through the background pool at
+    several worker counts, and served from its cache; plus pages/s for a full-history export.
+    """
+    from reports import ReportService, render_history, render_report
+
+    batch = sample_reports(count)
+    render_report(batch[0]) # warm-up
+    start = time.perf_counter()
+    sizes = [len(render_report(data)) for data in batch]
+    results = {"inline_reports_per_s": count / (time.perf_counter() - start), "report_kb": float(np.mean(sizes)) / 1024}
+    unconverted = sample_reports(count, jpeg=False)
+    start = time.perf_counter()
+    for data in unconverted:
+        render_report(data)
+    results["inline_unconverted_reports_per_s"] = count / (time.perf_counter() - start)
+
+    for n in workers:
+        results[f"pool_{n}_reports_per_s"] = service_throughput(n, count)
+
+    service = ReportService(workers=0, cache_entries=count)
+    try:
+        service.report(batch[0]).result()
+        start = time.perf_counter()
+        for _ in range(count):
+            service.report(batch[0]).result()
+        results["cached_reports_per_s"] = count / (time.perf_counter() - start)
+    finally:
+        service.close()
+
+    with tempfile.TemporaryDirectory() as folder:
+        history = sample_reports(count * 5)
+        start = time.perf_counter()
+        pages = render_history(iter(history), os.path.join(folder, "history.pdf"))
+        results["history_pages_per_s"] = pages / (time.perf_counter() - start)
+        results["history_mb"] = os.path.getsize(os.path.join(folder, "history.pdf")) / 2**20
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF report throughput: inline, background pool, cached and full-history export.")
+    parser.add_argument("-n", "--count", type=int, default=200, help="Reports per measurement")
+    parser.add_argument("-w", "--workers", type=int, nargs="*", default=[0, 1, 2, 4], help="Pool sizes to measure (0 = one thread)")
+    args = parser.parse_args()
+
+    results = run(args.count, args.workers)
+    print(f"{'path':<36} {'reports/s':>10}")
+    print(f"{'inline, WebP/PNG images':<36} {results['inline_unconverted_reports_per_s']:>10.1f}")
+    print(f"{'inline render_report':<36} {results['inline_reports_per_s']:>10.1f}")
+    for n in args.workers:
+        label = "background thread" if n == 0 else f"pool, {n} worker process{'es' if n > 1 else ''}"
+        print(f"{label:<36} {results[f'pool_{n}_reports_per_s']:>10.1f}")
+    print(f"{'cached (same prediction)':<36} {results['cached_reports_per_s']:>10.1f}")
+    print(f"{'full-history export (pages/s)':<36} {results['history_pages_per_s']:>10.1f}")
+    print(f"Average report {results['report_kb']:.1f} KB; {args.count * 5}-page history {results['history_mb']:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so nothing is already imported or cached.
+PROBE = r"""
+import json, time
+start = time.perf_counter()
+import model_loader
+imported = time.perf_counter()
+import numpy as np
+from PIL import Image
+scan = Image.fromarray(np.zeros((512, 512), dtype=np.uint8))
+probability, _ = model_loader.predict_mri(scan)
+predicted = time.perf_counter()
+print("RESULT " + json.dumps({
+    "import_s": imported - start,
+    "first_prediction_s": predicted - start,
+    "ok": probability is not None,
+}))
+"""
+
+def run_once():
+    """Measures import time and time-to-first-prediction in a new Python process."""
+    env = dict(os.environ, CUDA_VISIBLE_DEVICES="", TF_CPP_MIN_LOG_LEVEL="2")
+    completed = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, env=env)
+    for line in completed.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(f"Startup probe failed:\n{completed.stderr[-2000:]}")
+
+def run(repeats=3):
+    samples = [run_once() for _ in range(repeats)]
+    return {
+        "import_s": min(s["import_s"] for s in samples),
+        "first_prediction_s": min(s["first_prediction_s"] for s in samples),
+        "ok": all(s["ok"] for s in samples),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start cost of model_loader: import time and time-to-first-prediction.")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="Fresh processes to start (best run is reported)")
+    args = parser.parse_args()
+
+    results = run(args.repeats)
+    print(f"import model_loader:     {results['import_s'] * 1000:8.1f} ms")
+    print(f"time to first prediction: {results['first_prediction_s'] * 1000:8.1f} ms")
+    if not results["ok"]:
+        print("Warning: the model could not be loaded, prediction time excludes inference.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "") # CPU numbers only
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import numpy as np
+
+# Metric names end in _ms (lower is better) or _per_s (higher is better); compare() relies on it.
+DEFAULT_THRESHOLD = 0.15 # 15% slower than the baseline counts as a regression
+DEFAULT_MIN_DELTA_MS = 0.25 # ...but sub-millisecond jitter below this many ms never does
+CASES = ("mri", "db", "chat", "reports")
+
+def machine_info():
+    """Hardware, interpreter and library versions, stored next to every result set."""
+    import cv2
+    import sqlalchemy
+    info = {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+    }
+    try:
+        info["memory_gb"] = round(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**30, 1)
+    except (ValueError, OSError, AttributeError):
+        pass
+    if "tensorflow" in sys.modules:
+        info["tensorflow"] = sys.modules["tensorflow"].__version__
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+def latency_ms(fn, iterations, warmup=3):
+    """Calls fn() repeatedly; returns the p50 and p95 latency in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 95))
+
+# --- CASES ---
+
+def bench_mri(iterations):
+    """predict_mri end to end (decode -> engine -> model) at several upload sizes, high-confidence and heatmap modes, and batch scoring."""
+    import config
+    config.MRI_CACHE_MAX_ENTRIES = 0 # har scan model tak pahunche, cache se nahi
+    config.MRI_CACHE_PERSIST = False
+    import model_loader
+    from benchmarks.decode_parity import synthetic_scans
+
+    if model_loader.load_mri_runner() is None:
+        raise RuntimeError("the MRI model could not be loaded")
+    results = {}
+    scans = synthetic_scans(2048)
+    for name in ("synthetic_256.jpg", "synthetic_1024.jpg", "synthetic_2048.jpg", "synthetic_1024.png"):
+        side, extension = name[len("synthetic_"):].split(".")
+        p50, p95 = latency_ms(lambda: model_loader.predict_mri(scans[name]), iterations)
+        results[f"predict_mri.{side}px_{extension}.p50_ms"] = p50
+        results[f"predict_mri.{side}px_{extension}.p95_ms"] = p95
+
+    p50, p95 = latency_ms(lambda: model_loader.predict_mri_high_confidence(scans["synthetic_1024.jpg"]), iterations)
+    results["predict_mri_high_confidence.1024px_jpg.p50_ms"] = p50
+    results["predict_mri_high_confidence.1024px_jpg.p95_ms"] = p95
+    if model_loader.explain_mri(scans["synthetic_1024.jpg"])[1] is not None:
+        p50, p95 = latency_ms(lambda: model_loader.predict_mri(scans["synthetic_1024.jpg"], heatmap=True), iterations)
+        results["predict_mri_heatmap.1024px_jpg.p50_ms"] = p50
+        results["predict_mri_heatmap.1024px_jpg.p95_ms"] = p95
+
+    batch = [scans["synthetic_1024.jpg"]] * (config.MRI_BULK_BATCH_SIZE * 4)
+    model_loader.predict_mri_batch(batch[:config.MRI_BULK_BATCH_SIZE]) # warm-up
+    start = time.perf_counter()
+    model_loader.predict_mri_batch(batch)
+    results["predict_mri_batch.1024px_jpg.scans_per_s"] = len(batch) / (time.perf_counter() - start)
+    return results
+
+def bench_db(sizes, users, iterations):
+    """add_prediction, get_predictions_by_user_id and get_user_stats as the predictions table grows."""
+    import database
+    from benchmarks.dashboard_query import grow_table
+
+    results = {}
+    rng = random.Random(0)
+    next_id = 1
+    for size in sizes:
+        next_id = grow_table(database.engine, next_id, size, users)
+        session = database.SessionLocal()
+        try:
+            for name, call in (
+                ("add_prediction", lambda: database.add_prediction(session, rng.randrange(1, users + 1), datetime.now(), rng.random(), "benchmark")),
+                ("get_predictions_by_user_id", lambda: database.get_predictions_by_user_id(session, rng.randrange(1, users + 1))),
+                ("get_user_stats", lambda: database.get_user_stats(session, rng.randrange(1, users + 1))),
+            ):
+                p50, p95 = latency_ms(call, iterations)
+                results[f"db.{name}.{size}_rows.p50_ms"] = p50
+                results[f"db.{name}.{size}_rows.p95_ms"] = p95
+        finally:
+            session.close()
+        next_id += iterations + 3 # add_prediction ne bhi rows jodi hai
+    return results
+
+def bench_chat(sizes, users, iterations):
+    """get_patient_history_from_db prompt construction: a new builder (cold) vs the cached one (warm)."""
+    import chat_context
+    import database
+    from benchmarks.dashboard_query import grow_table
+    from identity import UserIdentity
+
+    session = database.SessionLocal()
+    try:
+        existing = session.query(database.Prediction).count()
+    finally:
+        session.close()
+    if existing < sizes[-1]: # db case nahi chala to history khud bharo
+        grow_table(database.engine, existing + 1, sizes[-1], users)
+    results = {}
+    user = UserIdentity(id=1, name="Bench", email="bench@example.com", age=60, gender="Other", version=0, loaded_at=0.0)
+
+    def cold():
+        chat_context._builders.clear()
+        chat_context.get_patient_history_from_db(user)
+
+    results["chat.history_prompt_cold.p50_ms"], results["chat.history_prompt_cold.p95_ms"] = latency_ms(cold, iterations)
+    results["chat.history_prompt_warm.p50_ms"], results["chat.history_prompt_warm.p95_ms"] = latency_ms(
+        lambda: chat_context.get_patient_history_from_db(user), iterations
+    )
+    return results
+
+def bench_reports(iterations):
+    """render_report inline and through the background pool, and full-history export pages/s."""
+    from benchmarks.report_throughput import run
+    results = run(count=iterations, workers=(0, 2))
+    return {
+        "reports.inline.reports_per_s": results["inline_reports_per_s"],
+        "reports.pool_2.reports_per_s": results["pool_2_reports_per_s"],
+        "reports.history_export.pages_per_s": results["history_pages_per_s"],
+    }
+
+def run_suite(cases=CASES, quick=False):
+    """
+    Runs the selected cases headlessly against a temporary database and returns the full
+    result document: {"machine": ..., "settings": ..., "results": {metric: value}, "skipped": ...}.
+    """
+    iterations = 20 if quick else 100
+    sizes = (1_000, 10_000) if quick else (1_000, 10_000, 100_000)
+    users = 100
+    document = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "settings": {"cases": list(cases), "quick": quick, "iterations": iterations, "db_sizes": list(sizes), "users": users},
+        "results": {},
+        "skipped": {},
+    }
+    with tempfile.TemporaryDirectory() as folder:
+        # database ko import karne se pehle URL set karo
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(folder, 'suite.db')}"
+        import database
+        session = database.SessionLocal()
+        try:
+            session.add_all(database.User(name=f"Bench {i}", email=f"bench{i}@example.com", hashed_password="x") for i in range(users))
+            session.commit()
+        finally:
+            session.close()
+
+        for case in cases:
+            try:
+                if case == "mri":
+                    document["results"].update(bench_mri(iterations))
+                elif case == "db":
+                    document["results"].update(bench_db(sizes, users, iterations))
+                elif case == "chat":
+                    document["results"].update(bench_chat(sizes, users, iterations))
+                elif case == "reports":
+                    document["results"].update(bench_reports(iterations))
+            except Exception as e:
+                document["skipped"][case] = str(e)
+        database.engine.dispose()
+    document["machine"] = machine_info()
+    return document
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, overrides=None, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """
+    Compares two result dicts metric by metric. Returns (rows, regressions), where each row is
+    (metric, baseline, current, relative_change, allowed, regressed). relative_change is
+    positive when the metric got worse; `overrides` maps a metric-name prefix to its own threshold.
+    Latencies only regress if they also grew by more than `min_delta_ms`.
+    """
+    overrides = overrides or {}
+    rows, regressions = [], []
+    for metric in sorted(set(results) & set(baseline)):
+        old, new = baseline[metric], results[metric]
+        if not old:
+            continue
+        change = (new - old) / old if metric.endswith("_ms") else (old - new) / old
+        allowed = next((value for prefix, value in sorted(overrides.items(), key=lambda item: -len(item[0]))
+                        if metric.startswith(prefix)), threshold)
+        regressed = change > allowed and not (metric.endswith("_ms") and new - old <= min_delta_ms)
+        rows.append((metric, old, new, change, allowed, regressed))
+        if regressed:
+            regressions.append(metric)
+    return rows, regressions
+
+def parse_overrides(values):
+    overrides = {}
+    for value in values or []:
+        prefix, _, limit = value.partition("=")
+        overrides[prefix] = float(limit)
+    return overrides
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Runs the end-to-end benchmark suite, writes JSON results and checks them against a baseline.",
+    )
+    parser.add_argument("--cases", nargs="*", choices=CASES, default=list(CASES))
+    parser.add_argument("--quick", action="store_true", help="fewer iterations and smaller databases")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--save-baseline", help="also write these results to this baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown (0.15 = 15%%)")
+    parser.add_argument("--metric-threshold", action="append", metavar="PREFIX=LIMIT",
+                        help="per-metric threshold, e.g. db.get_user_stats=0.3 (repeatable)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="ignore latency increases smaller than this many milliseconds")
+    args = parser.parse_args(argv)
+
+    document = run_suite(args.cases, args.quick)
+    with open(args.output, "w") as f:
+        json.dump(document, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(document, f, indent=2)
+
+    print(f"{'metric':<52} {'value':>12}")
+    for metric, value in document["results"].items():
+        print(f"{metric:<52} {value:>12.3f}")
+    for case, reason in document["skipped"].items():
+        print(f"skipped {case}: {reason}")
+    print(f"Results written to {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine", {}).get("platform") != document["machine"]["platform"]:
+        print("Note: the baseline was recorded on a different platform; differences may not be regressions.")
+    rows, regressions = compare(
+        document["results"], baseline["results"], args.threshold, parse_overrides(args.metric_threshold), args.min_delta_ms
+    )
+    print(f"\n{'metric':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+    for metric, old, new, change, allowed, regressed in rows:
+        flag = f"  REGRESSION (> {allowed:.0%})" if regressed else ""
+        print(f"{metric:<52} {old:>10.3f} {new:>10.3f} {change:>+8.1%}{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed beyond the threshold.")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import argparse
+import os
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "") # CPU numbers only
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import numpy as np
+
+def time_calls(fn, iterations, warmup=3):
+    """Calls fn() repeatedly and returns the p50 latency in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return float(np.percentile(samples, 50))
+
+def run(iterations=50):
+    """
+    Latency of one high-confidence analysis (all views in one batched call) against a single
+    pass, and against scoring the same views one request at a time.
+    """
+    import config
+    config.MRI_CACHE_MAX_ENTRIES = 0 # har call model tak pahunche
+    config.MRI_CACHE_PERSIST = False
+    import model_loader
+    from benchmarks.decode_parity import synthetic_scans
+    from mri_preprocessing import augment_views
+
+    engine = model_loader.get_inference_engine()
+    if engine is None:
+        raise SystemExit("The MRI model could not be loaded.")
+    scan = synthetic_scans(1024)["synthetic_1024.jpg"]
+    members = len(config.MRI_TTA_VIEWS) * (1 + len(model_loader.get_ensemble_engines()))
+    views = augment_views(model_loader.preprocess_mri(scan), config.MRI_TTA_VIEWS)
+
+    def one_at_a_time():
+        for view in views:
+            engine.submit(view).result()
+
+    return {
+        "members": members,
+        "single_pass_ms": time_calls(lambda: model_loader.predict_mri(scan), iterations),
+        "high_confidence_ms": time_calls(lambda: model_loader.predict_mri_high_confidence(scan), iterations),
+        "sequential_views_ms": time_calls(one_at_a_time, iterations),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of high-confidence (TTA/ensemble) mode vs a single pass.")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    print(f"{'path':<36} {'p50 (ms)':>10}")
+    print(f"{'single pass':<36} {results['single_pass_ms']:>10.2f}")
+    print(f"{'high-confidence, batched':<36} {results['high_confidence_ms']:>10.2f}")
+    print(f"{'same views, one request at a time':<36} {results['sequential_views_ms']:>10.2f}")
+    print(f"{results['members']} members cost {results['high_confidence_ms'] / results['single_pass_ms']:.1f}x a single pass "
+          f"(vs {results['sequential_views_ms'] / results['single_pass_ms']:.1f}x unbatched)")
+
+if __name__ == "__main__":
+    main()
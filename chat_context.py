@@ -0,0 +1,259 @@
+import threading
+from collections import deque
+import config
+from database import MODALITY_LABELS, get_db, get_prediction_page, get_prediction_summary, get_predictions_since
+from llm_client import estimate_tokens
+from prediction_cache import LRUCache
+
+SYSTEM_INSTRUCTIONS = """
+**System Instructions:**
+You are an expert AI medical assistant. Your task is to answer the user's questions based  on the provided medical history context. Do not invent information or provide general medical advice.. Be empathetic and clear in your responses.
+Act as a professional healthcare assistant. if patient have disease or may have then advise them to consult a healthcare professional for accurate diagnosis and treatment.
+and you can also answer general health and wellness questions.
+"""
+
+NO_HISTORY = "No patient history is available in the database yet. The user has not performed any analysis."
+
+def render_record(number, record):
+    """Renders one checkup the way the chatbot has always described it."""
+    return (
+        f"--- Checkup Record {number} ({MODALITY_LABELS.get(record.modality, record.modality)}) ---\n"
+        f"Date of Analysis: {record.date:%Y-%m-%d %H:%M:%S}\n"
+        f"Model Prediction Confidence (Probability of Parkinson's): {record.probability*100:.2f}%\n"
+        + (f"Uncertainty (high-confidence mode, std across augmented views/checkpoints): ±{record.uncertainty*100:.2f} points\n"
+           if record.uncertainty is not None else "")
+        + f"Model's Interpretation: \"{record.result_text}\"\n\n"
+    )
+
+class HistorySummary:
+    """Running count, mean, range and dates of the checkups that are not rendered one by one."""
+
+    def __init__(self, count=0, total=0.0, minimum=None, maximum=None, above_half=0, first_date=None, last_date=None, last_id=0):
+        self.count = count
+        self.total = total # sum of probabilities (0..1)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.above_half = above_half
+        self.first_date = first_date
+        self.last_date = last_date
+        self.last_id = last_id # highest prediction id folded in
+
+    @classmethod
+    def from_aggregates(cls, summary):
+        """From database.get_prediction_summary()."""
+        return cls(
+            summary["count"], (summary["mean"] or 0.0) * summary["count"], summary["min"], summary["max"],
+            summary["above_half"], summary["first_date"], summary["last_date"], summary["last_id"],
+        )
+
+    def copy(self):
+        return HistorySummary(
+            self.count, self.total, self.minimum, self.maximum, self.above_half, self.first_date, self.last_date, self.last_id,
+        )
+
+    def add(self, record):
+        self.count += 1
+        self.total += record.probability
+        self.minimum = record.probability if self.minimum is None else min(self.minimum, record.probability)
+        self.maximum = record.probability if self.maximum is None else max(self.maximum, record.probability)
+        self.above_half += record.probability > 0.5
+        self.first_date = record.date if self.first_date is None else min(self.first_date, record.date)
+        self.last_date = record.date if self.last_date is None else max(self.last_date, record.date)
+        self.last_id = max(self.last_id, record.id)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+def summarize_records(summary, recent_mean=None):
+    """
+    Describes older checkups by their count, date range, min/max/mean, and the trend from
+    their average to `recent_mean` (average probability of the checkups shown in full).
+    """
+    lines = [
+        f"--- Summary of {summary.count} older checkups "
+        f"({summary.first_date:%Y-%m-%d} to {summary.last_date:%Y-%m-%d}) ---",
+        f"Confidence range: min {summary.minimum*100:.2f}%, max {summary.maximum*100:.2f}%, average {summary.mean*100:.2f}%",
+        f"Checkups above 50%: {summary.above_half} of {summary.count}",
+    ]
+    if recent_mean is not None:
+        change = (recent_mean - summary.mean) * 100
+        direction = "rising" if change > 5 else "falling" if change < -5 else "stable"
+        lines.append(f"Trend: {direction} ({change:+.2f} points from the average of these older checkups to the recent ones above)")
+    return "\n".join(lines) + "\n\n"
+
+class PatientContextBuilder:
+    """
+    Cached, incrementally updated history context for one user.
+    Only the newest `recent` checkups are kept, each rendered once; older ones are held as
+    aggregates computed in SQL, so neither memory nor the first load grows with the length
+    of the history. refresh() only fetches predictions newer than the last one seen.
+    render() keeps the newest checkups in full and folds the rest into one summary so the
+    text stays within the token budget.
+    """
+
+    def __init__(self, user_id, token_budget=None, recent=None, fetch_since=None, fetch_initial=None):
+        self.user_id = user_id
+        self.token_budget = token_budget or config.CHAT_CONTEXT_TOKEN_BUDGET
+        self.recent = max(1, recent or config.CHAT_CONTEXT_RECENT)
+        self.fetch_since = fetch_since or _fetch_from_db # (user_id, after_id) -> new records, oldest first
+        # (user_id, limit) -> (older aggregates, newest `limit` records oldest first)
+        self.fetch_initial = fetch_initial or _fetch_initial_from_db
+        self.records = deque() # newest `recent` records, oldest first
+        self.blocks = deque() # rendered text per record, same order
+        self.older = None # HistorySummary of everything before self.records
+        self.total = 0
+        self.last_id = 0
+        self._rendered = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Loads predictions added since the last refresh. Returns how many were new."""
+        with self._lock:
+            if self.older is None:
+                aggregates, new_records = self.fetch_initial(self.user_id, self.recent)
+                self.older = HistorySummary.from_aggregates(aggregates)
+                self.total = self.older.count
+            else:
+                new_records = self.fetch_since(self.user_id, self.last_id)
+            for record in new_records:
+                self._append(record)
+            if new_records:
+                self._rendered = None
+            return len(new_records)
+
+    def _append(self, record):
+        self.total += 1
+        if len(self.records) == self.recent: # window bhara hai: sabse purana aggregate me chala jata hai
+            self.older.add(self.records.popleft())
+            self.blocks.popleft()
+        self.records.append(record)
+        self.blocks.append(render_record(self.total, record))
+        self.last_id = max(self.last_id, record.id)
+
+    def records_after(self, record_id):
+        """Kept records with id > record_id, oldest first."""
+        with self._lock:
+            return [(record, block) for record, block in zip(self.records, self.blocks) if record.id > record_id]
+
+    def render(self):
+        """Full history context within the token budget (cached until new records arrive)."""
+        with self._lock:
+            if self._rendered is None:
+                self._rendered = self._render()
+            return self._rendered
+
+    def _render(self):
+        if not self.records:
+            return NO_HISTORY
+        header = "Here is the patient's medical history, with the most recent checkup first:\n\n"
+        budget = self.token_budget - estimate_tokens(header)
+        if self.older.count or sum(estimate_tokens(block) for block in self.blocks) > budget:
+            budget -= 80 # summary block ke liye jagah rakho
+        detailed = []
+        for block in reversed(self.blocks):
+            cost = estimate_tokens(block)
+            if cost > budget and detailed:
+                break
+            detailed.append(block)
+            budget -= cost
+        folded = self.older.copy()
+        for record in list(self.records)[:len(self.records) - len(detailed)]:
+            folded.add(record)
+        context = header + "".join(detailed)
+        if folded.count:
+            shown = list(self.records)[len(self.records) - len(detailed):]
+            context += summarize_records(folded, sum(record.probability for record in shown) / len(shown))
+        return context
+
+    def render_update(self, after_id):
+        """
+        Text describing only the checkups recorded after `after_id`, or "" if there are none.
+        If some of them have already left the recent window (more than `recent` new checkups),
+        the whole context is sent again, so they still reach the model through the summary.
+        """
+        with self._lock:
+            overflowed = self.older is not None and self.older.last_id > after_id
+        if overflowed:
+            return (
+                "**Update:** Many new checkups were recorded since the history above was shared. "
+                "This updated history replaces it:\n\n" + self.render()
+            )
+        new = self.records_after(after_id)
+        if not new:
+            return ""
+        return (
+            f"**Update:** {len(new)} new checkup(s) were recorded since the history above was shared:\n\n"
+            + "".join(block for _, block in new)
+        )
+
+def _fetch_from_db(user_id, after_id):
+    db_session = next(get_db())
+    try:
+        return get_predictions_since(db_session, user_id, after_id)
+    finally:
+        db_session.close()
+
+def _fetch_initial_from_db(user_id, limit):
+    db_session = next(get_db())
+    try:
+        rows, _ = get_prediction_page(db_session, user_id, limit=limit)
+        # window ke baad aayi rows yaha na gino; wo fetch_since (id > last_id) se aayengi
+        through_id = max((row.id for row in rows), default=0)
+        aggregates = get_prediction_summary(db_session, user_id, exclude_ids=[row.id for row in rows], through_id=through_id)
+        return aggregates, sorted(rows, key=lambda row: row.id)
+    finally:
+        db_session.close()
+
+_builders = LRUCache(config.CHAT_CONTEXT_USERS)
+_builders_lock = threading.Lock()
+
+def get_context_builder(user_id):
+    """
+    Builder per user, shared by every session of that user. Only the CHAT_CONTEXT_USERS most
+    recently active users are kept; an evicted one is rebuilt from the database on next use.
+    """
+    with _builders_lock:
+        builder = _builders.get(user_id)
+        if builder is None:
+            builder = PatientContextBuilder(user_id)
+            _builders.put(user_id, builder)
+        return builder
+
+def get_patient_history_from_db(user): # patient history ke liye
+    """Returns the patient's history context (within the token budget) for a UserIdentity."""
+    if not user:
+        return "Could not identify the user."
+    builder = get_context_builder(user.id)
+    builder.refresh()
+    return builder.render()
+
+# --- CHAT SESSION HELPERS ---
+# `model` is anything with start_chat(history=[...]), normally llm_client.get_llm_client().
+
+def start_patient_chat(model, user):
+    """
+    Starts a chat with the system instructions and the history context sent once, as the
+    opening turn. Returns (chat, sent_through_id); pass sent_through_id to build_turn_prompt.
+    """
+    context = get_patient_history_from_db(user)
+    sent_through_id = get_context_builder(user.id).last_id if user else 0
+    history = [
+        {"role": "user", "parts": [f"{SYSTEM_INSTRUCTIONS}\n**Provided Medical History Context:**\n{context}"]},
+        {"role": "model", "parts": ["Understood. I will answer using this medical history."]},
+    ]
+    return model.start_chat(history=history), sent_through_id
+
+def build_turn_prompt(user, prompt, sent_through_id):
+    """
+    Builds the message for one chat turn: the user's question, plus only the checkups
+    recorded since the context was last sent. Returns (message, new_sent_through_id).
+    """
+    if not user:
+        return prompt, sent_through_id
+    builder = get_context_builder(user.id)
+    builder.refresh()
+    update = builder.render_update(sent_through_id)
+    if not update:
+        return prompt, sent_through_id
+    return f"{update}\n**User's Question:**\n\"{prompt}\"", builder.last_id
@@ -1,11 +1,19 @@
+import argparse
 import tensorflow as tf
+import numpy as np
 import os
 
 OLD_MODEL_PATH = os.path.join('models', 'MRI.h5')
 NEW_MODEL_PATH = os.path.join('models', 'MRI.keras')
+TFLITE_MODEL_PATH = os.path.join('models', 'MRI.tflite')
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# held-out folder ke sub-folder names se label milta hai, e.g. eval/parkinson/*.png, eval/normal/*.png
+POSITIVE_LABELS = {'parkinson', 'parkinsons', 'pd', '1'}
+NEGATIVE_LABELS = {'normal', 'healthy', 'control', '0'}
 
 def convert_model():
-    print(f"TensorFlow Version: {tf.__version__}") 
+    print(f"TensorFlow Version: {tf.__version__}")
     if not os.path.exists(OLD_MODEL_PATH):
         print(f"Error: The model file was not found at '{OLD_MODEL_PATH}'")
         print("Please make sure your model is in the 'models' subfolder and the name is correct.")
@@ -18,10 +26,107 @@ def convert_model():
         model.save(NEW_MODEL_PATH)
         print("-" * 50)
         print(f"SUCCESS: Model has been converted and saved to: {NEW_MODEL_PATH}")
-        print("-" * 50)  
+        print("-" * 50)
     except Exception as e:
         print(f"\nAn error occurred during the conversion process: {e}")
         print("This might be due to a significant version mismatch or a corrupted model file.")
 
+def list_images(folder):
+    """Returns (path, label) pairs for every scan under `folder`. Label is 1/0 from the parent folder name, else None."""
+    items = []
+    for root, _, files in os.walk(folder):
+        class_name = os.path.basename(root).lower()
+        label = 1 if class_name in POSITIVE_LABELS else 0 if class_name in NEGATIVE_LABELS else None
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                items.append((os.path.join(root, name), label))
+    return items
+
+def load_tensors(paths):
+    """Preprocesses scans exactly like the app does into one float32 (N, 128, 128, 1) array."""
+    from model_loader import MRI_IMAGE_SIZE, preprocess_into
+    batch = np.empty((len(paths), *MRI_IMAGE_SIZE, 1), dtype=np.float32)
+    for i, path in enumerate(paths):
+        preprocess_into(path, batch[i, :, :, 0])
+    return batch
+
+def export_tflite(quantize="none", calibration_dir=None, num_calibration=200):
+    """Converts models/MRI.keras into a TFLite model, optionally float16 or int8 quantized."""
+    if not os.path.exists(NEW_MODEL_PATH):
+        print(f"Error: '{NEW_MODEL_PATH}' not found. Run the Keras conversion first.")
+        return False
+    model = tf.keras.models.load_model(NEW_MODEL_PATH, compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if quantize == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        if not calibration_dir:
+            print("Error: int8 quantization needs --calibration-dir with representative scans.")
+            return False
+        paths = [path for path, _ in list_images(calibration_dir)][:num_calibration]
+        if not paths:
+            print(f"Error: no scans found in '{calibration_dir}'.")
+            return False
+        calibration = load_tensors(paths)
+        print(f"Calibrating int8 ranges on {len(paths)} scans...")
+
+        def representative_dataset():
+            for tensor in calibration:
+                yield [tensor[np.newaxis]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # input/output float32 hi rehne do, taaki app same tensor bhej sake
+
+    tflite_model = converter.convert()
+    with open(TFLITE_MODEL_PATH, "wb") as f:
+        f.write(tflite_model)
+    print("-" * 50)
+    print(f"SUCCESS: TFLite model ({quantize}) saved to: {TFLITE_MODEL_PATH} ({len(tflite_model) / 1024:.1f} KB)")
+    print(f"Keras model size: {os.path.getsize(NEW_MODEL_PATH) / 1024:.1f} KB")
+    print("-" * 50)
+    return True
+
+def evaluate_against_keras(eval_dir):
+    """Scores a held-out folder with both models and reports how far the TFLite model drifts."""
+    from model_loader import TFLiteRunner
+    items = list_images(eval_dir)
+    if not items:
+        print(f"Error: no scans found in '{eval_dir}'.")
+        return
+    paths = [path for path, _ in items]
+    batch = load_tensors(paths)
+
+    keras_model = tf.keras.models.load_model(NEW_MODEL_PATH, compile=False)
+    keras_probs = keras_model.predict(batch, verbose=0)[:, 0]
+    tflite_probs = TFLiteRunner(TFLITE_MODEL_PATH)(batch)
+
+    difference = np.abs(keras_probs - tflite_probs)
+    agreement = np.mean((keras_probs > 0.5) == (tflite_probs > 0.5))
+    print(f"Held-out scans: {len(paths)}")
+    print(f"Mean |probability delta|: {difference.mean():.5f}  (max {difference.max():.5f})")
+    print(f"Decision agreement at 0.5: {agreement * 100:.2f}%")
+
+    labels = np.array([label if label is not None else -1 for _, label in items])
+    labelled = labels >= 0
+    if labelled.any():
+        keras_acc = np.mean((keras_probs[labelled] > 0.5) == labels[labelled])
+        tflite_acc = np.mean((tflite_probs[labelled] > 0.5) == labels[labelled])
+        print(f"Accuracy on {labelled.sum()} labelled scans: Keras {keras_acc * 100:.2f}%, "
+              f"TFLite {tflite_acc * 100:.2f}% (delta {(tflite_acc - keras_acc) * 100:+.2f} pts)")
+
 if __name__ == "__main__":
-    convert_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Convert the MRI model to .keras or a quantized .tflite artifact.")
+    parser.add_argument("--format", choices=["keras", "tflite"], default="keras")
+    parser.add_argument("--quantize", choices=["none", "float16", "int8"], default="none")
+    parser.add_argument("--calibration-dir", help="Representative scans for int8 calibration")
+    parser.add_argument("--eval-dir", help="Held-out scans to compare the TFLite model against Keras")
+    args = parser.parse_args()
+
+    if args.format == "keras":
+        convert_model()
+    elif export_tflite(args.quantize, args.calibration_dir) and args.eval_dir:
+        evaluate_against_keras(args.eval_dir)
@@ -1,9 +1,65 @@
+import threading
+from datetime import datetime
 import sqlalchemy as db
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, declarative_base
-import bcrypt
+from sqlalchemy.pool import QueuePool, StaticPool
+import config
+import metrics
 
-DATABASE_URL = "sqlite:///parkinsons_app.db"
-engine = db.create_engine(DATABASE_URL)
+DATABASE_URL = config.DATABASE_URL
+
+def create_db_engine(url=DATABASE_URL):
+    """
+    Creates the SQLAlchemy engine for `url`, tuned for many concurrent Streamlit sessions.
+    SQLite files get WAL journaling, synchronous=NORMAL and a busy timeout on every new
+    connection, so readers never block writers and writers wait instead of failing with
+    "database is locked". Other databases (e.g. Postgres) get a pre-pinged QueuePool.
+    """
+    pool_options = {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT_S,
+    }
+    if not url.startswith("sqlite"):
+        return db.create_engine(url, pool_pre_ping=True, pool_recycle=1800, **pool_options)
+
+    in_memory = url in ("sqlite://", "sqlite:///:memory:")
+    connect_args = {"check_same_thread": False, "timeout": config.DB_BUSY_TIMEOUT_MS / 1000}
+    if in_memory:
+        # ek hi connection share karo, warna har connection ka alag khali database banta hai
+        engine = db.create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+    else:
+        engine = db.create_engine(url, connect_args=connect_args, poolclass=QueuePool, **pool_options)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={config.DB_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+    return engine
+
+engine = create_db_engine()
+
+# --- QUERY COUNTING ---
+# Har Streamlit session apne thread me chalta hai, isliye count thread-local rakha hai.
+_query_counter = threading.local()
+
+@event.listens_for(db.engine.Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    _query_counter.count = getattr(_query_counter, "count", 0) + 1
+
+def reset_query_count():
+    """Starts a new per-rerun query count for the calling thread."""
+    _query_counter.count = 0
+
+def get_query_count():
+    """Number of SQL statements the calling thread ran since the last reset."""
+    return getattr(_query_counter, "count", 0)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -20,10 +76,89 @@ class Prediction(Base):
     __tablename__ = "predictions"
     id = db.Column(db.Integer, primary_key=True, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
-    date = db.Column(db.String)
+    date = db.Column(db.DateTime, index=True)
     probability = db.Column(db.Float)
     result_text = db.Column(db.String)
-Base.metadata.create_all(bind=engine)
+    modality = db.Column(db.String, nullable=False, server_default="mri") # "mri" or "drawing"
+    uncertainty = db.Column(db.Float) # spread of the high-confidence ensemble, None for a single pass
+    model_version = db.Column(db.String) # registry version (or file@checksum) that scored it
+    scan_key = db.Column(db.String(64), index=True) # scan_store key of the analyzed upload
+
+# How each modality is named in the history and the chatbot context
+MODALITY_LABELS = {"mri": "MRI scan", "drawing": "Spiral/wave drawing"}
+
+# Dashboard aur history dono user_id pe filter karke date se sort karte hai
+db.Index("ix_predictions_user_id_date", Prediction.user_id, Prediction.date.desc())
+
+class CachedPrediction(Base):
+    __tablename__ = "prediction_cache"
+    key = db.Column(db.String(64), primary_key=True) # sha256 of model fingerprint + input tensor
+    model_fingerprint = db.Column(db.String(64), index=True, nullable=False)
+    probability = db.Column(db.Float, nullable=False)
+
+# --- SCHEMA MIGRATIONS ---
+# create_all() only creates missing tables, so changes to existing tables are applied here.
+# Every step checks the live schema first, so running them on each start is safe.
+
+def _migrate_prediction_date_to_datetime(connection):
+    """Converts predictions.date from the old formatted string into a real DATETIME/TIMESTAMP column."""
+    columns = {column["name"]: column for column in db.inspect(connection).get_columns("predictions")}
+    if "date" not in columns or not isinstance(columns["date"]["type"], db.String):
+        return
+    print("Migrating predictions.date from string to DateTime...")
+    if connection.dialect.name == "sqlite":
+        # SQLite column type nahi badal sakta, isliye table dobara banao aur data copy karo
+        connection.exec_driver_sql("ALTER TABLE predictions RENAME TO predictions_old")
+        for index in db.inspect(connection).get_indexes("predictions_old"):
+            connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{index["name"]}"')
+        Prediction.__table__.create(connection)
+        old_columns = [name for name in columns if name != "date"]
+        column_list = ", ".join(old_columns)
+        connection.exec_driver_sql(
+            f"INSERT INTO predictions ({column_list}, date) "
+            f"SELECT {column_list}, CASE WHEN length(date) = 19 THEN date || '.000000' ELSE date END "
+            f"FROM predictions_old"
+        )
+        connection.exec_driver_sql("DROP TABLE predictions_old")
+    else:
+        connection.exec_driver_sql("ALTER TABLE predictions ALTER COLUMN date TYPE TIMESTAMP USING date::timestamp")
+
+def _add_missing_columns(connection):
+    """Adds columns that were added to the models after their table already existed."""
+    inspector = db.inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            print(f"Adding column {table.name}.{column.name}...")
+            definition = f'"{column.name}" {column.type.compile(dialect=connection.dialect)}'
+            if column.server_default is not None:
+                definition += f" DEFAULT '{column.server_default.arg}'"
+            if not column.nullable:
+                definition += " NOT NULL"
+            connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {definition}')
+
+def _create_missing_indexes(connection):
+    """Creates indexes that were added to the models after their table already existed."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+MIGRATIONS = [
+    _migrate_prediction_date_to_datetime,
+    _add_missing_columns,
+    _create_missing_indexes,
+]
+
+def migrate_schema(bind):
+    """Creates missing tables and applies every pending migration step in one transaction."""
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as connection:
+        for step in MIGRATIONS:
+            step(connection)
+
+migrate_schema(engine)
 
 
 def get_db():
@@ -34,15 +169,14 @@ def get_db():
     finally:
         database.close()
 
-def create_user(db_session, name, email, age, gender, password):
-    """Creates a new user and adds them to the database."""
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+def create_user(db_session, name, email, age, gender, hashed_password):
+    """Creates a new user and adds them to the database. Hash the password with auth_service first."""
     new_user = User(
         name=name,
         email=email,
         age=age,
         gender=gender,
-        hashed_password=hashed_password.decode('utf-8')
+        hashed_password=hashed_password
     )
     db_session.add(new_user)
     db_session.commit()
@@ -53,34 +187,78 @@ def get_user_by_email(db_session, email):
     """Retrieves a user by their email address."""
     return db_session.query(User).filter(User.email == email).first()
 
-def check_password(email, password):
-    """Verifies a user's password."""
-    db_session = next(get_db())
-    user = get_user_by_email(db_session, email)
-    db_session.close()
-    if user and bcrypt.checkpw(password.encode('utf-8'), user.hashed_password.encode('utf-8')):
-        return True
-    return False
-
-def add_prediction(db_session, user_id, date, probability, result_text):
-    """Saves a new prediction record to the database."""
+def update_password_hash(db_session, user_id, hashed_password):
+    """Replaces a user's stored password hash (used to upgrade the bcrypt cost factor)."""
+    db_session.query(User).filter(User.id == user_id).update({User.hashed_password: hashed_password})
+    db_session.commit()
+
+def add_prediction(db_session, user_id, date, probability, result_text, modality="mri", uncertainty=None, model_version=None, scan_key=None):
+    """
+    Saves a new prediction record to the database. `date` is a datetime (old "%Y-%m-%d %H:%M:%S"
+    strings are accepted); `modality` is a MODALITY_LABELS key; `uncertainty` is the standard
+    deviation reported by high-confidence mode; `model_version` identifies the model that scored it;
+    `scan_key` references the upload in the scan store.
+    """
+    if isinstance(date, str):
+        date = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
     new_prediction = Prediction(
         user_id=user_id,
         date=date,
         probability=probability,
-        result_text=result_text
+        result_text=result_text,
+        modality=modality,
+        uncertainty=uncertainty,
+        model_version=model_version,
+        scan_key=scan_key,
     )
-    db_session.add(new_prediction)
-    db_session.commit()
-    db_session.refresh(new_prediction)
+    with metrics.timer("db_write"):
+        db_session.add(new_prediction)
+        db_session.commit()
+        db_session.refresh(new_prediction)
     return new_prediction
 
 def get_predictions_by_user_id(db_session, user_id):
     """Retrieves all prediction records for a specific user, newest first."""
-    return db_session.query(Prediction).filter(Prediction.user_id == user_id).order_by(Prediction.date.desc()).all()
-def get_user_details_by_email(db_session, email):
-    """Retrieves a full user object by their email address."""
-    return db_session.query(User).filter(User.email == email).first()
+    with metrics.timer("history_query"):
+        return db_session.query(Prediction).filter(Prediction.user_id == user_id).order_by(Prediction.date.desc(), Prediction.id.desc()).all()
+def get_prediction_page(db_session, user_id, limit=20, before=None, start_date=None, end_date=None):
+    """
+    Retrieves one page of a user's history, newest first, with keyset pagination on (date, id).
+    `before` is the cursor returned with the previous page; `start_date`/`end_date` (datetimes,
+    end exclusive) narrow the range. Only the columns the history view shows are loaded.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    query = db_session.query(
+        Prediction.id, Prediction.date, Prediction.probability, Prediction.result_text, Prediction.modality,
+        Prediction.uncertainty, Prediction.model_version, Prediction.scan_key,
+    ).filter(Prediction.user_id == user_id)
+    if start_date is not None:
+        query = query.filter(Prediction.date >= start_date)
+    if end_date is not None:
+        query = query.filter(Prediction.date < end_date)
+    if before is not None:
+        before_date, before_id = before
+        query = query.filter(db.or_(
+            Prediction.date < before_date,
+            db.and_(Prediction.date == before_date, Prediction.id < before_id),
+        ))
+    with metrics.timer("history_query"):
+        rows = query.order_by(Prediction.date.desc(), Prediction.id.desc()).limit(limit + 1).all()
+    next_cursor = (rows[limit - 1].date, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def get_predictions_since(db_session, user_id, after_id=0):
+    """Retrieves a user's predictions with id > after_id, oldest first (for incremental loading)."""
+    with metrics.timer("history_query"):
+        return (
+            db_session.query(
+                Prediction.id, Prediction.date, Prediction.probability, Prediction.result_text, Prediction.modality,
+                Prediction.uncertainty, Prediction.model_version, Prediction.scan_key,
+            )
+            .filter(Prediction.user_id == user_id, Prediction.id > after_id)
+            .order_by(Prediction.id)
+            .all()
+        )
 
 def get_user_stats(db_session, user_id):
     """Retrieves statistics for a user's dashboard."""
@@ -88,9 +266,63 @@ def get_user_stats(db_session, user_id):
         "total_analyses": 0,
         "last_analysis_date": "N/A"
     }
-    stats["total_analyses"] = db_session.query(Prediction).filter(Prediction.user_id == user_id).count()
-    last_prediction = db_session.query(Prediction).filter(Prediction.user_id == user_id).order_by(Prediction.date.desc()).first()
-    if last_prediction:
-        stats["last_analysis_date"] = last_prediction.date.split(" ")[0] 
-        
-    return stats
\ No newline at end of file
+    # ek hi query: COUNT + MAX, dono (user_id, date) index se nikal aate hai
+    total, last_date = (
+        db_session.query(db.func.count(Prediction.id), db.func.max(Prediction.date))
+        .filter(Prediction.user_id == user_id)
+        .one()
+    )
+    stats["total_analyses"] = total
+    if last_date:
+        stats["last_analysis_date"] = last_date.strftime("%Y-%m-%d")
+
+    return stats
+
+def get_prediction_summary(db_session, user_id, exclude_ids=(), through_id=None):
+    """
+    Aggregates over a user's predictions with id <= `through_id`, minus `exclude_ids`, computed
+    in SQL without loading the rows: {"count", "mean", "min", "max", "above_half", "first_date",
+    "last_date", "last_id"}. Probabilities are 0..1; all but count/above_half/last_id are None
+    when nothing matches (last_id is then 0).
+    """
+    query = db_session.query(
+        db.func.count(Prediction.id), db.func.avg(Prediction.probability),
+        db.func.min(Prediction.probability), db.func.max(Prediction.probability),
+        db.func.sum(db.case((Prediction.probability > 0.5, 1), else_=0)),
+        db.func.min(Prediction.date), db.func.max(Prediction.date), db.func.max(Prediction.id),
+    ).filter(Prediction.user_id == user_id)
+    if exclude_ids:
+        query = query.filter(Prediction.id.notin_(list(exclude_ids)))
+    if through_id is not None:
+        query = query.filter(Prediction.id <= through_id)
+    with metrics.timer("history_query"):
+        count, mean, minimum, maximum, above_half, first_date, last_date, last_id = query.one()
+    return {
+        "count": count, "mean": mean, "min": minimum, "max": maximum, "above_half": above_half or 0,
+        "first_date": first_date, "last_date": last_date, "last_id": last_id or 0,
+    }
+
+def get_history_stamp(db_session, user_id):
+    """(count, highest id) of a user's predictions; changes whenever a checkup is added or removed."""
+    total, last_id = (
+        db_session.query(db.func.count(Prediction.id), db.func.max(Prediction.id))
+        .filter(Prediction.user_id == user_id)
+        .one()
+    )
+    return total, last_id or 0
+
+def get_cached_probability(db_session, key):
+    """Returns the stored probability for a prediction cache key, or None."""
+    entry = db_session.get(CachedPrediction, key)
+    return entry.probability if entry else None
+
+def save_cached_probability(db_session, key, model_fingerprint, probability):
+    """Stores a probability in the persistent prediction cache."""
+    db_session.merge(CachedPrediction(key=key, model_fingerprint=model_fingerprint, probability=probability))
+    db_session.commit()
+
+def purge_prediction_cache(db_session, keep_fingerprint):
+    """Deletes cache entries produced by any model other than `keep_fingerprint`."""
+    deleted = db_session.query(CachedPrediction).filter(CachedPrediction.model_fingerprint != keep_fingerprint).delete()
+    db_session.commit()
+    return deleted
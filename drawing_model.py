@@ -0,0 +1,98 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import numpy as np
+import metrics
+from drawing_preprocessing import DRAWING_IMAGE_SIZE, extract_drawing_features, hog_feature_count
+
+# Streamlit ke bina import hota hai; worker processes bhi yahi module use karte hai
+
+def load_drawing_model(path, mmap_mode="r"):
+    """
+    Loads the spiral/wave classifier with joblib. With `mmap_mode="r"` the NumPy arrays
+    inside the pickle are memory-mapped read-only instead of copied, so every process
+    that loads the same file shares one copy of them through the OS page cache.
+    (Compressed pickles cannot be memory-mapped; joblib then loads them normally.)
+    """
+    import joblib
+    model = joblib.load(path, mmap_mode=mmap_mode)
+    expected = getattr(model, "n_features_in_", None)
+    if expected is not None and expected != hog_feature_count():
+        raise ValueError(f"{path} expects {expected} features, but the HOG extractor produces {hog_feature_count()}.")
+    return model
+
+def _positive_column(model):
+    """Index of the Parkinson's class in predict_proba's output."""
+    classes = [str(label).lower() for label in getattr(model, "classes_", [0, 1])]
+    for index, label in enumerate(classes):
+        if "parkinson" in label:
+            return index
+    return len(classes) - 1 # numeric labels: 1 = parkinson
+
+def score_features(model, features):
+    """Probability of Parkinson's for each row of a float32 (N, n_features) array."""
+    if hasattr(model, "predict_proba"):
+        return np.asarray(model.predict_proba(features)[:, _positive_column(model)], dtype=np.float32)
+    return np.asarray(model.predict(features), dtype=np.float32) # classifier bina probabilities: 0/1
+
+class DrawingScorer:
+    """Binarizes, extracts features and scores drawings in batches, reusing one uint8 buffer."""
+
+    def __init__(self, model, batch_size=64):
+        self.model = model
+        self.batch_size = batch_size
+        self._buffer = np.empty((batch_size, *DRAWING_IMAGE_SIZE), dtype=np.uint8)
+
+    def score(self, sources):
+        """Probabilities for up to `batch_size` drawings (PIL images, encoded bytes or file paths)."""
+        with metrics.timer("drawing_features"):
+            features = extract_drawing_features(sources, self._buffer)
+        with metrics.timer("drawing_infer"):
+            return score_features(self.model, features)
+
+    def iter_batches(self, sources):
+        """Yields (chunk_sources, probabilities) for an iterable of drawings, in input order."""
+        iterator = iter(sources)
+        while True:
+            chunk = list(islice(iterator, self.batch_size))
+            if not chunk:
+                return
+            yield chunk, self.score(chunk)
+
+# --- WORKER PROCESS SIDE ---
+_worker_scorer = None
+
+def _init_worker(model_path, batch_size):
+    global _worker_scorer
+    _worker_scorer = DrawingScorer(load_drawing_model(model_path, mmap_mode="r"), batch_size)
+
+def _score_chunk(paths):
+    return _worker_scorer.score(paths)
+
+def iter_drawing_predictions_parallel(model_path, paths, workers, batch_size=64, depth=None):
+    """
+    Scores drawing files in a process pool, one chunk of `batch_size` paths per task.
+    Each worker memory-maps the model file, so the forest's arrays are not duplicated per
+    process. At most `depth` chunks are in flight; yields (chunk_paths, probabilities) in order.
+    """
+    depth = depth or 2 * workers
+    iterator = iter(paths)
+    in_flight = deque()
+    # spawn, kyunki parent me TensorFlow threads chal rahe ho sakte hai (fork safe nahi)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_path, batch_size),
+    ) as pool:
+        while True:
+            while len(in_flight) < depth:
+                chunk = list(islice(iterator, batch_size))
+                if not chunk:
+                    break
+                in_flight.append((chunk, pool.submit(_score_chunk, chunk)))
+            if not in_flight:
+                return
+            chunk, future = in_flight.popleft()
+            yield chunk, future.result()
@@ -0,0 +1,86 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from mri_preprocessing import load_gray
+
+# Streamlit/scikit-learn ke bina import hota hai, taaki worker processes halke rahe
+DRAWING_IMAGE_SIZE = (200, 200)
+
+# HOG settings the WAVE.pkl model was trained with, i.e. skimage.feature.hog(
+#   orientations=9, pixels_per_cell=(10, 10), cells_per_block=(2, 2),
+#   transform_sqrt=True, block_norm="L1") on the binarized 200x200 drawing.
+HOG_ORIENTATIONS = 9
+HOG_PIXELS_PER_CELL = (10, 10)
+HOG_CELLS_PER_BLOCK = (2, 2)
+
+def hog_feature_count(image_size=DRAWING_IMAGE_SIZE):
+    """Length of the feature vector hog_features() produces for one image."""
+    cells = [size // pixels for size, pixels in zip(image_size, HOG_PIXELS_PER_CELL)]
+    blocks = [count - block + 1 for count, block in zip(cells, HOG_CELLS_PER_BLOCK)]
+    return blocks[0] * blocks[1] * HOG_CELLS_PER_BLOCK[0] * HOG_CELLS_PER_BLOCK[1] * HOG_ORIENTATIONS
+
+def binarize_into(source, out):
+    """
+    Writes the 200x200 binarized drawing for `source` (PIL image, encoded bytes or file path)
+    into `out`, a uint8 (200, 200) view: pen strokes 255, paper 0, Otsu threshold.
+    """
+    import cv2
+    image = cv2.resize(load_gray(source, target_size=DRAWING_IMAGE_SIZE), DRAWING_IMAGE_SIZE)
+    cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU, dst=out)
+    return out
+
+def _orientation_bins(g_row, g_col):
+    """
+    Unsigned orientation bin (0-179 degrees, HOG_ORIENTATIONS equal bins) of each gradient.
+    Same result as floor((degrees(arctan2(g_row, g_col)) % 180) / bin_width), but each bin edge
+    is a sign test of a cross product, which is several times cheaper than arctan2.
+    """
+    # neeche wale half-plane ke vectors ko ulta karo: unsigned orientation me dono same hai
+    flip = (g_row < 0) | ((g_row == 0) & (g_col < 0))
+    y = np.where(flip, -g_row, g_row)
+    x = np.where(flip, -g_col, g_col)
+    bins = np.zeros(y.shape, dtype=np.intp)
+    for edge in np.deg2rad(np.arange(1, HOG_ORIENTATIONS) * (180 / HOG_ORIENTATIONS)):
+        bins += (y * np.float32(np.cos(edge)) - x * np.float32(np.sin(edge))) >= 0 # angle >= edge
+    return bins
+
+def hog_features(images):
+    """
+    HOG descriptors for a whole (N, H, W) batch at once, matching skimage.feature.hog with
+    the settings above: hard orientation binning, cell means, L1-normalized 2x2 blocks.
+    Every step is a NumPy array operation over the batch instead of per-image Python loops.
+    Returns a float32 (N, hog_feature_count()) array.
+    """
+    images = np.sqrt(np.asarray(images, dtype=np.float32)) # transform_sqrt
+    count, height, width = images.shape
+    g_row = np.zeros_like(images)
+    g_col = np.zeros_like(images)
+    g_row[:, 1:-1, :] = images[:, 2:, :] - images[:, :-2, :]
+    g_col[:, :, 1:-1] = images[:, :, 2:] - images[:, :, :-2]
+    magnitude = np.hypot(g_row, g_col)
+    bins = _orientation_bins(g_row, g_col)
+
+    cell_rows, cell_cols = HOG_PIXELS_PER_CELL
+    n_rows, n_cols = height // cell_rows, width // cell_cols
+    magnitude = magnitude[:, :n_rows * cell_rows, :n_cols * cell_cols]
+    bins = bins[:, :n_rows * cell_rows, :n_cols * cell_cols]
+    # har pixel ka (image, cell, bin) slot; ek hi bincount poore batch ke histograms bana deta hai
+    cell_index = (np.arange(n_rows * cell_rows)[:, None] // cell_rows) * n_cols + np.arange(n_cols * cell_cols)[None, :] // cell_cols
+    slots = (np.arange(count)[:, None, None] * (n_rows * n_cols) + cell_index) * HOG_ORIENTATIONS + bins
+    histograms = np.bincount(slots.ravel(), weights=magnitude.ravel(), minlength=count * n_rows * n_cols * HOG_ORIENTATIONS)
+    histograms = (histograms / (cell_rows * cell_cols)).reshape(count, n_rows, n_cols, HOG_ORIENTATIONS)
+
+    # (N, blocks_r, blocks_c, orientations, block_r, block_c) -> skimage order (..., block_r, block_c, orientations)
+    blocks = sliding_window_view(histograms, HOG_CELLS_PER_BLOCK, axis=(1, 2)).transpose(0, 1, 2, 4, 5, 3)
+    norms = np.abs(blocks).sum(axis=(3, 4, 5), keepdims=True) + 1e-5
+    return (blocks / norms).reshape(count, -1).astype(np.float32, copy=False)
+
+def extract_drawing_features(sources, out=None):
+    """
+    Binarizes a list of drawings into one uint8 (N, 200, 200) buffer and returns their
+    HOG features as a float32 (N, hog_feature_count()) array.
+    """
+    if out is None or len(out) < len(sources):
+        out = np.empty((len(sources), *DRAWING_IMAGE_SIZE), dtype=np.uint8)
+    for i, source in enumerate(sources):
+        binarize_into(source, out[i])
+    return hog_features(out[:len(sources)])
@@ -0,0 +1,74 @@
+import numpy as np
+from mri_preprocessing import MRI_IMAGE_SIZE, load_gray
+
+# Streamlit ke bina import hota hai; TensorFlow sirf build_gradcam_runner me chahiye
+
+def _symbolic_outputs(model):
+    """
+    (inputs, [(layer name, output tensor)], model output). A loaded Sequential model has no
+    symbolic graph of its own, so its layers are replayed on a fresh Input.
+    """
+    import tensorflow as tf
+    if isinstance(model, tf.keras.Sequential):
+        inputs = x = tf.keras.Input(shape=(*MRI_IMAGE_SIZE, 1))
+        outputs = []
+        for layer in model.layers:
+            x = layer(x)
+            outputs.append((layer.name, x))
+        return inputs, outputs, x
+    return model.inputs, [(layer.name, layer.output) for layer in model.layers], model.outputs[0]
+
+def build_gradcam_runner(model, layer_name=None):
+    """
+    Returns a function that scores a float32 (N, 128, 128, 1) batch and returns
+    (probabilities, cams): N probabilities plus N Grad-CAM maps of the layer's spatial size,
+    scaled to 0..1. Both come from the same forward pass, recorded once by a GradientTape,
+    so a heatmap costs one backward pass on top of the normal prediction, not a second model call.
+    `layer_name` defaults to the last layer with a 4-D (convolutional) output.
+    """
+    import tensorflow as tf
+    inputs, outputs, prediction = _symbolic_outputs(model)
+    feature_maps = [(name, output) for name, output in outputs if len(output.shape) == 4]
+    if layer_name:
+        feature_maps = [(name, output) for name, output in feature_maps if name == layer_name]
+    if not feature_maps:
+        raise ValueError(f"No convolutional layer named {layer_name!r}." if layer_name else "The model has no convolutional layer.")
+    grad_model = tf.keras.Model(inputs=inputs, outputs=[feature_maps[-1][1], prediction])
+
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, *MRI_IMAGE_SIZE, 1), dtype=tf.float32)])
+    def explain(batch):
+        with tf.GradientTape() as tape:
+            activations, predictions = grad_model(batch, training=False)
+            scores = predictions[:, 0]
+        # har sample ka score sirf apni activations pe depend karta hai, to sum ka gradient per-sample hi hai
+        gradients = tape.gradient(scores, activations)
+        weights = tf.reduce_mean(gradients, axis=(1, 2))
+        cams = tf.nn.relu(tf.einsum("nhwc,nc->nhw", activations, weights))
+        cams = cams / (tf.reduce_max(cams, axis=(1, 2), keepdims=True) + 1e-8)
+        return scores, cams
+
+    def runner(batch):
+        scores, cams = explain(batch)
+        return scores.numpy(), cams.numpy()
+    return runner
+
+def heatmap_to_uint8(cam, size=MRI_IMAGE_SIZE):
+    """Upsamples one 0..1 activation map to `size` and stores it as uint8 (16 KB at 128x128)."""
+    import cv2
+    resized = cv2.resize(np.asarray(cam, dtype=np.float32), size, interpolation=cv2.INTER_LINEAR)
+    return np.clip(np.rint(resized * 255.0), 0, 255).astype(np.uint8)
+
+def render_overlay(source, heatmap, alpha=0.4, max_side=512):
+    """
+    Blends a uint8 heatmap (JET colormap) over the scan it was computed for. `source` is
+    anything load_gray accepts; large uploads are decoded at reduced size for display.
+    Returns an RGB uint8 array.
+    """
+    import cv2
+    image = load_gray(source, reduced=True, target_size=(max_side // 2, max_side // 2))
+    scale = max_side / max(image.shape)
+    if scale < 1.0:
+        image = cv2.resize(image, (round(image.shape[1] * scale), round(image.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+    colored = cv2.applyColorMap(cv2.resize(heatmap, (image.shape[1], image.shape[0])), cv2.COLORMAP_JET)
+    blended = cv2.addWeighted(cv2.cvtColor(image, cv2.COLOR_GRAY2BGR), 1.0 - alpha, colored, alpha, 0.0)
+    return cv2.cvtColor(blended, cv2.COLOR_BGR2RGB)
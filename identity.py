@@ -0,0 +1,87 @@
+import threading
+import time
+from dataclasses import dataclass
+import streamlit as st
+import config
+from database import get_db, get_user_by_email, get_query_count
+
+@dataclass(frozen=True)
+class UserIdentity:
+    """Compact, immutable profile of the logged-in user, kept in session state."""
+    id: int
+    name: str
+    email: str
+    age: int
+    gender: str
+    version: int # profile version it was loaded at (see invalidate_identity)
+    loaded_at: float
+
+@st.cache_resource
+def _profile_versions():
+    """Process-wide profile version per email. Bumping one forces every session to reload it."""
+    return {"versions": {}, "lock": threading.Lock()}
+
+def _current_version(email):
+    return _profile_versions()["versions"].get(email, 0)
+
+@st.cache_data(ttl=config.IDENTITY_TTL_S, show_spinner=False)
+def _load_profile(email, version):
+    """Shared TTL cache: one DB lookup per (email, version) for all sessions."""
+    db_session = next(get_db())
+    try:
+        user = get_user_by_email(db_session, email)
+        if user is None:
+            return None
+        return {"id": user.id, "name": user.name, "email": user.email, "age": user.age, "gender": user.gender}
+    finally:
+        db_session.close()
+
+def _resolve(email):
+    version = _current_version(email)
+    profile = _load_profile(email, version)
+    if profile is None:
+        return None
+    return UserIdentity(**profile, version=version, loaded_at=time.monotonic())
+
+def login_identity(email):
+    """Resolves the user's profile once at login and stores it in the session."""
+    identity = _resolve(email)
+    st.session_state['identity'] = identity
+    return identity
+
+def get_current_identity():
+    """
+    Returns the logged-in user's UserIdentity without touching the database on most reruns.
+    The session copy is reloaded only if the profile was invalidated or its TTL expired.
+    """
+    email = st.session_state.get('user_email')
+    if not email:
+        return None
+    identity = st.session_state.get('identity')
+    if (identity is None or identity.email != email
+            or identity.version != _current_version(email)
+            or time.monotonic() - identity.loaded_at > config.IDENTITY_TTL_S):
+        identity = login_identity(email)
+    return identity
+
+def invalidate_identity(email):
+    """
+    Call whenever a user row is created or its profile changes: every session picks up the
+    new profile on its next rerun instead of a cached one (or a cached "no such user").
+    """
+    versions = _profile_versions()
+    with versions["lock"]:
+        versions["versions"][email] = versions["versions"].get(email, 0) + 1
+
+def clear_identity():
+    """Forgets the session's identity on logout."""
+    st.session_state['identity'] = None
+
+def render_query_count():
+    """Debug caption with the number of SQL queries this rerun made (SHOW_QUERY_COUNT=true)."""
+    if config.SHOW_QUERY_COUNT:
+        st.caption(f"🔎 DB queries this run: {get_query_count()}")
+
+def is_admin(identity):
+    """True if the user's email is listed in ADMIN_EMAILS."""
+    return identity is not None and identity.email.lower() in config.ADMIN_EMAILS
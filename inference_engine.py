@@ -0,0 +1,224 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+
+_STOP = object()
+
+class InferenceQueueFull(Exception):
+    """Raised by submit() when the engine already has the maximum number of requests waiting."""
+
+class InferenceTimeout(TimeoutError):
+    """Set on a request's Future when it waited in the queue longer than the engine's timeout."""
+
+class MRIBatchEngine:
+    """
+    Shared micro-batching engine for MRI inference.
+    Requests submitted from any Streamlit session are queued, grouped into a single
+    (N, 128, 128, 1) tensor and scored with one model call on a background worker thread.
+    The batching window is adaptive: a request arriving at an idle engine is scored right
+    away, and the engine only waits up to max_wait_ms for company while other work is queued
+    or being scored. The queue is bounded (admission control) and requests that wait too
+    long are timed out.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=16, max_wait_ms=10.0,
+                 max_queue_depth=64, timeout_s=30.0, num_workers=1):
+        # predict_batch takes a float32 (N, 128, 128, 1) array and returns N probabilities
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue_depth = max(1, int(max_queue_depth))
+        self.timeout_s = timeout_s
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._counts = {"submitted": 0, "rejected": 0, "timed_out": 0, "completed": 0, "failed": 0, "batches": 0}
+        self._wait_ms = deque(maxlen=1000) # last 1000 queue waits
+        self._batch_sizes = deque(maxlen=1000)
+        self._in_flight = 0 # batches being scored by other workers right now
+        self._workers = [
+            threading.Thread(target=self._run, name=f"mri-batch-engine-{i}", daemon=True)
+            for i in range(max(1, int(num_workers)))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, tensor):
+        """
+        Queues one preprocessed (128, 128, 1) tensor and returns a Future for its probability.
+        Raises InferenceQueueFull if the queue is already at max_queue_depth.
+        """
+        with self._stats_lock:
+            if self._queue.qsize() >= self.max_queue_depth:
+                self._counts["rejected"] += 1
+                raise InferenceQueueFull(f"{self._queue.qsize()} MRI scans are already waiting.")
+            self._counts["submitted"] += 1
+            future = Future()
+            self._queue.put((tensor, future, time.monotonic(), 0))
+        return future
+
+    def submit_many(self, tensors):
+        """
+        Queues several tensors back to back (e.g. the augmented views of one scan) and returns
+        one Future per tensor. They are admitted or rejected together, and since they sit next
+        to each other in the queue they are scored in the same batch whenever max_batch_size allows.
+        """
+        with self._stats_lock:
+            if self._queue.qsize() + len(tensors) > self.max_queue_depth:
+                self._counts["rejected"] += len(tensors)
+                raise InferenceQueueFull(f"{self._queue.qsize()} MRI scans are already waiting.")
+            self._counts["submitted"] += len(tensors)
+            futures = []
+            now = time.monotonic()
+            for i, tensor in enumerate(tensors):
+                future = Future()
+                # aakhri field: group ke kitne items peeche aa rahe hai, taaki worker window me unka intezaar kare
+                self._queue.put((tensor, future, now, len(tensors) - 1 - i))
+                futures.append(future)
+        return futures
+
+    def stats(self):
+        """Queue depth, request counters and wait-time percentiles, for sizing the pool."""
+        with self._stats_lock:
+            waits = np.array(self._wait_ms) if self._wait_ms else np.zeros(1)
+            sizes = np.array(self._batch_sizes) if self._batch_sizes else np.zeros(1)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "workers": len(self._workers),
+                **self._counts,
+                "wait_ms_p50": float(np.percentile(waits, 50)),
+                "wait_ms_p95": float(np.percentile(waits, 95)),
+                "wait_ms_max": float(waits.max()),
+                "mean_batch_size": float(sizes.mean()),
+            }
+
+    def close(self):
+        """Stops the worker threads after the requests already queued have been scored."""
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+
+    def _collect(self):
+        """
+        Blocks for the first request and takes whatever is already queued behind it. It then
+        keeps gathering until the batch is full or the window closes, but only under load: more
+        requests were already waiting, the rest of a submit_many group is still being queued,
+        or another worker is scoring a batch. Otherwise it goes at once.
+        """
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        stopping = False
+        while len(batch) < self.max_batch_size: # jo pehle se queue me hai, bina ruke
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+
+        with self._stats_lock:
+            # akela request idle engine pe turant jaata hai; window sirf load ya adhoore group pe
+            under_load = len(batch) > 1 or batch[-1][3] > 0 or self._in_flight > 0
+        while under_load and not stopping and len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        if stopping:
+            self._queue.put(_STOP) # finish this batch first, stop on the next loop
+        return batch
+
+    def _admit(self, batch):
+        """Drops cancelled and timed-out requests and records how long the rest waited."""
+        now = time.monotonic()
+        ready = []
+        for tensor, future, enqueued_at, _ in batch:
+            if not future.set_running_or_notify_cancel():
+                continue # cancelled futures ko skip karo
+            waited = now - enqueued_at
+            with self._stats_lock:
+                self._wait_ms.append(waited * 1000.0)
+            if self.timeout_s and waited > self.timeout_s:
+                with self._stats_lock:
+                    self._counts["timed_out"] += 1
+                future.set_exception(InferenceTimeout(f"MRI scan waited {waited:.1f}s in the queue."))
+                continue
+            ready.append((tensor, future))
+        return ready
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = self._admit(batch)
+            if not batch:
+                continue
+            with self._stats_lock:
+                self._in_flight += 1
+            try:
+                inputs = np.stack([tensor for tensor, _ in batch]).astype(np.float32, copy=False)
+                probabilities = self.predict_batch(inputs)
+            except Exception as e:
+                with self._stats_lock:
+                    self._in_flight -= 1
+                    self._counts["failed"] += len(batch)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._stats_lock:
+                self._in_flight -= 1
+                self._counts["completed"] += len(batch)
+                self._counts["batches"] += 1
+                self._batch_sizes.append(len(batch))
+            for (_, future), probability in zip(batch, probabilities):
+                future.set_result(float(probability))
+
+def gather(named_futures):
+    """
+    Combines a {name: Future} mapping into one Future that resolves to {name: result} once
+    every member is done, or fails with the first member's exception. Cancelling the combined
+    Future cancels the members that have not started yet.
+    """
+    combined = Future()
+    remaining = [len(named_futures)]
+    lock = threading.Lock()
+
+    def member_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] or combined.done():
+                return
+        try:
+            results = {name: future.result() for name, future in named_futures.items()}
+        except BaseException as e: # cancelled members raise CancelledError
+            if combined.set_running_or_notify_cancel():
+                combined.set_exception(e)
+            return
+        if combined.set_running_or_notify_cancel():
+            combined.set_result(results)
+
+    def combined_done(future):
+        if future.cancelled():
+            for member in named_futures.values():
+                member.cancel()
+
+    combined.add_done_callback(combined_done)
+    for future in named_futures.values():
+        future.add_done_callback(member_done)
+    return combined
@@ -0,0 +1,231 @@
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+import config
+import metrics
+from prediction_cache import LRUCache
+
+# --- BACKENDS ---
+# A backend turns the full conversation (a list of {"role": "user"|"model", "parts": [text]})
+# into a stream of text chunks. Sessions keep the history themselves, so a failed request
+# can simply be sent again.
+
+class StubBackend:
+    """
+    Deterministic offline backend for tests and load tests (LLM_BACKEND=stub).
+    The reply depends only on the conversation, and is streamed word by word with an
+    optional per-word delay to mimic a real model's pacing.
+    """
+
+    def __init__(self, token_delay_ms=0):
+        self.token_delay = token_delay_ms / 1000.0
+        self.calls = [] # every conversation sent, for inspecting prompt sizes in tests
+
+    def stream(self, contents, timeout=None):
+        self.calls.append(contents)
+        question = contents[-1]["parts"][0]
+        earlier = sum(len(turn["parts"][0]) for turn in contents[:-1])
+        reply = (
+            f"(stub) Reply to a {len(question)}-character message, "
+            f"with {len(contents) - 1} earlier turns ({earlier} characters) of context. "
+            f"Digest {hashlib.sha256(question.encode('utf-8')).hexdigest()[:12]}."
+        )
+        for i, word in enumerate(reply.split(" ")):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+class GeminiBackend:
+    """Google Gemini through google.generativeai, streamed with a per-request timeout."""
+
+    def __init__(self, api_key, model_name):
+        import google.generativeai as genai # sirf gemini backend ko chahiye
+        genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(model_name)
+
+    def stream(self, contents, timeout=None):
+        request_options = {"timeout": timeout} if timeout else None
+        response = self._model.generate_content(contents, stream=True, request_options=request_options)
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+def create_backend(name=None):
+    """Builds the backend named by LLM_BACKEND. Raises RuntimeError if it cannot be configured."""
+    name = name or config.LLM_BACKEND
+    if name == "stub":
+        return StubBackend(config.LLM_STUB_TOKEN_DELAY_MS)
+    if name == "gemini":
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise RuntimeError("GEMINI_API_KEY not found in .env file.")
+        return GeminiBackend(api_key, config.LLM_MODEL)
+    raise RuntimeError(f"Unknown LLM_BACKEND {name!r} (expected 'gemini' or 'stub').")
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for throughput numbers."""
+    return len(text) // 4 + 1
+
+# --- CLIENT ---
+
+class LLMClient:
+    """
+    Wraps a backend with retries, timeouts, a response cache and latency instrumentation.
+    Shared by every chat session in the process; start_chat() returns a ChatSession.
+    """
+
+    def __init__(self, backend, timeout_s=60.0, max_retries=2, retry_backoff_s=1.0, cache_entries=256):
+        self.backend = backend
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self.cache = LRUCache(cache_entries)
+        self._stats_lock = threading.Lock()
+        self._counts = {"requests": 0, "cache_hits": 0, "retries": 0, "errors": 0}
+        self._ttft_ms = deque(maxlen=1024)
+        self._tokens_per_s = deque(maxlen=1024)
+
+    def start_chat(self, history=None):
+        """Starts a conversation; `history` uses the same turn format as google.generativeai."""
+        return ChatSession(self, history or [])
+
+    def open_stream(self, contents):
+        """
+        Starts a backend stream and waits for its first chunk, retrying with exponential
+        backoff if the request fails before anything arrives. Once text has been shown
+        to the user a failure is not retried, since the answer would be duplicated.
+        Returns (first_chunk, rest_of_stream).
+        """
+        attempt = 0
+        while True:
+            try:
+                stream = iter(self.backend.stream(contents, timeout=self.timeout_s))
+                return next(stream, ""), stream
+            except Exception:
+                if attempt >= self.max_retries:
+                    self._count("errors")
+                    raise
+                self._count("retries")
+                time.sleep(self.retry_backoff_s * 2 ** attempt)
+                attempt += 1
+
+    def record(self, ttft_s, total_s, tokens, cached):
+        """Adds one finished reply to the running counters."""
+        with self._stats_lock:
+            self._counts["requests"] += 1
+            if cached:
+                self._counts["cache_hits"] += 1
+                return
+            self._ttft_ms.append(ttft_s * 1000.0)
+            self._tokens_per_s.append(tokens / total_s if total_s > 0 else 0.0)
+        metrics.observe("llm_call", total_s)
+        metrics.observe("llm_first_token", ttft_s)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        """Request/cache/retry counters plus time-to-first-token and tokens/sec of model calls."""
+        with self._stats_lock:
+            ttft = np.array(self._ttft_ms) if self._ttft_ms else np.zeros(1)
+            rates = np.array(self._tokens_per_s) if self._tokens_per_s else np.zeros(1)
+            return {
+                **self._counts,
+                "ttft_ms_p50": float(np.percentile(ttft, 50)),
+                "ttft_ms_p95": float(np.percentile(ttft, 95)),
+                "tokens_per_s_mean": float(rates.mean()),
+            }
+
+class ChatSession:
+    """
+    One conversation. The history is kept here and sent in full on every request, so
+    retries are safe and a failed or interrupted reply never ends up in the history.
+    `context_digest` hashes the whole conversation so far (the starting history plus every
+    completed turn), and keys the response cache together with the question, so a cached
+    reply is only reused for the same question at the same point of an identical conversation.
+    """
+
+    def __init__(self, client, history):
+        self.client = client
+        self.history = [{"role": turn["role"], "parts": list(turn["parts"])} for turn in history]
+        self.context_digest = hashlib.sha256(repr(self.history).encode("utf-8")).hexdigest()
+        self.last_stats = None # {"ttft_s", "total_s", "tokens", "tokens_per_s", "cached"} of the latest reply
+
+    def _cache_key(self, digest, question):
+        normalized = " ".join(question.lower().split())
+        return hashlib.sha256(f"{digest}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def stream(self, message, question=None):
+        """
+        Yields the reply to `message` chunk by chunk (suitable for st.write_stream).
+        `question` is the user's own text when `message` also carries extra context;
+        that context is then part of the cache key. Identical questions against an
+        identical conversation are answered from the cache without calling the model.
+        """
+        question = message if question is None else question
+        digest = self.context_digest
+        if message != question:
+            digest = hashlib.sha256(f"{digest}\n{message}".encode("utf-8")).hexdigest()
+        key = self._cache_key(digest, question)
+        start = time.perf_counter()
+
+        cached = self.client.cache.get(key)
+        if cached is not None:
+            yield cached
+            self._finish(message, cached, digest, start, start, cached=True)
+            return
+
+        contents = self.history + [{"role": "user", "parts": [message]}]
+        first, rest = self.client.open_stream(contents)
+        first_at = time.perf_counter()
+        parts = [first]
+        if first:
+            yield first
+        for chunk in rest:
+            parts.append(chunk)
+            yield chunk
+        reply = "".join(parts)
+        self.client.cache.put(key, reply)
+        self._finish(message, reply, digest, start, first_at, cached=False)
+
+    def send_message(self, message, question=None):
+        """Non-streaming variant of stream(); returns the full reply text."""
+        return "".join(self.stream(message, question))
+
+    def _finish(self, message, reply, digest, start, first_at, cached):
+        total = time.perf_counter() - start
+        # only once the reply made it into the history; the turn itself is part of the conversation now
+        self.context_digest = hashlib.sha256(f"{digest}\n{message}\n{reply}".encode("utf-8")).hexdigest()
+        tokens = estimate_tokens(reply)
+        self.history.append({"role": "user", "parts": [message]})
+        self.history.append({"role": "model", "parts": [reply]})
+        self.last_stats = {
+            "ttft_s": first_at - start,
+            "total_s": total,
+            "tokens": tokens,
+            "tokens_per_s": tokens / total if total > 0 else 0.0,
+            "cached": cached,
+        }
+        self.client.record(first_at - start, total, tokens, cached)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_llm_client():
+    """Process-wide client for the configured backend, so every session shares its response cache."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(
+                create_backend(),
+                timeout_s=config.LLM_TIMEOUT_S,
+                max_retries=config.LLM_MAX_RETRIES,
+                retry_backoff_s=config.LLM_RETRY_BACKOFF_S,
+                cache_entries=config.LLM_RESPONSE_CACHE_ENTRIES,
+            )
+            metrics.register_collector("llm", _client.stats)
+        return _client
@@ -0,0 +1,210 @@
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import config
+
+# Streamlit ke bina import hota hai, taaki preprocessing/database modules bhi time record kar sake
+
+# Stages the analysis path reports; any other name passed to timer()/observe() works too.
+STAGES = ("decode", "preprocess", "infer", "db_write", "history_query", "llm_call")
+
+# Prometheus histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """
+    Cumulative bucket counts (for Prometheus) plus the most recent samples with their
+    timestamps, from which rolling-window percentiles are computed.
+    """
+
+    def __init__(self, max_samples=4096):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1) # last one is +Inf
+        self.count = 0
+        self.total = 0.0
+        self._samples = deque(maxlen=max_samples) # (monotonic time, seconds)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self._samples.append((time.monotonic(), seconds))
+
+    def window(self, window_s):
+        """Durations (seconds) observed in the last `window_s` seconds."""
+        cutoff = time.monotonic() - window_s
+        with self._lock:
+            return [seconds for at, seconds in self._samples if at >= cutoff]
+
+    def summary(self, window_s):
+        """Lifetime count/sum plus p50/p95/p99 in milliseconds over the rolling window."""
+        recent = np.array(self.window(window_s)) * 1000.0
+        summary = {"count": self.count, "sum_s": self.total, "window_count": len(recent)}
+        for q in (50, 95, 99):
+            summary[f"p{q}_ms"] = float(np.percentile(recent, q)) if len(recent) else None
+        return summary
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+_collectors = {} # name -> function returning a flat dict of numbers (engine, cache, LLM stats)
+_enabled = config.METRICS_ENABLED
+_NO_TIMER = contextlib.nullcontext() # reusable, so a disabled timer() allocates nothing
+
+def set_enabled(enabled):
+    """Turns recording on or off at runtime (benchmarks compare both)."""
+    global _enabled
+    _enabled = enabled
+
+def is_enabled():
+    return _enabled
+
+def _histogram(stage):
+    histogram = _histograms.get(stage)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(stage, Histogram())
+    return histogram
+
+def observe(stage, seconds):
+    """Records one duration for `stage`. A no-op when metrics are disabled."""
+    if _enabled:
+        _histogram(stage).observe(seconds)
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+def timer(stage):
+    """Context manager that records how long its block took under `stage`."""
+    return _Timer(_histogram(stage)) if _enabled else _NO_TIMER
+
+def timed(stage, fn):
+    """Wraps `fn` so every call is recorded under `stage`."""
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _histogram(stage).observe(time.perf_counter() - start)
+    return wrapper
+
+def register_collector(name, collect):
+    """Adds a function whose numeric stats (e.g. MRIBatchEngine.stats) are exported as gauges."""
+    _collectors[name] = collect
+
+def snapshot(window_s=None):
+    """All stage summaries and collector stats as a JSON-serializable dict."""
+    window_s = window_s or config.METRICS_WINDOW_S
+    with _histograms_lock:
+        histograms = dict(_histograms)
+    gauges = {}
+    for name, collect in list(_collectors.items()):
+        try:
+            gauges[name] = {key: value for key, value in collect().items() if isinstance(value, (int, float))}
+        except Exception as e:
+            gauges[name] = {"error": str(e)}
+    return {
+        "enabled": _enabled,
+        "window_s": window_s,
+        "stages": {stage: histogram.summary(window_s) for stage, histogram in sorted(histograms.items())},
+        "gauges": gauges,
+    }
+
+def to_prometheus():
+    """Prometheus text exposition format: one histogram per stage, one gauge per collector value."""
+    lines = [
+        "# HELP parkinsons_stage_duration_seconds Time spent in each stage of the analysis path.",
+        "# TYPE parkinsons_stage_duration_seconds histogram",
+    ]
+    with _histograms_lock:
+        histograms = sorted(_histograms.items())
+    for stage, histogram in histograms:
+        with histogram._lock:
+            counts, count, total = list(histogram.bucket_counts), histogram.count, histogram.total
+        cumulative = 0
+        for bound, bucket in zip((*BUCKETS, "+Inf"), counts):
+            cumulative += bucket
+            lines.append(f'parkinsons_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'parkinsons_stage_duration_seconds_sum{{stage="{stage}"}} {total}')
+        lines.append(f'parkinsons_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+    for name, values in snapshot()["gauges"].items():
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                lines.append(f"parkinsons_{name}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+def write_file(path):
+    """Writes the metrics to `path` (JSON for *.json, Prometheus text otherwise), atomically."""
+    body = json.dumps(snapshot(), indent=2) if path.endswith(".json") else to_prometheus()
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        f.write(body)
+    os.replace(temporary, path) # scraper kabhi aadhi likhi file na padhe
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = to_prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # har scrape ko console pe mat likho
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+def start_exporters():
+    """
+    Starts, once per process, the periodic file export (METRICS_EXPORT_PATH) and the
+    /metrics and /metrics.json endpoint on 127.0.0.1:METRICS_HTTP_PORT, if configured.
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started or not _enabled:
+            return
+        _exporters_started = True
+    if config.METRICS_EXPORT_PATH:
+        def export_loop():
+            while True:
+                time.sleep(config.METRICS_EXPORT_INTERVAL_S)
+                try:
+                    write_file(config.METRICS_EXPORT_PATH)
+                except OSError as e:
+                    print(f"Metrics export failed: {e}")
+        threading.Thread(target=export_loop, name="metrics-export", daemon=True).start()
+    if config.METRICS_HTTP_PORT:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", config.METRICS_HTTP_PORT), _MetricsHandler)
+        except OSError as e:
+            print(f"Metrics endpoint not started: {e}")
+            return
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"Metrics available at http://127.0.0.1:{config.METRICS_HTTP_PORT}/metrics")
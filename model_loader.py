@@ -1,15 +1,31 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
 import streamlit as st
-import tensorflow as tf
-import cv2
 import numpy as np
-import joblib
-from PIL import Image
+from itertools import islice
+import config
+import metrics
+from inference_engine import MRIBatchEngine, InferenceQueueFull, InferenceTimeout, gather
+from mri_preprocessing import MRI_IMAGE_SIZE, preprocess_into, augment_views
+from prediction_cache import PredictionCache, LRUCache
+from gradcam import build_gradcam_runner, heatmap_to_uint8
+from scan_store import get_scan_store
+from model_registry import ModelHandle, ModelManager, legacy_version
+from drawing_model import DrawingScorer, load_drawing_model, iter_drawing_predictions_parallel
+
+KERAS_MODEL_PATH = 'models/MRI.keras'
 
 @st.cache_resource
 def load_h5_model():
-    """Loads the pre-trained H5 model for MRI scans."""
+    """
+    Loads models/MRI.keras itself, for tools that compare runners on it. The app scores
+    with the registry's active version through get_model_manager().
+    """
     try:
-        model = tf.keras.models.load_model('models/MRI.keras')
+        import tensorflow as tf # sirf keras backend ko chahiye
+        model = tf.keras.models.load_model(KERAS_MODEL_PATH)
         print("H5 Model loaded successfully.")
         return model
     except Exception as e:
@@ -18,33 +34,504 @@ def load_h5_model():
 
 @st.cache_resource
 def load_pkl_model():
-    """Loads the pre-trained PKL model for Spiral/Wave drawings."""
+    """Loads the pre-trained PKL model for Spiral/Wave drawings (arrays memory-mapped, see load_drawing_model)."""
     try:
-        model = joblib.load('models/WAVE.pkl')
+        model = load_drawing_model(config.DRAWING_MODEL_PATH, mmap_mode="r")
         print("PKL Model loaded successfully.")
         return model
     except Exception as e:
         st.error(f"Error loading PKL model: {e}")
         return None
-# yaha prediction karta model ke liye
-def predict_mri(image: Image.Image):
+
+def build_mri_runner(model, mode="compiled"):
     """
-    Takes a PIL image of an MRI, preprocesses it, and predicts the probability.
-    Heatmap functionality is temporarily REMOVED.
+    Returns a function that scores a float32 (N, 128, 128, 1) batch and returns N probabilities.
+    "compiled" calls the model through a tf.function traced once for a fixed input signature,
+    which skips model.predict's per-call data adapter and callback setup.
     """
-    model = load_h5_model()
-    if model is None:
+    if mode == "predict":
+        return lambda batch: model.predict(batch, batch_size=len(batch), verbose=0)[:, 0]
+    import tensorflow as tf
+
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, *MRI_IMAGE_SIZE, 1), dtype=tf.float32)])
+    def serve(batch):
+        return model(batch, training=False)
+
+    return lambda batch: serve(batch).numpy()[:, 0]
+
+def _tflite_interpreter_class():
+    """Picks the lightest TFLite interpreter that is installed, falling back to TensorFlow's own."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+class TFLiteRunner:
+    """Scores float32 (N, 128, 128, 1) batches with a converted .tflite model."""
+
+    def __init__(self, model_path, num_threads=None):
+        self._interpreter = _tflite_interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input_index = self._interpreter.get_input_details()[0]['index']
+        self._output_index = self._interpreter.get_output_details()[0]['index']
+        self._batch_size = 1
+        self._lock = threading.Lock() # interpreter is not thread-safe
+
+    def __call__(self, batch):
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input_index, [len(batch), *MRI_IMAGE_SIZE, 1])
+                self._interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self._interpreter.set_tensor(self._input_index, np.ascontiguousarray(batch, dtype=np.float32))
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output_index)[:, 0].copy()
+
+def active_model_path():
+    """Path of the model file the configured backend scores with."""
+    return config.MRI_TFLITE_PATH if config.MRI_BACKEND == "tflite" else KERAS_MODEL_PATH
+
+def _new_engine(runner):
+    return MRIBatchEngine(
+        runner,
+        max_batch_size=config.MRI_BATCH_MAX_SIZE,
+        max_wait_ms=config.MRI_BATCH_MAX_WAIT_MS,
+        max_queue_depth=config.MRI_QUEUE_MAX_DEPTH,
+        timeout_s=config.MRI_REQUEST_TIMEOUT_S,
+        num_workers=config.MRI_ENGINE_WORKERS,
+    )
+
+def load_model_handle(spec):
+    """Loads one model version, warms it up and starts its engine (ModelManager calls this off the request path)."""
+    model = None
+    if spec.backend == "tflite":
+        runner = TFLiteRunner(spec.path, num_threads=config.MRI_TFLITE_THREADS)
+    else:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(spec.path)
+        runner = build_mri_runner(model, config.MRI_INFERENCE_MODE)
+    runner(np.zeros((1, *MRI_IMAGE_SIZE, 1), dtype=np.float32)) # first call traces the graph
+    print(f"MRI model {spec.version} loaded successfully.")
+    runner = metrics.timed("infer", runner) # warm-up ke baad wrap karo, tracing time infer me na gine
+    return ModelHandle(spec, runner, _new_engine(runner), model)
+
+@st.cache_resource
+def get_model_manager():
+    """
+    Loads the registry's active MRI model (or the MRI_BACKEND file when there is no registry)
+    once per process and starts watching the manifest, so new versions are hot-swapped.
+    """
+    manager = ModelManager(
+        load_model_handle,
+        config.MODEL_REGISTRY_DIR,
+        active_model_path(),
+        config.MRI_BACKEND,
+        poll_s=config.MODEL_REGISTRY_POLL_S,
+        retire_after_s=config.MRI_REQUEST_TIMEOUT_S,
+    )
+    try:
+        manager.refresh()
+    except Exception as e:
+        st.error(f"Error loading MRI model: {e}")
+        return None
+    manager.start_watching()
+    metrics.register_collector("mri_engine", lambda: manager.active.engine.stats())
+    metrics.register_collector("model_registry", manager.stats)
+    return manager
+
+def load_mri_runner():
+    """Scoring function of the active MRI model version, or None if no model could be loaded."""
+    manager = get_model_manager()
+    return manager.active.runner if manager is not None else None
+
+def active_model_version():
+    """Version label of the MRI model currently serving, stored with each prediction."""
+    manager = get_model_manager()
+    return manager.active.spec.version if manager is not None else None
+
+def drawing_model_version():
+    """Version label of the drawing model: its file name plus a short checksum."""
+    return legacy_version(config.DRAWING_MODEL_PATH)
+
+@st.cache_resource(max_entries=4)
+def _prediction_cache_for(model_path, fingerprint):
+    cache = PredictionCache(
+        model_path,
+        fingerprint,
+        max_entries=config.MRI_CACHE_MAX_ENTRIES,
+        persist=config.MRI_CACHE_PERSIST,
+    )
+    metrics.register_collector("prediction_cache", lambda: {"hits": cache.hits, "misses": cache.misses, "entries": len(cache.memory)})
+    return cache
+
+def get_prediction_cache(handle=None):
+    """
+    Prediction cache of a model version (default: the active one); entries are tied to that
+    file's checksum. Pass the handle that will score the request, so a hot swap in between
+    cannot mix up versions.
+    """
+    if handle is None:
+        manager = get_model_manager()
+        if manager is None:
+            return None
+        handle = manager.active
+    return _prediction_cache_for(handle.spec.path, handle.spec.sha256)
+
+def get_inference_engine():
+    """The micro-batching engine of the active model, shared by every session in this process."""
+    manager = get_model_manager()
+    return manager.active.engine if manager is not None else None
+
+@st.cache_resource
+def get_ensemble_engines():
+    """
+    One engine per extra checkpoint in MRI_ENSEMBLE_PATHS, keyed by file name, for
+    high-confidence mode. Checkpoints that fail to load are reported and left out.
+    """
+    engines = {}
+    for path in config.MRI_ENSEMBLE_PATHS:
+        try:
+            if path.endswith(".tflite"):
+                runner = TFLiteRunner(path, num_threads=config.MRI_TFLITE_THREADS)
+            else:
+                import tensorflow as tf
+                runner = build_mri_runner(tf.keras.models.load_model(path), config.MRI_INFERENCE_MODE)
+            runner(np.zeros((1, *MRI_IMAGE_SIZE, 1), dtype=np.float32))
+        except Exception as e:
+            st.error(f"Error loading ensemble checkpoint {path}: {e}")
+            continue
+        engines[os.path.basename(path)] = _new_engine(metrics.timed("infer", runner))
+    return engines
+
+class ModelWarmup:
+    """Loads the model and runs one dummy inference on a background thread."""
+
+    def __init__(self):
+        self.status = "loading"
+        self.error = None
+        self.started_at = time.monotonic()
+        self.ready_in = None # seconds taken to become ready
+        self._thread = threading.Thread(target=self._run, name="mri-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            engine = get_inference_engine() # loads + warms the runner
+            self.status = "ready" if engine is not None else "failed"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        self.ready_in = time.monotonic() - self.started_at
+
+    def wait(self, timeout=None):
+        """Blocks until warm-up finishes; returns True if the model is ready."""
+        self._thread.join(timeout)
+        return self.status == "ready"
+
+@st.cache_resource(show_spinner=False)
+def start_model_warmup():
+    """
+    Kicks off model loading once per server process. Called at the top of app.py and the
+    detection page, so the first script run starts it without blocking the page render.
+    """
+    return ModelWarmup()
+
+def render_model_status():
+    """Small status indicator showing whether the MRI model is ready."""
+    warmup = start_model_warmup()
+    if warmup.status == "ready":
+        st.caption(f"🟢 AI model {active_model_version()} ready (loaded in {warmup.ready_in:.1f}s)")
+    elif warmup.status == "loading":
+        st.caption("🟡 AI model is warming up... you can upload your scan meanwhile.")
+    else:
+        st.caption("🔴 AI model failed to load.")
+
+def preprocess_mri(image):
+    """
+    Converts an MRI into the (128, 128, 1) float32 tensor the model expects.
+    `image` can be a PIL image or the raw uploaded bytes; bytes take the faster cv2.imdecode path.
+    A tensor already preprocessed (e.g. mmapped from the scan store) is used as is.
+    """
+    if isinstance(image, np.ndarray) and image.shape == (*MRI_IMAGE_SIZE, 1):
+        return np.array(image, dtype=np.float32) # mmap se memory me copy
+    tensor = np.empty((*MRI_IMAGE_SIZE, 1), dtype=np.float32)
+    preprocess_into(image, tensor[:, :, 0], reduced=config.MRI_REDUCED_DECODE)
+    return tensor
+
+def submit_mri(image):
+    """
+    Queues an MRI for scoring on the shared engine without blocking the caller.
+    Returns a Future that resolves to the probability, or None if the model is unavailable.
+    The future's `model_version` is the version that scores it; save that one, not
+    active_model_version(), which a hot swap may have changed in between.
+    Raises InferenceQueueFull when the engine is saturated. A sample of scans is also
+    shadow-scored by the registry's canary version, if one is set.
+    """
+    manager = get_model_manager()
+    if manager is None:
+        return None
+    active = manager.active # swap beech me ho jaye to bhi ek hi version se score karo
+    tensor = preprocess_mri(image)
+
+    cache = get_prediction_cache(active)
+    key = cache.key_for(tensor)
+    probability = cache.get(key) if key is not None else None
+    if probability is not None:
+        future = Future()
+        future.set_result(probability)
+    else:
+        future = active.engine.submit(tensor)
+        if key is not None:
+            # cancel hua future (page ka timeout) exception() pe CancelledError deta hai
+            future.add_done_callback(lambda done: not done.cancelled() and done.exception() is None and cache.put(key, done.result()))
+    manager.shadow(tensor, future) # cached scans bhi canary ke comparison me gine jate hai
+    future.model_version = active.spec.version
+    return future
+
+@st.cache_resource(max_entries=2)
+def _gradcam_runner(version, _model):
+    """Grad-CAM runner for one model version, traced on first use (st does not hash `_model`)."""
+    runner = build_gradcam_runner(_model, config.MRI_GRADCAM_LAYER or None)
+    runner(np.zeros((1, *MRI_IMAGE_SIZE, 1), dtype=np.float32))
+    return metrics.timed("gradcam", runner)
+
+@st.cache_resource
+def get_heatmap_cache():
+    """uint8 heatmaps of recent predictions, keyed by prediction, shared by all sessions."""
+    return LRUCache(config.MRI_HEATMAP_CACHE_ENTRIES)
+
+def explain_mri(image):
+    """
+    Scores an MRI and computes its Grad-CAM heatmap in a single forward/backward pass.
+    Returns (probability, heatmap) with the heatmap as a uint8 (128, 128) array, or
+    (None, None) if no model is loaded or the active one cannot give gradients (TFLite).
+    """
+    manager = get_model_manager()
+    if manager is None or manager.active.model is None:
         return None, None
+    active = manager.active
+    runner = _gradcam_runner(active.spec.version, active.model)
+    probabilities, cams = runner(preprocess_mri(image)[np.newaxis])
+    return float(probabilities[0]), heatmap_to_uint8(cams[0])
 
-    image_size = (128, 128)
-    image_cv = np.array(image.convert('RGB')) 
-    image_gray = cv2.cvtColor(image_cv, cv2.COLOR_RGB2GRAY)
-    image_resized = cv2.resize(image_gray, image_size)
-    image_normalized = image_resized / 255.0
-    image_expanded = np.expand_dims(image_normalized, axis=-1)
-    image_expanded = np.expand_dims(image_expanded, axis=0)
+def get_heatmap(prediction_key, image):
+    """
+    Returns the uint8 heatmap for a prediction, computing it with explain_mri on first request
+    only. `prediction_key` is the saved prediction's id (anything hashable works).
+    """
+    cache = get_heatmap_cache()
+    heatmap = cache.get(prediction_key)
+    if heatmap is None:
+        _, heatmap = explain_mri(image)
+        if heatmap is not None:
+            cache.put(prediction_key, heatmap)
+    return heatmap
+
+# yaha prediction karta model ke liye
+def predict_mri(image, heatmap=False):
+    """
+    Takes an MRI (PIL image or uploaded bytes), preprocesses it, and predicts the probability.
+    The scan is batched together with concurrent requests from other sessions.
+    With heatmap=True it is scored by explain_mri instead, which returns the Grad-CAM heatmap
+    from the same pass; otherwise the second value is None.
+    """
+    if heatmap:
+        return explain_mri(image)
+    future = submit_mri(image)
+    if future is None:
+        return None, None
 
-    prediction = model.predict(image_expanded)
-    probability = float(prediction[0][0])
+    probability = future.result(timeout=config.MRI_REQUEST_TIMEOUT_S)
 
     return probability, None
+
+def summarize_members(members):
+    """
+    Reduces {"model/view": probability} to the high-confidence result: the mean probability,
+    the standard deviation across members as the uncertainty, and the members themselves.
+    """
+    scores = np.fromiter(members.values(), dtype=np.float64, count=len(members))
+    return {
+        "probability": float(scores.mean()),
+        "uncertainty": float(scores.std()),
+        "members": {name: float(score) for name, score in members.items()},
+    }
+
+def submit_mri_high_confidence(image):
+    """
+    Queues the high-confidence analysis of an MRI: every MRI_TTA_VIEWS augmentation, scored by
+    the main model and each MRI_ENSEMBLE_PATHS checkpoint. Each model gets the views as one group,
+    so they share a single batched forward pass. Returns a Future resolving to summarize_members(),
+    or None if the model is unavailable; its `model_version` is the main model's version, as
+    with submit_mri. Raises InferenceQueueFull when an engine is saturated.
+    The prediction cache is not used; it only holds single-pass probabilities.
+    """
+    manager = get_model_manager()
+    if manager is None:
+        return None
+    active = manager.active
+    views = augment_views(preprocess_mri(image), config.MRI_TTA_VIEWS)
+    engines = {active.spec.version: active.engine, **get_ensemble_engines()}
+
+    members = {}
+    try:
+        for model_name, model_engine in engines.items():
+            for view, future in zip(config.MRI_TTA_VIEWS, model_engine.submit_many(views)):
+                members[f"{model_name}/{view}"] = future
+    except InferenceQueueFull:
+        for future in members.values(): # aadha ensemble score karne ka fayda nahi
+            future.cancel()
+        raise
+
+    result = Future()
+    def resolve(done):
+        if done.cancelled():
+            result.cancel()
+        elif not result.set_running_or_notify_cancel():
+            return # page ne timeout pe cancel kar diya
+        elif done.exception() is not None:
+            result.set_exception(done.exception())
+        else:
+            result.set_result(summarize_members(done.result()))
+    combined = gather(members)
+    combined.add_done_callback(resolve)
+    result.add_done_callback(lambda done: done.cancelled() and combined.cancel())
+    result.model_version = active.spec.version
+    return result
+
+def predict_mri_high_confidence(image):
+    """Blocking form of submit_mri_high_confidence; returns its result dict, or None if the model is unavailable."""
+    future = submit_mri_high_confidence(image)
+    if future is None:
+        return None
+    return future.result(timeout=config.MRI_REQUEST_TIMEOUT_S)
+
+def _print_scan_error(source, message):
+    print(f"Skipping {source}: {message}")
+
+def _score_chunk(runner, chunk, batch, errors, on_error):
+    probabilities = np.asarray(runner(batch), dtype=np.float32)
+    for slot, message in errors.items():
+        probabilities[slot] = np.nan
+        on_error(chunk[slot], message)
+    return probabilities
+
+def iter_mri_batch_predictions(images, batch_size=None, workers=None, on_error=_print_scan_error):
+    """
+    Scores an iterable of PIL images or file paths in fixed-size chunks.
+    Yields (chunk_sources, probabilities) per chunk. One float32 buffer of
+    (batch_size, 128, 128, 1) is reused for every chunk, so memory stays flat
+    no matter how many scans are streamed through.
+    With `workers` > 0 (file paths only) decoding runs in a process pool that writes
+    into a shared-memory ring, overlapping decode with inference.
+    A scan that cannot be read or decoded does not stop the run: its probability is NaN
+    and on_error(source, message) is called for it.
+    """
+    runner = load_mri_runner()
+    if runner is None:
+        return
+    batch_size = batch_size or config.MRI_BULK_BATCH_SIZE
+    workers = config.MRI_PREPROCESS_WORKERS if workers is None else workers
+    if workers > 0:
+        from preprocess_pool import PreprocessPipeline
+        with PreprocessPipeline(workers, batch_size, reduced=config.MRI_REDUCED_DECODE) as pipeline:
+            for chunk, batch, errors in pipeline.iter_batches(images):
+                yield chunk, _score_chunk(runner, chunk, batch, errors, on_error)
+        return
+
+    buffer = np.empty((batch_size, *MRI_IMAGE_SIZE, 1), dtype=np.float32)
+    iterator = iter(images)
+    while True:
+        chunk = list(islice(iterator, batch_size))
+        if not chunk:
+            return
+        errors = {}
+        for i, source in enumerate(chunk):
+            try:
+                preprocess_into(source, buffer[i, :, :, 0], reduced=config.MRI_REDUCED_DECODE)
+            except ValueError as e:
+                buffer[i] = 0.0 # kharab scan baaki chunk ko na roke
+                errors[i] = str(e)
+        yield chunk, _score_chunk(runner, chunk, buffer[:len(chunk)], errors, on_error)
+
+def iter_stored_scan_predictions(keys, batch_size=None):
+    """
+    Re-scores scans from the scan store by memory-mapping their saved tensors, so nothing is
+    decoded or resized again. Yields (chunk_keys, probabilities); keys without a tensor are skipped.
+    """
+    runner = load_mri_runner()
+    if runner is None:
+        return
+    store = get_scan_store()
+    batch_size = batch_size or config.MRI_BULK_BATCH_SIZE
+    buffer = np.empty((batch_size, *MRI_IMAGE_SIZE, 1), dtype=np.float32)
+    iterator = iter(keys)
+    while True:
+        chunk = []
+        for key in iterator:
+            tensor = store.load_tensor(key)
+            if tensor is None:
+                continue
+            buffer[len(chunk)] = tensor
+            chunk.append(key)
+            if len(chunk) == batch_size:
+                break
+        if not chunk:
+            return
+        yield chunk, np.asarray(runner(buffer[:len(chunk)]), dtype=np.float32)
+
+def predict_mri_batch(images, batch_size=None, workers=None):
+    """
+    Scores a list or iterator of PIL images / file paths (`workers` > 0 needs file paths).
+    Returns a float32 NumPy array with one probability per image (NaN for unreadable ones),
+    or None if the model is unavailable.
+    """
+    if load_mri_runner() is None:
+        return None
+    results = [probabilities for _, probabilities in iter_mri_batch_predictions(images, batch_size, workers)]
+    if not results:
+        return np.empty(0, dtype=np.float32)
+    return np.concatenate(results)
+
+def predict_drawing(image):
+    """
+    Takes a spiral/wave drawing (PIL image or uploaded bytes) and predicts the probability
+    of Parkinson's. Returns None if the model is unavailable.
+    """
+    model = load_pkl_model()
+    if model is None:
+        return None
+    return float(DrawingScorer(model, batch_size=1).score([image])[0])
+
+def iter_drawing_batch_predictions(images, batch_size=None, workers=None):
+    """
+    Scores an iterable of drawings (PIL images, bytes or file paths) in fixed-size chunks.
+    Yields (chunk_sources, probabilities) per chunk. With `workers` > 0 (file paths only)
+    chunks are scored in a process pool that memory-maps the model file.
+    """
+    batch_size = batch_size or config.DRAWING_BULK_BATCH_SIZE
+    workers = config.DRAWING_WORKERS if workers is None else workers
+    if workers > 0:
+        yield from iter_drawing_predictions_parallel(config.DRAWING_MODEL_PATH, images, workers, batch_size)
+        return
+    model = load_pkl_model()
+    if model is None:
+        return
+    yield from DrawingScorer(model, batch_size).iter_batches(images)
+
+def predict_drawing_batch(images, batch_size=None, workers=None):
+    """
+    Scores a list or iterator of drawings (`workers` > 0 needs file paths).
+    Returns a float32 NumPy array with one probability per drawing, or None if the model is unavailable.
+    """
+    if load_pkl_model() is None:
+        return None
+    results = [probabilities for _, probabilities in iter_drawing_batch_predictions(images, batch_size, workers)]
+    if not results:
+        return np.empty(0, dtype=np.float32)
+    return np.concatenate(results)
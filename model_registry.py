@@ -0,0 +1,315 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+import config
+from inference_engine import InferenceQueueFull, gather
+from prediction_cache import model_fingerprint
+
+# Streamlit/TensorFlow ke bina import hota hai: CLI aur model_loader dono isse use karte hai
+
+MANIFEST_NAME = "manifest.json"
+BACKENDS = {".keras": "keras", ".h5": "keras", ".tflite": "tflite"}
+
+class RegistryError(Exception):
+    """Raised for an unknown version, a bad manifest or an artifact whose checksum does not match."""
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """One servable model file: which version it is, where it lives and how to load it."""
+    version: str
+    path: str
+    backend: str # "keras" or "tflite"
+    sha256: str
+
+@dataclass(frozen=True)
+class ModelHandle:
+    """A loaded, warmed model and the engine that serves it."""
+    spec: ModelSpec
+    runner: object
+    engine: object
+    model: object = None # the Keras model, for Grad-CAM (None for TFLite)
+
+def legacy_version(path):
+    """Version label for a model file outside the registry: its name plus a short checksum."""
+    fingerprint = model_fingerprint(path)
+    return f"{os.path.basename(path)}@{fingerprint[:12]}" if fingerprint else os.path.basename(path)
+
+def empty_manifest():
+    return {"active": None, "canary": None, "canary_fraction": 0.0, "versions": {}}
+
+def load_manifest(directory):
+    """Returns the registry's manifest, or None if the directory has none yet."""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        raise RegistryError(f"Could not read the model manifest: {e}")
+    return {**empty_manifest(), **manifest}
+
+def save_manifest(directory, manifest):
+    """Writes the manifest atomically, so a polling server never reads half of it."""
+    path = os.path.join(directory, MANIFEST_NAME)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, path)
+
+def register_version(directory, source, version, notes=""):
+    """
+    Copies a .keras/.h5/.tflite file into the registry as `version` and records its sha256.
+    Registered artifacts are never overwritten; register a new version instead.
+    """
+    extension = os.path.splitext(source)[1].lower()
+    if extension not in BACKENDS:
+        raise RegistryError(f"Unsupported model file type: {source}")
+    os.makedirs(directory, exist_ok=True)
+    manifest = load_manifest(directory) or empty_manifest()
+    if version in manifest["versions"]:
+        raise RegistryError(f"Version {version} is already registered.")
+
+    file_name = f"{version}{extension}"
+    destination = os.path.join(directory, file_name)
+    digest = hashlib.sha256()
+    with open(source, "rb") as src, open(f"{destination}.tmp", "wb") as dst:
+        for block in iter(lambda: src.read(1 << 20), b""):
+            digest.update(block)
+            dst.write(block)
+    os.replace(f"{destination}.tmp", destination)
+    manifest["versions"][version] = {
+        "file": file_name,
+        "sha256": digest.hexdigest(),
+        "backend": BACKENDS[extension],
+        "registered_at": datetime.now().isoformat(timespec="seconds"),
+        "notes": notes,
+    }
+    if manifest["active"] is None:
+        manifest["active"] = version # pehla version seedha serve hota hai
+    save_manifest(directory, manifest)
+    return manifest["versions"][version]
+
+def set_active(directory, version):
+    """Makes `version` the serving model. Running servers swap to it on their next poll."""
+    manifest = _require(directory, version)
+    manifest["active"] = version
+    if manifest["canary"] == version:
+        manifest["canary"] = None
+    save_manifest(directory, manifest)
+
+def set_canary(directory, version, fraction):
+    """Shadow-scores `fraction` of live scans with `version` (None stops the canary)."""
+    manifest = _require(directory, version) if version is not None else (load_manifest(directory) or empty_manifest())
+    if not 0.0 <= fraction <= 1.0:
+        raise RegistryError("The canary fraction must be between 0 and 1.")
+    manifest["canary"] = version
+    manifest["canary_fraction"] = fraction if version is not None else 0.0
+    save_manifest(directory, manifest)
+
+def _require(directory, version):
+    manifest = load_manifest(directory)
+    if manifest is None or version not in manifest["versions"]:
+        raise RegistryError(f"Version {version} is not registered in {directory}.")
+    return manifest
+
+def spec_for(directory, manifest, version):
+    """Resolves a registered version to a ModelSpec after checking the file against its checksum."""
+    entry = manifest["versions"].get(version)
+    if entry is None:
+        raise RegistryError(f"Version {version} is not registered.")
+    path = os.path.join(directory, entry["file"])
+    fingerprint = model_fingerprint(path) # stat se cached, har poll pe dobara hash nahi hota
+    if fingerprint != entry["sha256"]:
+        raise RegistryError(f"Checksum mismatch for model version {version} ({path}).")
+    return ModelSpec(version, path, entry["backend"], fingerprint)
+
+class ModelManager:
+    """
+    Holds the serving ("active") MRI model and an optional canary, and swaps them without a
+    restart. A new version is loaded, checked and warmed on the watcher thread; only then is
+    the pointer flipped, so no request ever sees a half-loaded model. The replaced engine keeps
+    scoring what was already queued and is closed once MRI_REQUEST_TIMEOUT_S has passed.
+    Without a manifest the legacy file (`legacy_path`) is served, and is swapped when it changes.
+    """
+
+    def __init__(self, load_handle, directory, legacy_path, legacy_backend, poll_s=10.0, retire_after_s=30.0):
+        self.load_handle = load_handle # ModelSpec -> ModelHandle (loads, warms, starts an engine)
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.legacy_backend = legacy_backend
+        self.poll_s = poll_s
+        self.retire_after_s = retire_after_s
+        self.active = None
+        self.canary = None
+        self.canary_fraction = 0.0
+        self.last_error = None
+        self.swaps = 0
+        self._swap_lock = threading.Lock()
+        self._shadow_lock = threading.Lock()
+        self._shadow = {"scored": 0, "skipped": 0, "failed": 0, "agreed": 0, "abs_diff_sum": 0.0}
+        self._watcher = None
+
+    def desired(self):
+        """(active spec, canary spec or None, canary fraction) as the registry currently says."""
+        manifest = load_manifest(self.directory)
+        if manifest is None or manifest["active"] is None:
+            fingerprint = model_fingerprint(self.legacy_path)
+            if fingerprint is None:
+                raise RegistryError(f"Model file not found: {self.legacy_path}")
+            spec = ModelSpec(legacy_version(self.legacy_path), self.legacy_path, self.legacy_backend, fingerprint)
+            return spec, None, 0.0
+        active = spec_for(self.directory, manifest, manifest["active"])
+        canary = spec_for(self.directory, manifest, manifest["canary"]) if manifest["canary"] else None
+        return active, canary, float(manifest["canary_fraction"]) if canary else 0.0
+
+    def refresh(self):
+        """
+        Loads whatever the registry asks for that is not loaded yet, then flips the pointers.
+        Blocking. On failure the current models keep serving and the error is raised.
+        """
+        with self._swap_lock:
+            loaded = [handle for handle in (self.active, self.canary) if handle is not None]
+
+            def obtain(spec):
+                # canary promote hua ho to dobara load mat karo
+                for handle in loaded:
+                    if handle.spec == spec:
+                        return handle
+                return self.load_handle(spec)
+
+            try:
+                active_spec, canary_spec, fraction = self.desired()
+                active = obtain(active_spec)
+                canary = obtain(canary_spec) if canary_spec is not None else None
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            if self.active is not None and active is not self.active:
+                print(f"MRI model swapped: {self.active.spec.version} -> {active.spec.version}")
+                self.swaps += 1
+            self.active, self.canary, self.canary_fraction = active, canary, fraction
+            self.last_error = None
+            for handle in loaded:
+                if handle is not active and handle is not canary:
+                    self._retire(handle)
+
+    def _retire(self, handle):
+        """Closes a replaced engine once every request that may still hold it has finished."""
+        def close():
+            time.sleep(self.retire_after_s)
+            handle.engine.close()
+        threading.Thread(target=close, name=f"retire-{handle.spec.version}", daemon=True).start()
+
+    def start_watching(self):
+        """Polls the registry every poll_s seconds on a daemon thread (once per manager)."""
+        if self.poll_s <= 0 or self._watcher is not None:
+            return
+        def watch():
+            while True:
+                time.sleep(self.poll_s)
+                previous = self.last_error
+                try:
+                    self.refresh()
+                except Exception as e:
+                    if str(e) != previous: # har poll pe wahi error mat chhapo
+                        print(f"Model registry refresh failed, still serving {self.active.spec.version}: {e}")
+        self._watcher = threading.Thread(target=watch, name="model-registry", daemon=True)
+        self._watcher.start()
+
+    def shadow(self, tensor, active_future):
+        """
+        With probability canary_fraction, also scores `tensor` with the canary and records how
+        its probability compares with the active model's. Callers never wait on the canary.
+        """
+        canary = self.canary
+        if canary is None or random.random() >= self.canary_fraction:
+            return
+        try:
+            canary_future = canary.engine.submit(tensor)
+        except InferenceQueueFull: # canary ki wajah se user ka scan kabhi reject na ho
+            self._count("skipped")
+            return
+
+        def record(both):
+            if both.cancelled() or both.exception() is not None:
+                self._count("failed")
+                return
+            scores = both.result()
+            with self._shadow_lock:
+                self._shadow["scored"] += 1
+                self._shadow["agreed"] += (scores["active"] > 0.5) == (scores["canary"] > 0.5)
+                self._shadow["abs_diff_sum"] += abs(scores["active"] - scores["canary"])
+        gather({"active": active_future, "canary": canary_future}).add_done_callback(record)
+
+    def _count(self, name):
+        with self._shadow_lock:
+            self._shadow[name] += 1
+
+    def stats(self):
+        """Swap count and canary agreement, exported as metrics gauges."""
+        with self._shadow_lock:
+            shadow = dict(self._shadow)
+        scored = shadow.pop("scored")
+        return {
+            "swaps": self.swaps,
+            "canary_fraction": self.canary_fraction,
+            "shadow_scored": scored,
+            "shadow_skipped": shadow["skipped"],
+            "shadow_failed": shadow["failed"],
+            "shadow_agreement": shadow["agreed"] / scored if scored else None,
+            "shadow_mean_abs_diff": shadow["abs_diff_sum"] / scored if scored else None,
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the versioned MRI model registry.")
+    parser.add_argument("--dir", default=config.MODEL_REGISTRY_DIR, help="registry directory (default: MODEL_REGISTRY_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show registered versions")
+    register = commands.add_parser("register", help="copy a model file into the registry")
+    register.add_argument("file")
+    register.add_argument("version")
+    register.add_argument("--notes", default="")
+    activate = commands.add_parser("activate", help="serve a version (running servers hot-swap to it)")
+    activate.add_argument("version")
+    canary = commands.add_parser("canary", help="shadow-score a version on a sample of live scans")
+    canary.add_argument("version", nargs="?", help="omit to stop the canary")
+    canary.add_argument("--fraction", type=float, default=0.1)
+    commands.add_parser("verify", help="check every artifact against its checksum")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "register":
+            entry = register_version(args.dir, args.file, args.version, args.notes)
+            print(f"Registered {args.version} ({entry['sha256'][:12]})")
+        elif args.command == "activate":
+            set_active(args.dir, args.version)
+            print(f"{args.version} is now active.")
+        elif args.command == "canary":
+            set_canary(args.dir, args.version, args.fraction)
+            print(f"Canary: {args.version} on {args.fraction:.0%} of scans." if args.version else "Canary stopped.")
+        manifest = load_manifest(args.dir)
+        if manifest is None:
+            print(f"No registry at {args.dir}; the app serves {os.path.join('models', 'MRI.keras')} directly.")
+            return 0
+        if args.command == "verify":
+            for version in manifest["versions"]:
+                spec_for(args.dir, manifest, version)
+            print(f"All {len(manifest['versions'])} artifacts match their checksums.")
+        elif args.command == "list":
+            for version, entry in manifest["versions"].items():
+                role = "active" if version == manifest["active"] else "canary" if version == manifest["canary"] else ""
+                print(f"{version:<16} {entry['backend']:<7} {entry['sha256'][:12]}  {entry['registered_at']}  {role:<6} {entry['notes']}")
+    except (RegistryError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
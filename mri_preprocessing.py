@@ -0,0 +1,101 @@
+import io
+import numpy as np
+from PIL import Image
+import metrics
+
+# Streamlit/TensorFlow ke bina import hota hai, taaki preprocessing worker processes halke rahe
+MRI_IMAGE_SIZE = (128, 128)
+
+def _reduced_decode_flag(data, target_size):
+    """
+    For JPEGs much larger than the model input, picks the IMREAD_REDUCED_GRAYSCALE_{2,4,8}
+    flag that lets libjpeg decode at 1/2, 1/4 or 1/8 scale while staying >= 2x the target.
+    """
+    import cv2
+    if not data.startswith(b"\xff\xd8"): # sirf JPEG ke liye DCT-scaled decode hota hai
+        return None
+    try:
+        width, height = Image.open(io.BytesIO(data)).size # only parses the header
+    except Exception:
+        return None
+    for factor, flag in ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8), (4, cv2.IMREAD_REDUCED_GRAYSCALE_4), (2, cv2.IMREAD_REDUCED_GRAYSCALE_2)):
+        if min(width, height) // factor >= 2 * max(target_size):
+            return flag
+    return None
+
+def decode_gray_bytes(data, reduced=True, target_size=MRI_IMAGE_SIZE):
+    """
+    Decodes encoded PNG/JPEG bytes straight to a grayscale uint8 array with cv2.imdecode,
+    skipping the PIL -> RGB -> NumPy copies. EXIF orientation is ignored, like PIL.Image.open.
+    """
+    import cv2
+    data = bytes(data)
+    flag = _reduced_decode_flag(data, target_size) if reduced else None
+    if flag is None:
+        flag = cv2.IMREAD_GRAYSCALE
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag | cv2.IMREAD_IGNORE_ORIENTATION)
+    if image is None:
+        raise ValueError("Could not decode the uploaded image.")
+    return image
+
+def load_gray(source, reduced=True, target_size=MRI_IMAGE_SIZE):
+    """Reads a PIL image, encoded image bytes or an image file path as a single-channel uint8 array."""
+    import cv2
+    with metrics.timer("decode"):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return decode_gray_bytes(source, reduced=reduced, target_size=target_size)
+        if isinstance(source, Image.Image):
+            return cv2.cvtColor(np.asarray(source.convert('RGB')), cv2.COLOR_RGB2GRAY)
+        try:
+            with open(source, "rb") as f:
+                return decode_gray_bytes(f.read(), reduced=reduced, target_size=target_size)
+        except (OSError, ValueError):
+            raise ValueError(f"Could not read image file: {source}")
+
+def preprocess_into(source, out, reduced=True):
+    """
+    Writes the normalized 128x128 grayscale scan for `source` into `out`,
+    a float32 (128, 128) view. The uint8 pixels are divided straight into `out`,
+    so no float64 intermediate is created.
+    """
+    import cv2
+    image = load_gray(source, reduced=reduced)
+    with metrics.timer("preprocess"):
+        image_resized = cv2.resize(image, MRI_IMAGE_SIZE)
+        np.divide(image_resized, np.float32(255.0), out=out)
+    return out
+
+# High-confidence mode ke deterministic views: same scan, same views, same scores
+TTA_VIEWS = ("original", "flip", "shift_left", "shift_right", "shift_up", "shift_down", "zoom")
+TTA_SHIFT_PX = 4
+TTA_ZOOM_MARGIN_PX = 8 # center crop of 112x112, resized back to 128x128
+
+def augment_views(tensor, views=TTA_VIEWS, out=None):
+    """
+    Builds test-time augmentations of one preprocessed (128, 128, 1) scan and returns them
+    as a float32 (len(views), 128, 128, 1) batch: a horizontal flip, small shifts with the
+    edge pixels repeated, and a slight center zoom. Unknown view names raise ValueError.
+    """
+    import cv2
+    image = tensor[:, :, 0]
+    height, width = image.shape
+    out = np.empty((len(views), height, width, 1), dtype=np.float32) if out is None else out
+    s = TTA_SHIFT_PX
+    padded = None
+    offsets = {"shift_left": (0, s), "shift_right": (0, -s), "shift_up": (s, 0), "shift_down": (-s, 0)}
+    for i, view in enumerate(views):
+        if view == "original":
+            out[i, :, :, 0] = image
+        elif view == "flip":
+            out[i, :, :, 0] = image[:, ::-1]
+        elif view in offsets:
+            if padded is None:
+                padded = np.pad(image, s, mode="edge")
+            dy, dx = offsets[view]
+            out[i, :, :, 0] = padded[s + dy:s + dy + height, s + dx:s + dx + width]
+        elif view == "zoom":
+            m = TTA_ZOOM_MARGIN_PX
+            out[i, :, :, 0] = cv2.resize(image[m:height - m, m:width - m], (width, height), interpolation=cv2.INTER_LINEAR)
+        else:
+            raise ValueError(f"Unknown augmentation view: {view}")
+    return out
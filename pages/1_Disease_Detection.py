@@ -1,22 +1,37 @@
+import time
 import streamlit as st
-from PIL import Image
 from datetime import datetime
-from model_loader import predict_mri
-from database import get_db, get_user_details_by_email, add_prediction
+import config
+from model_loader import preprocess_mri, submit_mri, submit_mri_high_confidence, get_heatmap, get_inference_engine, start_model_warmup, render_model_status, InferenceQueueFull, InferenceTimeout
+from database import MODALITY_LABELS, get_db, add_prediction, reset_query_count
+from identity import get_current_identity, render_query_count
+from gradcam import render_overlay
+from scan_store import get_scan_store
+from reports import Patient, ReportData, encode_jpeg, get_report_service
 
 st.set_page_config(layout="wide")
+reset_query_count()
 
 # Verify user session
 if not st.session_state.get('logged_in', False):
     st.error("You must be logged in to use this feature.")
     st.stop()
 
+start_model_warmup()
+
 # Maintain session state for prediction
 if 'last_prediction' not in st.session_state:
     st.session_state['last_prediction'] = None
+if 'pending_analysis' not in st.session_state:
+    st.session_state['pending_analysis'] = None
+if 'analysis_saved' not in st.session_state:
+    st.session_state['analysis_saved'] = False
+if 'analysis_error' not in st.session_state:
+    st.session_state['analysis_error'] = None
 
 st.title("MRI Scan Analysis for Parkinson's Disease")
 st.write("Upload an MRI scan to analyze it for potential signs of Parkinson's disease.")
+render_model_status()
 
 # Layout for Upload and Results
 col1, col2 = st.columns(2)
@@ -26,66 +41,217 @@ with col1:
     uploaded_file = st.file_uploader("Choose an image...", type=["png", "jpg", "jpeg"])
     
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
+        # raw bytes hi rakho: model cv2.imdecode se seedha 128x128 grayscale decode karta hai
+        image = uploaded_file.getvalue()
         st.image(image, caption="Uploaded MRI Scan", width='stretch')
 
+    mode = st.radio(
+        "Analysis mode",
+        ["Standard", "High-confidence"],
+        horizontal=True,
+        help="High-confidence scores several augmented copies of the scan (and any extra model "
+             "checkpoints) in one batch and reports how much they agree. Useful for borderline results.",
+    )
+
+def save_analysis(outcome, pending):
+    """
+    Interprets a finished analysis, keeps it in the session and saves it to the database.
+    `outcome` is a probability (standard mode) or the high-confidence result dict.
+    """
+    if isinstance(outcome, dict):
+        probability, uncertainty, members = outcome["probability"], outcome["uncertainty"], outcome["members"]
+    else:
+        probability, uncertainty, members = outcome, None, None
+
+    # Interpret model output
+    if uncertainty is not None and abs(probability - 0.5) <= uncertainty:
+        # members 0.5 ke dono taraf hai: koi bhi side confidently nahi keh sakte
+        result_text = (
+            "The MRI scan analysis is inconclusive: the model's scores disagree around the decision threshold."
+        )
+    elif probability > 0.5:
+        result_text = (
+            "The MRI scan analysis indicates a potential presence of Parkinson's disease."
+        )
+    else:
+        result_text = (
+            "The MRI scan analysis indicates a low probability of Parkinson's disease."
+        )
+
+    # Save result in session
+    st.session_state['last_prediction'] = {
+        "probability": probability,
+        "uncertainty": uncertainty,
+        "members": members,
+        "result_text": result_text,
+        "date": pending["date"],
+        "scan_key": pending["scan_key"], # sirf key; scan disk pe scan store me hai
+        "model_version": pending["model_version"],
+    }
+    # Save to database
+    try:
+        db_session = next(get_db())
+        user = get_current_identity()
+        if user:
+            saved = add_prediction(
+                db_session=db_session,
+                user_id=user.id,
+                date=st.session_state["last_prediction"]["date"],
+                probability=probability,
+                result_text=result_text,
+                uncertainty=uncertainty,
+                model_version=pending["model_version"],
+                scan_key=pending["scan_key"],
+            )
+            st.session_state['last_prediction']["prediction_id"] = saved.id
+            st.session_state['analysis_saved'] = True
+    finally:
+        db_session.close()
+
+def fail_analysis(message):
+    """Ends the pending analysis with an error that stays visible after polling stops."""
+    st.session_state['pending_analysis'] = None
+    # fragment ka st.error agle tick pe mit jata; isliye session me rakh ke poora page rerun
+    st.session_state['analysis_error'] = message
+    st.rerun()
+
+# Inference background engine pe chalta hai; ye fragment sirf result ke liye poll karta hai
+@st.fragment(run_every="500ms" if st.session_state['pending_analysis'] else None)
+def poll_pending_analysis():
+    pending = st.session_state['pending_analysis']
+    if pending is None:
+        return
+    future = pending["future"]
+    if not future.done():
+        waited = time.monotonic() - pending["submitted_at"]
+        if waited > config.MRI_REQUEST_TIMEOUT_S:
+            future.cancel()
+            fail_analysis("The analysis took too long. Please try again.")
+        engine = get_inference_engine()
+        queued = engine.stats()["queue_depth"] if engine is not None else 0
+        st.info(f"⏳ Analyzing the MRI scan... ({waited:.0f}s, {queued} scans in queue)")
+        return
+
+    st.session_state['pending_analysis'] = None
+    try:
+        outcome = future.result()
+    except InferenceTimeout:
+        fail_analysis("The server is busy and the analysis timed out. Please try again.")
+    except Exception as e:
+        fail_analysis(f"Model analysis failed. Please try again. ({e})")
+    save_analysis(outcome, pending)
+    st.rerun() # poora page dobara render karo taaki summary dikhe
+
 with col2:
     st.subheader("Prediction Results")
     if uploaded_file is not None:
-        if st.button("Run Analysis"):
+        if st.button("Run Analysis", disabled=st.session_state['pending_analysis'] is not None):
             st.session_state['last_prediction'] = None
-            with st.spinner("Analyzing the MRI scan... Please wait."):
-                probability, _ = predict_mri(image) 
-            if probability is not None:
-                st.success("Analysis complete!")
-                # Interpret model output
-                if probability > 0.5:
-                    result_text = (
-                        "The MRI scan analysis indicates a potential presence of Parkinson's disease."
-                    )
+            st.session_state['analysis_saved'] = False
+            st.session_state['analysis_error'] = None
+            try:
+                # ek hi decode: wahi tensor score hota hai aur scan store me bhi jata hai
+                tensor = preprocess_mri(image)
+            except ValueError as e:
+                tensor = None
+                st.error(f"Could not read the uploaded image. ({e})")
+            future = None
+            if tensor is not None:
+                scan_key, _ = get_scan_store().put(image, tensor=tensor)
+                try:
+                    future = submit_mri_high_confidence(tensor) if mode == "High-confidence" else submit_mri(tensor)
+                except InferenceQueueFull:
+                    future = None
+                    st.warning("The analysis server is busy right now. Please try again in a few seconds.")
                 else:
-                    result_text = (
-                        "The MRI scan analysis indicates a low probability of Parkinson's disease."
-                    )
-
-                # Save result in session
-                st.session_state['last_prediction'] = {
-                    "probability": probability,
-                    "result_text": result_text,
-                    "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "image": image,
+                    if future is None:
+                        st.error("Model analysis failed. Please try again.")
+            if future is not None:
+                st.session_state['pending_analysis'] = {
+                    "future": future,
+                    "submitted_at": time.monotonic(),
+                    "date": datetime.now().replace(microsecond=0),
+                    "scan_key": scan_key,
+                    "model_version": future.model_version, # jis handle ne score kiya, swap ke baad bhi wahi
                 }
-                # Save to database
-                try:
-                    db_session = next(get_db())
-                    user = get_user_details_by_email(db_session, st.session_state["user_email"])
-                    if user:
-                        add_prediction(
-                            db_session=db_session,
-                            user_id=user.id,
-                            date=st.session_state["last_prediction"]["date"],
-                            probability=probability,
-                            result_text=result_text,
-                        )
-                        st.success("Results saved to your Patient History.")
-                finally:
-                    db_session.close()
-            else:
-                st.error("Model analysis failed. Please try again.")
+                st.rerun() # fragment ko polling mode me start karo
+
+    if st.session_state['analysis_error']:
+        st.error(st.session_state['analysis_error'])
+    poll_pending_analysis()
 
     # Display analysis summary if available
     if st.session_state["last_prediction"]:
         last_pred = st.session_state["last_prediction"]
+        st.success("Analysis complete!")
+        if st.session_state['analysis_saved']:
+            st.success("Results saved to your Patient History.")
 
-        st.metric("Model Prediction (Confidence)", f"{last_pred['probability'] * 100:.2f}%")
-        if last_pred["probability"] > 0.5:
+        uncertainty = last_pred["uncertainty"]
+        if uncertainty is None:
+            st.metric("Model Prediction (Confidence)", f"{last_pred['probability'] * 100:.2f}%")
+        else:
+            st.metric("Model Prediction (Confidence)", f"{last_pred['probability'] * 100:.2f}% ± {uncertainty * 100:.2f}")
+        if uncertainty is not None and abs(last_pred["probability"] - 0.5) <= uncertainty:
+            st.info(last_pred["result_text"])
+        elif last_pred["probability"] > 0.5:
             st.warning(last_pred["result_text"])
         else:
             st.success(last_pred["result_text"])
+        if uncertainty is None and 0.4 <= last_pred["probability"] <= 0.6:
+            st.caption("This result is close to the decision threshold. Try High-confidence mode for a more robust estimate.")
+        if last_pred["members"]:
+            with st.expander(f"Individual scores ({len(last_pred['members'])} views/checkpoints)"):
+                st.dataframe(
+                    [{"member": name, "probability (%)": round(score * 100, 2)} for name, score in last_pred["members"].items()],
+                    hide_index=True, width='stretch',
+                )
 
         st.write("---")
         st.subheader("Detailed Analysis Summary")
-        st.write(f"**Date:** {last_pred['date']}")
+        st.write(f"**Date:** {last_pred['date']:%Y-%m-%d %H:%M:%S}")
         st.write(f"**Confidence Level:** {last_pred['probability'] * 100:.2f}%")
+        if uncertainty is not None:
+            st.write(f"**Uncertainty:** ±{uncertainty * 100:.2f} points (standard deviation across views/checkpoints)")
         st.write(f"**Result:** {last_pred['result_text']}")
-        st.image(last_pred["image"], caption="Analyzed MRI Scan", width='stretch')
+        store = get_scan_store()
+        scan = store.load_original(last_pred["scan_key"])
+        st.image(scan, caption="Analyzed MRI Scan", width='stretch')
+
+        # heatmap sirf maangne pe banta hai, aur prediction ke hisaab se cache hota hai
+        overlay = None
+        if st.toggle("Show Grad-CAM heatmap", help="Highlights the regions of the scan that contributed most to the prediction."):
+            with st.spinner("Generating heatmap..."):
+                heatmap = get_heatmap(last_pred.get("prediction_id", last_pred["scan_key"]), store.model_input(last_pred["scan_key"]))
+            if heatmap is None:
+                st.info("Heatmaps need the Keras model; the active model cannot provide gradients.")
+            else:
+                overlay = render_overlay(scan, heatmap)
+                st.image(overlay, caption="Grad-CAM overlay (red = strongest contribution)", width='stretch')
+
+        user = get_current_identity()
+        if user and "prediction_id" in last_pred:
+            def report_pdf(last_pred=last_pred, patient=Patient.of(user), overlay=overlay):
+                # click pe alag thread me chalta hai: yaha st.* nahi, sirf captured values
+                data = ReportData(
+                    prediction_id=last_pred["prediction_id"],
+                    patient_name=patient.name,
+                    patient_age=patient.age,
+                    patient_gender=patient.gender,
+                    date=last_pred["date"],
+                    modality=MODALITY_LABELS["mri"],
+                    probability=last_pred["probability"],
+                    result_text=last_pred["result_text"],
+                    uncertainty=last_pred["uncertainty"],
+                    model_version=last_pred["model_version"],
+                    thumbnail=encode_jpeg(thumbnail) if (thumbnail := store.load_thumbnail(last_pred["scan_key"])) else None,
+                    heatmap=encode_jpeg(overlay) if overlay is not None else None,
+                )
+                return get_report_service().report(data).result(timeout=config.REPORT_TIMEOUT_S)
+
+            st.download_button(
+                "Download PDF report", data=report_pdf, file_name=f"mri_report_{last_pred['prediction_id']}.pdf",
+                mime="application/pdf", on_click="ignore", icon=":material/picture_as_pdf:",
+            )
+
+render_query_count()
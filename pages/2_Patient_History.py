@@ -1,32 +1,125 @@
 import streamlit as st
-from database import get_db, get_user_by_email, get_predictions_by_user_id
+from datetime import datetime, time, timedelta
+import config
+from database import MODALITY_LABELS, get_db, get_history_stamp, get_prediction_page, reset_query_count
+from identity import get_current_identity, render_query_count
+from scan_store import get_scan_store
+from reports import Patient, get_report_service, prediction_report_data
+
+PAGE_SIZE = 20
 
 st.set_page_config(layout="wide")
+reset_query_count()
 
 if not st.session_state.get('logged_in', False):
     st.error("You must be logged in to view your history.")
     st.stop()
 
+# Pagination state: ek stack of cursors, har page ke liye ek. Sirf current page hi load hota hai.
+if 'history_cursors' not in st.session_state:
+    st.session_state['history_cursors'] = [None]
+if 'history_filter' not in st.session_state:
+    st.session_state['history_filter'] = None
+
 st.title("Patient History")
 st.write("Review your past checkups and prediction results saved to your account.")
 
+filter_col, _ = st.columns([1, 2])
+with filter_col:
+    use_filter = st.checkbox("Filter by date range")
+    date_range = None
+    if use_filter:
+        today = datetime.now().date()
+        date_range = st.date_input("Checkups between", value=(today - timedelta(days=30), today))
+
+start_date = end_date = None
+if date_range and len(date_range) == 2:
+    start_date = datetime.combine(date_range[0], time.min)
+    end_date = datetime.combine(date_range[1] + timedelta(days=1), time.min) # end day bhi include karo
+
+# Filter badla to pehle page pe wapas jao
+if st.session_state['history_filter'] != (start_date, end_date):
+    st.session_state['history_filter'] = (start_date, end_date)
+    st.session_state['history_cursors'] = [None]
+
+cursors = st.session_state['history_cursors']
+
+# PDF callables click pe alag thread me chalte hai: st.* nahi, apna DB session khud kholte hai
+def record_report_pdf(record, patient):
+    return lambda: get_report_service().report(prediction_report_data(record, patient)).result(timeout=config.REPORT_TIMEOUT_S)
+
+def history_report_pdf(user_id, patient):
+    def build():
+        db_session = next(get_db())
+        try:
+            stamp = get_history_stamp(db_session, user_id)
+        finally:
+            db_session.close()
+        path = get_report_service().history(user_id, patient, stamp).result(timeout=config.REPORT_TIMEOUT_S)
+        with open(path, "rb") as f:
+            return f.read()
+    return build
+
 db_session = next(get_db())
 try:
-    # Get the user's ID
-    user = get_user_by_email(db_session, st.session_state['user_email'])
+    # Get the user's ID (session me cached identity se, DB lookup nahi)
+    user = get_current_identity()
     if user:
-        # Fetch all predictions for that user
-        history_records = get_predictions_by_user_id(db_session, user.id)
+        # Fetch only the current page of predictions
+        history_records, next_cursor = get_prediction_page(
+            db_session, user.id, limit=PAGE_SIZE, before=cursors[-1],
+            start_date=start_date, end_date=end_date,
+        )
 
         if history_records:
+            patient = Patient.of(user)
+            st.download_button(
+                "Export entire history (PDF)", data=history_report_pdf(user.id, patient),
+                file_name="patient_history.pdf", mime="application/pdf", on_click="ignore",
+                icon=":material/picture_as_pdf:", help="One page per checkup, including checkups outside the current page and filter.",
+            )
+            # count sirf tab chahiye jab history ek page se lambi ho; chhoti history pe extra query nahi
+            cap = config.REPORT_HISTORY_MAX_PAGES
+            if cap and next_cursor is not None:
+                total, _ = get_history_stamp(db_session, user.id)
+                if total > cap:
+                    st.caption(f"You have {total} checkups; the PDF export includes the newest {cap}.")
             st.write("---")
-            # loop karke sab history 
+            # loop karke current page ki history
             for record in history_records:
-                with st.expander(f"Checkup on {record.date} - {record.result_text}"):
+                label = MODALITY_LABELS.get(record.modality, record.modality)
+                with st.expander(f"{label} checkup on {record.date:%Y-%m-%d %H:%M:%S} - {record.result_text}"):
+                    # sirf current page ke thumbnails padhe jate hai, poora scan kabhi nahi
+                    thumbnail = get_scan_store().load_thumbnail(record.scan_key) if record.scan_key else None
+                    if thumbnail is not None:
+                        st.image(thumbnail, caption=f"Analyzed {label.lower()}", width=160)
                     st.write("**Analysis Details**")
                     st.metric("Confidence Score", f"{record.probability*100:.2f}%")
+                    if record.uncertainty is not None:
+                        st.caption(f"High-confidence mode: ±{record.uncertainty*100:.2f} points across augmented views/checkpoints")
+                    if record.model_version:
+                        st.caption(f"Model version: {record.model_version}")
                     st.write("**Model Interpretation:**")
                     st.write(record.result_text)
+                    st.download_button(
+                        "Download PDF report", data=record_report_pdf(record, patient),
+                        file_name=f"{record.modality}_report_{record.id}.pdf", mime="application/pdf",
+                        on_click="ignore", key=f"report_{record.id}",
+                    )
+
+            prev_col, page_col, next_col = st.columns([1, 2, 1])
+            with prev_col:
+                if st.button("← Newer", disabled=len(cursors) == 1, width='stretch'):
+                    cursors.pop()
+                    st.rerun()
+            with page_col:
+                st.caption(f"Page {len(cursors)}")
+            with next_col:
+                if st.button("Older →", disabled=next_cursor is None, width='stretch'):
+                    cursors.append(next_cursor)
+                    st.rerun()
+        elif start_date is not None:
+            st.info("No checkups found in the selected date range.")
         else:
             st.info("No history found for your account. Perform a new analysis on the 'Disease Detection' page.")
             st.link_button("Go to Disease Detection", "/Disease_Detection")
@@ -34,3 +127,5 @@ try:
         st.error("Could not retrieve user data.")
 finally:
     db_session.close()
+
+render_query_count()
@@ -0,0 +1,100 @@
+import streamlit as st
+from datetime import datetime
+from model_loader import predict_drawing, drawing_model_version
+from database import get_db, add_prediction, reset_query_count
+from identity import get_current_identity, render_query_count
+from scan_store import get_scan_store
+
+st.set_page_config(layout="wide")
+reset_query_count()
+
+# Verify user session
+if not st.session_state.get('logged_in', False):
+    st.error("You must be logged in to use this feature.")
+    st.stop()
+
+# Maintain session state for prediction
+if 'last_drawing_prediction' not in st.session_state:
+    st.session_state['last_drawing_prediction'] = None
+if 'drawing_saved' not in st.session_state:
+    st.session_state['drawing_saved'] = False
+
+st.title("Wave Drawing Analysis for Parkinson's Disease")
+st.write("Upload a photo or scan of a hand-drawn wave (from the spiral/wave drawing test) to analyze it for signs of tremor.")
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("Upload Drawing")
+    uploaded_file = st.file_uploader("Choose an image...", type=["png", "jpg", "jpeg"])
+
+    if uploaded_file is not None:
+        image = uploaded_file.getvalue()
+        st.image(image, caption="Uploaded Drawing", width='stretch')
+
+with col2:
+    st.subheader("Prediction Results")
+    if uploaded_file is not None:
+        if st.button("Run Analysis"):
+            st.session_state['last_drawing_prediction'] = None
+            st.session_state['drawing_saved'] = False
+            # HOG features + forest ka scoring kuch milliseconds ka kaam hai, queue ki zarurat nahi
+            with st.spinner("Analyzing the drawing..."):
+                try:
+                    probability = predict_drawing(image)
+                except ValueError as e:
+                    probability = None
+                    st.error(f"Could not read the drawing. ({e})")
+                else:
+                    if probability is None: # WAVE.pkl load nahi hua
+                        st.error("Model analysis failed. Please try again.")
+            if probability is not None:
+                if probability > 0.5:
+                    result_text = "The drawing analysis indicates a potential presence of Parkinson's disease."
+                else:
+                    result_text = "The drawing analysis indicates a low probability of Parkinson's disease."
+                st.session_state['last_drawing_prediction'] = {
+                    "probability": probability,
+                    "result_text": result_text,
+                    "date": datetime.now().replace(microsecond=0),
+                    "scan_key": get_scan_store().put(image, with_tensor=False)[0],
+                }
+                db_session = next(get_db())
+                try:
+                    user = get_current_identity()
+                    if user:
+                        add_prediction(
+                            db_session=db_session,
+                            user_id=user.id,
+                            date=st.session_state['last_drawing_prediction']["date"],
+                            probability=probability,
+                            result_text=result_text,
+                            modality="drawing",
+                            model_version=drawing_model_version(),
+                            scan_key=st.session_state['last_drawing_prediction']["scan_key"],
+                        )
+                        st.session_state['drawing_saved'] = True
+                finally:
+                    db_session.close()
+
+    # Display analysis summary if available
+    if st.session_state['last_drawing_prediction']:
+        last_pred = st.session_state['last_drawing_prediction']
+        st.success("Analysis complete!")
+        if st.session_state['drawing_saved']:
+            st.success("Results saved to your Patient History.")
+
+        st.metric("Model Prediction (Confidence)", f"{last_pred['probability'] * 100:.2f}%")
+        if last_pred["probability"] > 0.5:
+            st.warning(last_pred["result_text"])
+        else:
+            st.success(last_pred["result_text"])
+
+        st.write("---")
+        st.subheader("Detailed Analysis Summary")
+        st.write(f"**Date:** {last_pred['date']:%Y-%m-%d %H:%M:%S}")
+        st.write(f"**Confidence Level:** {last_pred['probability'] * 100:.2f}%")
+        st.write(f"**Result:** {last_pred['result_text']}")
+        st.image(get_scan_store().load_original(last_pred["scan_key"]), caption="Analyzed Drawing", width='stretch')
+
+render_query_count()
@@ -0,0 +1,63 @@
+import json
+import streamlit as st
+import config
+import metrics
+from database import reset_query_count
+from identity import get_current_identity, is_admin, render_query_count
+
+st.set_page_config(layout="wide")
+reset_query_count()
+
+if not st.session_state.get('logged_in', False):
+    st.error("You must be logged in to view this page.")
+    st.stop()
+if not is_admin(get_current_identity()):
+    st.error("This page is only available to administrators (ADMIN_EMAILS).")
+    st.stop()
+
+metrics.start_exporters()
+
+st.title("Performance Metrics")
+st.write(f"Latency of each stage of the analysis path over the last {config.METRICS_WINDOW_S:.0f} seconds, for this server process.")
+if not metrics.is_enabled():
+    st.warning("Metrics are disabled (METRICS_ENABLED=false); nothing is being recorded.")
+
+auto_refresh = st.toggle("Refresh every 5 seconds")
+
+@st.fragment(run_every="5s" if auto_refresh else None)
+def render_metrics():
+    snapshot = metrics.snapshot()
+    st.subheader("Stage latency")
+    rows = [
+        {
+            "stage": stage,
+            "p50 (ms)": summary["p50_ms"],
+            "p95 (ms)": summary["p95_ms"],
+            "p99 (ms)": summary["p99_ms"],
+            "calls in window": summary["window_count"],
+            "calls total": summary["count"],
+        }
+        for stage, summary in snapshot["stages"].items()
+    ]
+    if rows:
+        st.dataframe(rows, hide_index=True, width='stretch')
+    else:
+        st.info("No timings recorded yet. Run an analysis or open the history to generate some.")
+
+    # engine queue, prediction cache aur LLM client ke counters
+    for name, values in snapshot["gauges"].items():
+        st.subheader(name.replace("_", " ").title())
+        columns = st.columns(min(len(values), 6) or 1)
+        for i, (key, value) in enumerate(values.items()):
+            columns[i % len(columns)].metric(key, f"{value:,.2f}" if isinstance(value, float) else value)
+
+    export_col, json_col = st.columns(2)
+    with export_col:
+        st.download_button("Download Prometheus text", metrics.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+    with json_col:
+        st.download_button("Download JSON", json.dumps(snapshot, indent=2), file_name="metrics.json", mime="application/json")
+    if config.METRICS_HTTP_PORT:
+        st.caption(f"Scrape endpoint: http://127.0.0.1:{config.METRICS_HTTP_PORT}/metrics (and /metrics.json)")
+
+render_metrics()
+render_query_count()
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+_fingerprints = {} # (path, size, mtime_ns) -> sha256, taaki har lookup pe file hash na karna pade
+_fingerprints_lock = threading.Lock()
+
+def model_fingerprint(path):
+    """
+    Returns the sha256 of a model file. The hash is only recomputed when the file's
+    size or modification time changes, so calling this per request costs one stat().
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        if stamp in _fingerprints:
+            return _fingerprints[stamp]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _fingerprints_lock:
+        _fingerprints[stamp] = digest.hexdigest()
+    return _fingerprints[stamp]
+
+class LRUCache:
+    """Thread-safe least-recently-used mapping with a maximum number of entries."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max(0, int(max_entries))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class PredictionCache:
+    """
+    Content-addressed cache of MRI probabilities.
+    Keys are the sha256 of the model file's fingerprint plus the preprocessed 128x128 tensor,
+    so a changed model file never matches an old entry. Lookups check the in-memory LRU first
+    and then, if enabled, the SQLite table. Persistent writes happen on a background thread.
+    """
+
+    def __init__(self, model_path, loaded_fingerprint, max_entries=2048, persist=True):
+        self.model_path = model_path
+        self.loaded_fingerprint = loaded_fingerprint # fingerprint of the model actually in memory
+        self.persist = persist
+        self.memory = LRUCache(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._current_fingerprint = loaded_fingerprint
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prediction-cache") if persist else None
+        if persist and loaded_fingerprint:
+            self._writer.submit(self._purge, loaded_fingerprint) # drop entries from older models
+
+    def key_for(self, tensor):
+        """
+        Returns the cache key for a preprocessed tensor, or None if caching must be skipped
+        because the model file on disk no longer matches the model that is loaded.
+        """
+        fingerprint = model_fingerprint(self.model_path)
+        if fingerprint != self._current_fingerprint:
+            # model file badal gayi, purane results ab valid nahi
+            self._current_fingerprint = fingerprint
+            self.memory.clear()
+        if fingerprint is None or fingerprint != self.loaded_fingerprint:
+            return None
+        digest = hashlib.sha256(fingerprint.encode("ascii"))
+        digest.update(str(tensor.shape).encode("ascii"))
+        digest.update(tensor.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the cached probability for `key`, or None."""
+        probability = self.memory.get(key)
+        if probability is None and self.persist:
+            probability = self._load(key)
+            if probability is not None:
+                self.memory.put(key, probability)
+        if probability is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return probability
+
+    def put(self, key, probability):
+        """Caches a fresh probability in memory and queues the persistent write."""
+        self.memory.put(key, probability)
+        if self.persist:
+            self._writer.submit(self._save, key, probability)
+
+    def _load(self, key):
+        from database import get_db, get_cached_probability
+        db_session = next(get_db())
+        try:
+            return get_cached_probability(db_session, key)
+        except Exception as e:
+            print(f"Prediction cache read failed: {e}")
+            return None
+        finally:
+            db_session.close()
+
+    def _save(self, key, probability):
+        from database import get_db, save_cached_probability
+        db_session = next(get_db())
+        try:
+            save_cached_probability(db_session, key, self.loaded_fingerprint, probability)
+        except Exception as e:
+            print(f"Prediction cache write failed: {e}")
+        finally:
+            db_session.close()
+
+    def _purge(self, fingerprint):
+        from database import get_db, purge_prediction_cache
+        db_session = next(get_db())
+        try:
+            purge_prediction_cache(db_session, fingerprint)
+        except Exception as e:
+            print(f"Prediction cache purge failed: {e}")
+        finally:
+            db_session.close()
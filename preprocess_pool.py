@@ -0,0 +1,119 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import shared_memory
+import numpy as np
+from mri_preprocessing import MRI_IMAGE_SIZE, preprocess_into
+
+def _attach(name):
+    """Opens an existing shared memory block without letting this process own (unlink) it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+class SharedScanRing:
+    """
+    A ring of `num_chunks` x `batch_size` float32 (128, 128) slots in shared memory.
+    Worker processes write preprocessed scans straight into their slot, and the
+    inference stage reads a whole chunk back as a (n, 128, 128, 1) view - no pickling, no copy.
+    """
+
+    def __init__(self, num_chunks, batch_size):
+        self.shape = (num_chunks, batch_size, *MRI_IMAGE_SIZE)
+        nbytes = int(np.prod(self.shape)) * np.dtype(np.float32).itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.name = self._shm.name
+        self.array = np.ndarray(self.shape, dtype=np.float32, buffer=self._shm.buf)
+
+    def chunk(self, index, count):
+        """Model-ready view of the first `count` slots of chunk `index`."""
+        return self.array[index, :count, :, :, np.newaxis]
+
+    def close(self):
+        self.array = None # buffer ka reference chhodo, warna close() fail hota hai
+        self._shm.close()
+        self._shm.unlink()
+
+# --- WORKER PROCESS SIDE ---
+_worker_shm = None
+_worker_array = None
+_worker_reduced = True
+
+def _init_worker(name, shape, reduced):
+    global _worker_shm, _worker_array, _worker_reduced
+    _worker_shm = _attach(name)
+    _worker_array = np.ndarray(shape, dtype=np.float32, buffer=_worker_shm.buf)
+    _worker_reduced = reduced
+
+def _preprocess_slot(chunk_index, slot_index, path):
+    """
+    Decodes and resizes one scan into its shared-memory slot. Returns None, or the error
+    message if the file could not be read or decoded (the slot is zeroed then), so one bad
+    file fails only its own slot instead of the whole chunk.
+    """
+    try:
+        preprocess_into(path, _worker_array[chunk_index, slot_index], reduced=_worker_reduced)
+    except ValueError as e:
+        _worker_array[chunk_index, slot_index] = 0.0
+        return str(e)
+    return None
+
+class PreprocessPipeline:
+    """
+    Decodes and resizes image files in a process pool, ahead of the inference stage.
+    Up to `depth` chunks are in flight at once; each one owns a chunk of the shared ring
+    until the consumer asks for the next batch, at which point the chunk is refilled.
+    """
+
+    def __init__(self, workers, batch_size, depth=3, reduced=True):
+        self.batch_size = batch_size
+        self.depth = max(2, depth)
+        self.ring = SharedScanRing(self.depth, batch_size)
+        # spawn, kyunki parent me TensorFlow threads chal rahe ho sakte hai (fork safe nahi)
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.ring.name, self.ring.shape, reduced),
+        )
+
+    def _submit(self, chunk_index, paths):
+        return [self._pool.submit(_preprocess_slot, chunk_index, i, path) for i, path in enumerate(paths)]
+
+    def iter_batches(self, paths):
+        """
+        Yields (chunk_paths, batch_view, errors) for an iterable of file paths, in input order.
+        `errors` maps the slot index of each unreadable file to its error message.
+        batch_view is only valid until the next batch is requested.
+        """
+        iterator = iter(paths)
+        in_flight = deque()
+        free_chunks = deque(range(self.depth))
+
+        def fill():
+            while free_chunks:
+                chunk = list(islice(iterator, self.batch_size))
+                if not chunk:
+                    return
+                index = free_chunks.popleft()
+                in_flight.append((index, chunk, self._submit(index, chunk)))
+
+        fill()
+        while in_flight:
+            index, chunk, futures = in_flight.popleft()
+            errors = {slot: message for slot, future in enumerate(futures) if (message := future.result()) is not None}
+            yield chunk, self.ring.chunk(index, len(chunk)), errors
+            free_chunks.append(index)
+            fill()
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
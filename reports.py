@@ -0,0 +1,350 @@
+import functools
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+import config
+from prediction_cache import LRUCache
+
+# Streamlit ke bina import hota hai, taaki report worker processes halke rahe
+
+DISCLAIMER = (
+    "This report was generated by an AI-based screening tool and is intended for informational "
+    "purposes only. It is not a medical diagnosis. Please consult a qualified healthcare "
+    "professional for an accurate diagnosis and treatment."
+)
+
+# A4 page layout in mm, defined once and loaded into one FlexTemplate per document.
+# Static text lives in the elements themselves; each page only fills in the named fields.
+# Multi-line text uses one single-line element per row, filled from pre-wrapped lines.
+_RESULT_ROWS = 3
+_DISCLAIMER_ROWS = 4
+_LABEL = {"type": "T", "font": "helvetica", "size": 10, "bold": True, "foreground": 0x555555}
+_VALUE = {"type": "T", "font": "helvetica", "size": 10}
+REPORT_ELEMENTS = [
+    {"name": "title", "type": "T", "x1": 15, "y1": 14, "x2": 195, "y2": 24, "font": "helvetica", "size": 18, "bold": True,
+     "text": "Parkinson's Disease Analysis Report"},
+    {"name": "subtitle", "type": "T", "x1": 15, "y1": 24, "x2": 195, "y2": 30, "font": "helvetica", "size": 9,
+     "foreground": 0x777777, "text": "AI-assisted screening summary"},
+    {"name": "generated_at", "type": "T", "x1": 110, "y1": 24, "x2": 195, "y2": 30, "font": "helvetica", "size": 9,
+     "foreground": 0x777777, "align": "R"},
+    {"name": "rule_top", "type": "L", "x1": 15, "y1": 33, "x2": 195, "y2": 33, "size": 0.4, "foreground": 0x999999},
+
+    {"name": "patient_heading", "type": "T", "x1": 15, "y1": 38, "x2": 195, "y2": 45, "font": "helvetica", "size": 13,
+     "bold": True, "text": "Patient"},
+    {**_LABEL, "name": "name_label", "x1": 15, "y1": 46, "x2": 60, "y2": 52, "text": "Name"},
+    {**_VALUE, "name": "patient_name", "x1": 60, "y1": 46, "x2": 195, "y2": 52},
+    {**_LABEL, "name": "age_label", "x1": 15, "y1": 52, "x2": 60, "y2": 58, "text": "Age / Gender"},
+    {**_VALUE, "name": "patient_details", "x1": 60, "y1": 52, "x2": 195, "y2": 58},
+
+    {"name": "analysis_heading", "type": "T", "x1": 15, "y1": 64, "x2": 195, "y2": 71, "font": "helvetica", "size": 13,
+     "bold": True, "text": "Analysis"},
+    {**_LABEL, "name": "type_label", "x1": 15, "y1": 72, "x2": 60, "y2": 78, "text": "Analysis type"},
+    {**_VALUE, "name": "modality", "x1": 60, "y1": 72, "x2": 195, "y2": 78},
+    {**_LABEL, "name": "date_label", "x1": 15, "y1": 78, "x2": 60, "y2": 84, "text": "Date of analysis"},
+    {**_VALUE, "name": "date", "x1": 60, "y1": 78, "x2": 195, "y2": 84},
+    {**_LABEL, "name": "model_label", "x1": 15, "y1": 84, "x2": 60, "y2": 90, "text": "Model version"},
+    {**_VALUE, "name": "model_version", "x1": 60, "y1": 84, "x2": 195, "y2": 90},
+    {**_LABEL, "name": "probability_label", "x1": 15, "y1": 90, "x2": 60, "y2": 96, "text": "Probability"},
+    {**_VALUE, "name": "probability", "x1": 60, "y1": 90, "x2": 195, "y2": 96, "bold": True},
+    {**_LABEL, "name": "interpretation_label", "x1": 15, "y1": 96, "x2": 60, "y2": 102, "text": "Interpretation"},
+    # multi-line fields are pre-wrapped (see _wrap) into fixed single-line rows
+    *({**_VALUE, "name": f"result_text_{row}", "x1": 60, "y1": 96 + 5 * row, "x2": 195, "y2": 101 + 5 * row} for row in range(_RESULT_ROWS)),
+
+    {"name": "scan", "type": "I", "x1": 15, "y1": 118, "x2": 95, "y2": 198, "keep_aspect_ratio": True},
+    {"name": "scan_caption", "type": "T", "x1": 15, "y1": 199, "x2": 95, "y2": 204, "font": "helvetica", "size": 8,
+     "foreground": 0x777777, "align": "C"},
+    {"name": "heatmap", "type": "I", "x1": 115, "y1": 118, "x2": 195, "y2": 198, "keep_aspect_ratio": True},
+    {"name": "heatmap_caption", "type": "T", "x1": 115, "y1": 199, "x2": 195, "y2": 204, "font": "helvetica", "size": 8,
+     "foreground": 0x777777, "align": "C"},
+
+    {"name": "rule_bottom", "type": "L", "x1": 15, "y1": 262, "x2": 195, "y2": 262, "size": 0.2, "foreground": 0x999999},
+    *({"name": f"disclaimer_{row}", "type": "T", "x1": 15, "y1": 264 + 4 * row, "x2": 195, "y2": 268 + 4 * row, "font": "helvetica",
+       "size": 8, "italic": True, "foreground": 0x555555} for row in range(_DISCLAIMER_ROWS)),
+    {"name": "footer", "type": "T", "x1": 15, "y1": 284, "x2": 195, "y2": 289, "font": "helvetica", "size": 8,
+     "foreground": 0x999999, "align": "R"},
+]
+
+@dataclass(frozen=True)
+class Patient:
+    """The patient fields a report prints; a plain copy of the UserIdentity for worker processes."""
+    name: str
+    age: object
+    gender: str
+
+    @classmethod
+    def of(cls, identity):
+        return cls(identity.name, identity.age, identity.gender)
+
+@dataclass(frozen=True)
+class ReportData:
+    """Everything one report page shows, as plain values so it can be sent to a worker process."""
+    prediction_id: int
+    patient_name: str
+    patient_age: object
+    patient_gender: str
+    date: datetime
+    modality: str # display label, e.g. "MRI scan"
+    probability: float
+    result_text: str
+    uncertainty: float = None
+    model_version: str = None
+    thumbnail: bytes = None # encoded scan thumbnail, ideally JPEG (see encode_jpeg)
+    heatmap: bytes = None # encoded Grad-CAM overlay, ideally JPEG
+
+    @classmethod
+    def from_record(cls, record, patient, modality, thumbnail=None, heatmap=None):
+        """Builds the report data from a Prediction row (or a page/since query row) and a Patient/UserIdentity."""
+        return cls(
+            prediction_id=record.id,
+            patient_name=patient.name,
+            patient_age=patient.age,
+            patient_gender=patient.gender,
+            date=record.date,
+            modality=modality,
+            probability=record.probability,
+            result_text=record.result_text,
+            uncertainty=record.uncertainty,
+            model_version=record.model_version,
+            thumbnail=thumbnail,
+            heatmap=heatmap,
+        )
+
+def encode_jpeg(image, quality=85):
+    """
+    JPEG bytes for a uint8 image array (e.g. gradcam.render_overlay output) or encoded image
+    bytes (e.g. a WebP thumbnail). The PDF embeds JPEG data as is, while any other format is
+    decoded and zlib-compressed again on every render.
+    """
+    from PIL import Image
+    picture = Image.open(io.BytesIO(image)) if isinstance(image, bytes) else Image.fromarray(image)
+    if picture.mode not in ("L", "RGB"):
+        picture = picture.convert("RGB")
+    buffer = io.BytesIO()
+    picture.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+def prediction_report_data(record, patient, overlay=None):
+    """
+    ReportData for a saved prediction, with its scan thumbnail from the scan store and,
+    if given, the Grad-CAM overlay (RGB array) the user already generated.
+    """
+    from database import MODALITY_LABELS
+    from scan_store import get_scan_store
+    thumbnail = get_scan_store().load_thumbnail(record.scan_key) if record.scan_key else None
+    return ReportData.from_record(
+        record, patient, MODALITY_LABELS.get(record.modality, record.modality),
+        encode_jpeg(thumbnail) if thumbnail else None, encode_jpeg(overlay) if overlay is not None else None,
+    )
+
+def _latin1(value):
+    # core PDF fonts sirf latin-1 jaante hai
+    return str(value).encode("latin-1", "replace").decode("latin-1")
+
+def _fields(data, generated_at, footer):
+    probability = f"{data.probability * 100:.2f}%"
+    if data.uncertainty is not None:
+        probability += f" (± {data.uncertainty * 100:.2f} points, high-confidence mode)"
+    fields = {
+        "generated_at": f"Generated {generated_at:%Y-%m-%d %H:%M}",
+        "patient_name": data.patient_name,
+        "patient_details": f"{data.patient_age if data.patient_age is not None else 'N/A'} / {data.patient_gender or 'N/A'}",
+        "modality": data.modality,
+        "date": f"{data.date:%Y-%m-%d %H:%M:%S}",
+        "model_version": data.model_version or "N/A",
+        "probability": probability,
+        "result_text": data.result_text,
+        "footer": footer,
+    }
+    fields = {name: _latin1(value) for name, value in fields.items()}
+    result_rows = _wrap(fields.pop("result_text"), 135, 10)
+    fields.update((f"result_text_{row}", line) for row, line in enumerate(_fit_rows(result_rows, _RESULT_ROWS)))
+    if data.thumbnail:
+        fields["scan"] = io.BytesIO(data.thumbnail)
+        fields["scan_caption"] = f"Analyzed {data.modality}"
+    if data.heatmap:
+        fields["heatmap"] = io.BytesIO(data.heatmap)
+        fields["heatmap_caption"] = "Grad-CAM heatmap (red = strongest contribution)"
+    return fields
+
+_measure = None # sirf text naapne ke liye, kabhi output nahi hota
+_measure_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=256)
+def _wrap(text, width, size, style=""):
+    """
+    Line-breaks `text` for a `width` mm wide helvetica field. fpdf's multi_cell spends most of
+    a page's render time measuring text, and report texts repeat (a handful of interpretations,
+    one disclaimer), so each distinct text is broken once per process.
+    """
+    global _measure
+    from fpdf import FPDF
+    from fpdf.enums import MethodReturnValue
+    with _measure_lock:
+        if _measure is None:
+            _measure = FPDF(unit="mm")
+            _measure.add_page()
+        _measure.set_font("helvetica", style, size)
+        return tuple(_measure.multi_cell(width, 4, text, dry_run=True, output=MethodReturnValue.LINES))
+
+def _fit_rows(lines, rows):
+    # jyada lines ho to aakhri row me jod do, kuch chhoote nahi
+    return lines if len(lines) <= rows else (*lines[:rows - 1], " ".join(lines[rows - 1:]))
+
+@functools.lru_cache(maxsize=1)
+def _compiled_elements():
+    """REPORT_ELEMENTS with the static multi-line text already broken into its rows."""
+    disclaimer = _fit_rows(_wrap(DISCLAIMER, 180, 8, "I"), _DISCLAIMER_ROWS)
+    texts = {f"disclaimer_{row}": line for row, line in enumerate(disclaimer)}
+    return [{**element, "text": texts[element["name"]]} if element["name"] in texts else element for element in REPORT_ELEMENTS]
+
+def _new_document(title):
+    from fpdf import FPDF
+    from fpdf.template import FlexTemplate
+    pdf = FPDF(format="A4", unit="mm")
+    pdf.set_auto_page_break(False) # layout fixed hai, har report ek page
+    pdf.set_title(_latin1(title))
+    pdf.set_creator("Parkinson's Disease Detection App")
+    return pdf, FlexTemplate(pdf, elements=_compiled_elements())
+
+def _add_page(pdf, template, data, generated_at, footer):
+    pdf.add_page()
+    for name, value in _fields(data, generated_at, footer).items():
+        template[name] = value
+    template.render()
+
+def render_report(data):
+    """Renders one prediction as a single-page PDF and returns its bytes."""
+    pdf, template = _new_document(f"Analysis report #{data.prediction_id}")
+    _add_page(pdf, template, data, datetime.now(), f"Report for analysis #{data.prediction_id}")
+    return bytes(pdf.output())
+
+def render_history(records, path):
+    """
+    Writes one PDF with a page per ReportData from the `records` iterable (consumed lazily,
+    so the caller can stream rows from the database) to `path`. Returns the page count.
+    """
+    pdf, template = _new_document("Patient history report")
+    generated_at = datetime.now()
+    count = 0
+    for count, data in enumerate(records, start=1):
+        _add_page(pdf, template, data, generated_at, f"Checkup {count} - analysis #{data.prediction_id}")
+    temporary = f"{path}.tmp"
+    pdf.output(temporary)
+    os.replace(temporary, path)
+    return count
+
+# --- WORKER PROCESS SIDE ---
+
+def export_history(user_id, patient, path, page_size=200, max_pages=None):
+    """
+    Builds a patient's full-history PDF at `path`, newest checkup first like the history page.
+    Runs in a worker: rows are read with keyset pagination, `page_size` at a time, and each scan
+    thumbnail is read from the scan store only when its page is drawn. The document is held in
+    memory until it is written, so only the newest `max_pages` checkups are included when set.
+    """
+    from database import MODALITY_LABELS, get_db, get_prediction_page
+    from scan_store import get_scan_store
+
+    def records():
+        store = get_scan_store()
+        db_session = next(get_db())
+        try:
+            cursor = None
+            remaining = max_pages or None
+            while True:
+                limit = min(page_size, remaining) if remaining else page_size
+                rows, cursor = get_prediction_page(db_session, user_id, limit=limit, before=cursor)
+                for row in rows:
+                    thumbnail = store.load_thumbnail(row.scan_key) if row.scan_key else None
+                    thumbnail = encode_jpeg(thumbnail) if thumbnail else None
+                    yield ReportData.from_record(row, patient, MODALITY_LABELS.get(row.modality, row.modality), thumbnail)
+                if remaining:
+                    remaining -= len(rows)
+                if cursor is None or remaining == 0:
+                    return
+        finally:
+            db_session.close()
+    return render_history(records(), path)
+
+class ReportService:
+    """
+    Renders reports off the Streamlit script thread, in `workers` spawned processes
+    (0 = one background thread). Finished single reports are cached by prediction id and
+    concurrent requests for the same report share one render. Full-history exports are
+    written to `export_dir` and reused until the patient adds or removes a checkup; each holds
+    at most `history_pages` checkups (None = all).
+    """
+
+    def __init__(self, workers=2, cache_entries=128, export_dir="report_exports", history_pages=None):
+        if workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reports")
+        self.export_dir = export_dir
+        self.history_pages = history_pages or None
+        self._reports = LRUCache(cache_entries) # (prediction_id, has heatmap) -> Future of PDF bytes
+        self._exports = {} # path -> Future of the same path, while it is being written
+        self._lock = threading.Lock()
+
+    def report(self, data):
+        """Future resolving to the PDF bytes for `data`."""
+        key = (data.prediction_id, data.heatmap is not None)
+        with self._lock:
+            future = self._reports.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._pool.submit(render_report, data)
+                self._reports.put(key, future)
+        return future
+
+    def history(self, user_id, patient, stamp):
+        """
+        Future resolving to the path of the patient's full-history PDF. `stamp` identifies the
+        history's current state (see database.get_history_stamp); an export with the same
+        stamp is served from disk.
+        """
+        count, last_id = stamp
+        path = os.path.join(self.export_dir, f"history-{user_id}-{count}-{last_id}.pdf")
+        with self._lock:
+            self._exports = {key: future for key, future in self._exports.items() if not future.done()}
+            future = self._exports.get(path)
+            if future is not None: # same export abhi ban raha hai
+                return future
+            if os.path.exists(path):
+                future = Future()
+                future.set_result(path)
+                return future
+            os.makedirs(self.export_dir, exist_ok=True)
+            future = self._exports[path] = self._pool.submit(_export_to, user_id, Patient.of(patient), path, self.history_pages)
+        return future
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+def _export_to(user_id, patient, path, max_pages=None):
+    export_history(user_id, patient, path, max_pages=max_pages)
+    # is patient ke purane exports ab stale hai
+    folder = os.path.dirname(path) or "."
+    for name in os.listdir(folder):
+        if name.startswith(f"history-{user_id}-") and name.endswith(".pdf") and os.path.join(folder, name) != path:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+    return path
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_report_service():
+    """The process-wide report service configured from REPORT_* settings."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ReportService(
+                config.REPORT_WORKERS, config.REPORT_CACHE_ENTRIES, config.REPORT_EXPORT_DIR, config.REPORT_HISTORY_MAX_PAGES,
+            )
+        return _service
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+import config
+from mri_preprocessing import MRI_IMAGE_SIZE, preprocess_into
+
+# Streamlit ke bina import hota hai, taaki score_scans.py jaise CLI bhi store padh sake
+
+class ScanStore:
+    """
+    Content-addressed storage of analyzed scans. Each upload lives under its sha256 key as
+    <root>/<key[:2]>/<key>/ with the original bytes, a WebP thumbnail and (for MRI scans)
+    the preprocessed float32 (128, 128, 1) tensor as a .npy file that can be memory-mapped.
+    Identical uploads share one entry. The original is written before put() returns; the
+    thumbnail and tensor are derived on a background thread.
+    """
+
+    def __init__(self, root, thumbnail_size=256):
+        self.root = root
+        self.thumbnail_size = thumbnail_size
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-store")
+
+    def folder(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def original_path(self, key):
+        return os.path.join(self.folder(key), "original")
+
+    def thumbnail_path(self, key):
+        return os.path.join(self.folder(key), "thumb.webp")
+
+    def tensor_path(self, key):
+        return os.path.join(self.folder(key), "tensor.npy")
+
+    def put(self, data, with_tensor=True, tensor=None):
+        """
+        Stores encoded image bytes. Returns (key, future), where the future tracks the derived
+        files (None if they already exist). `with_tensor` also saves the MRI model input;
+        drawings skip it. Pass the (128, 128, 1) `tensor` if the caller already preprocessed
+        the scan (e.g. to score it), so the store does not decode it a second time.
+        """
+        data = bytes(data)
+        key = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self.original_path(key)):
+            os.makedirs(self.folder(key), exist_ok=True)
+            _write_atomic(self.original_path(key), data)
+        pending = not os.path.exists(self.thumbnail_path(key)) or (with_tensor and not os.path.exists(self.tensor_path(key)))
+        derived = self._writer.submit(self._derive, key, data, with_tensor, tensor) if pending else None
+        return key, derived
+
+    def _derive(self, key, data, with_tensor, tensor=None):
+        try:
+            if not os.path.exists(self.thumbnail_path(key)):
+                _write_atomic(self.thumbnail_path(key), make_thumbnail(data, self.thumbnail_size))
+            if with_tensor and not os.path.exists(self.tensor_path(key)):
+                if tensor is None:
+                    tensor = np.empty((*MRI_IMAGE_SIZE, 1), dtype=np.float32)
+                    preprocess_into(data, tensor[:, :, 0], reduced=config.MRI_REDUCED_DECODE)
+                buffer = io.BytesIO()
+                np.save(buffer, tensor)
+                _write_atomic(self.tensor_path(key), buffer.getvalue())
+        except Exception as e:
+            print(f"Scan store could not derive files for {key[:12]}: {e}")
+
+    def load_original(self, key):
+        """The uploaded bytes, or None if the key is unknown."""
+        try:
+            with open(self.original_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def load_thumbnail(self, key):
+        """WebP thumbnail bytes, or None if it is missing or not generated yet."""
+        try:
+            with open(self.thumbnail_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def load_tensor(self, key, mmap_mode="r"):
+        """The stored (128, 128, 1) model input, memory-mapped by default, or None if missing."""
+        try:
+            return np.load(self.tensor_path(key), mmap_mode=mmap_mode)
+        except (OSError, ValueError):
+            return None
+
+    def model_input(self, key):
+        """What the MRI model should score for `key`: the stored tensor, else the original bytes."""
+        tensor = self.load_tensor(key)
+        return tensor if tensor is not None else self.load_original(key)
+
+    def iter_tensor_keys(self):
+        """Keys of every entry that has a stored tensor, in a stable order."""
+        if not os.path.isdir(self.root):
+            return
+        for prefix in sorted(os.listdir(self.root)):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in sorted(os.listdir(prefix_dir)):
+                if os.path.exists(self.tensor_path(key)):
+                    yield key
+
+def make_thumbnail(data, size):
+    """Encodes a WebP thumbnail no larger than size x size. JPEGs are decoded at reduced scale."""
+    image = Image.open(io.BytesIO(data))
+    image.draft(None, (size, size)) # JPEG: libjpeg hi chhota decode kare
+    image.thumbnail((size, size))
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=80)
+    return buffer.getvalue()
+
+def _write_atomic(path, data):
+    temporary = f"{path}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path) # adhi likhi file kabhi padhi na jaye
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_scan_store():
+    """The process-wide store in SCAN_STORE_DIR."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ScanStore(config.SCAN_STORE_DIR, config.SCAN_THUMBNAIL_SIZE)
+        return _default_store
@@ -0,0 +1,76 @@
+import argparse
+import csv
+import math
+import os
+import sys
+from model_loader import iter_mri_batch_predictions, iter_stored_scan_predictions, load_mri_runner, active_model_version
+from scan_store import get_scan_store
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def iter_scan_paths(directory, recursive=False):
+    """
+    Yields image file paths under `directory` sorted by name (folder by folder when recursive),
+    so the CSV rows come out in the same order on every filesystem. Only names are listed up
+    front; the scans themselves are read lazily by the scorer.
+    """
+    if recursive:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, name)
+    else:
+        # scandir ka order filesystem pe depend karta hai, isliye naam se sort
+        with os.scandir(directory) as entries:
+            paths = sorted(entry.path for entry in entries if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS))
+        yield from paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score a directory of MRI scans, or the scan store, with the current model.")
+    parser.add_argument("directory", nargs="?", help="Folder containing PNG/JPG scans")
+    parser.add_argument("--stored", action="store_true", help="Re-score every scan in SCAN_STORE_DIR from its saved tensor (no decoding)")
+    parser.add_argument("-o", "--output", default="scores.csv", help="CSV file to write (default: scores.csv)")
+    parser.add_argument("-b", "--batch-size", type=int, default=None, help="Scans per model call")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Decode processes (default: MRI_PREPROCESS_WORKERS)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Include sub-folders")
+    args = parser.parse_args(argv)
+
+    if args.stored == bool(args.directory):
+        parser.error("give either a directory or --stored")
+    if args.directory and not os.path.isdir(args.directory):
+        print(f"Error: '{args.directory}' is not a directory.", file=sys.stderr)
+        return 1
+    if load_mri_runner() is None:
+        print("Error: the MRI model could not be loaded.", file=sys.stderr)
+        return 1
+    print(f"Scoring with MRI model {active_model_version()}")
+
+    errors = {} # path -> message, sirf current chunk ke
+    with open(args.output, "w", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["scan_key" if args.stored else "path", "probability", "error"])
+        scored = failed = 0
+        if args.stored:
+            batches = iter_stored_scan_predictions(get_scan_store().iter_tensor_keys(), args.batch_size)
+        else:
+            batches = iter_mri_batch_predictions(
+                iter_scan_paths(args.directory, args.recursive), args.batch_size, args.workers,
+                on_error=errors.__setitem__,
+            )
+        for paths, probabilities in batches:
+            for path, probability in zip(paths, probabilities):
+                if math.isnan(probability):
+                    writer.writerow((path, "", errors.pop(path, "could not be read")))
+                    failed += 1
+                else:
+                    writer.writerow((path, f"{probability:.6f}", ""))
+            scored += len(paths)
+            print(f"Scored {scored} scans...")
+    if failed:
+        print(f"{failed} scans could not be read; see the error column.", file=sys.stderr)
+    print(f"Results saved to: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# tests repo root se top-level modules import karte hai (jaise app khud karta hai)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app ki asli DB/scan store ko kabhi na chhuye; config import se pehle set hona chahiye
+_scratch = tempfile.mkdtemp(prefix="parkinsons-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ["SCAN_STORE_DIR"] = os.path.join(_scratch, "scan_store")
+os.environ["REPORT_EXPORT_DIR"] = os.path.join(_scratch, "report_exports")
+os.environ.setdefault("BCRYPT_ROUNDS", "4") # tests me hashing sasta rakho
+
+@pytest.fixture(scope="session")
+def tiny_mri_model():
+    """A small untrained Keras model with the MRI model's input and output shapes."""
+    tf = pytest.importorskip("tensorflow")
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(128, 128, 1)),
+        tf.keras.layers.Conv2D(4, 3, activation="relu", name="conv"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    return model
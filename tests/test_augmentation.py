@@ -0,0 +1,66 @@
+from concurrent.futures import CancelledError, Future
+import numpy as np
+import pytest
+from inference_engine import gather
+from model_loader import summarize_members
+from mri_preprocessing import TTA_SHIFT_PX, TTA_VIEWS, augment_views
+
+pytest.importorskip("cv2")
+
+@pytest.fixture
+def scan():
+    rng = np.random.default_rng(0)
+    return rng.random((128, 128, 1), dtype=np.float32)
+
+def test_views_are_batched_in_order(scan):
+    views = augment_views(scan)
+    assert views.shape == (len(TTA_VIEWS), 128, 128, 1) and views.dtype == np.float32
+    assert np.array_equal(views[TTA_VIEWS.index("original"), :, :, 0], scan[:, :, 0])
+    assert np.array_equal(views[TTA_VIEWS.index("flip"), :, :, 0], scan[:, ::-1, 0])
+
+def test_shifts_repeat_the_edge_pixels(scan):
+    s = TTA_SHIFT_PX
+    image = scan[:, :, 0]
+    left, right, up, down = augment_views(scan, ("shift_left", "shift_right", "shift_up", "shift_down"))[:, :, :, 0]
+    assert np.array_equal(left[:, :-s], image[:, s:])
+    assert np.array_equal(left[:, -s:], np.repeat(image[:, -1:], s, axis=1))
+    assert np.array_equal(right[:, s:], image[:, :-s])
+    assert np.array_equal(right[:, :s], np.repeat(image[:, :1], s, axis=1))
+    assert np.array_equal(up[:-s], image[s:])
+    assert np.array_equal(down[s:], image[:-s])
+
+def test_unknown_view_is_rejected(scan):
+    with pytest.raises(ValueError):
+        augment_views(scan, ("original", "rotate"))
+
+def test_members_are_summarized():
+    result = summarize_members({"v1/original": 0.2, "v1/flip": 0.4, "v2/original": 0.6})
+    assert result["probability"] == pytest.approx(0.4)
+    assert result["uncertainty"] == pytest.approx(np.std([0.2, 0.4, 0.6]))
+    assert result["members"] == {"v1/original": 0.2, "v1/flip": 0.4, "v2/original": 0.6}
+
+def test_gather_waits_for_every_member():
+    members = {"a": Future(), "b": Future()}
+    combined = gather(members)
+    members["b"].set_result(0.7)
+    assert not combined.done()
+    members["a"].set_result(0.1)
+    assert combined.result(timeout=1) == {"a": 0.1, "b": 0.7}
+
+def test_gather_fails_with_a_member_error():
+    members = {"a": Future(), "b": Future()}
+    combined = gather(members)
+    members["a"].set_exception(RuntimeError("model crashed"))
+    members["b"].set_result(0.5)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        combined.result(timeout=1)
+
+def test_cancelling_gather_cancels_pending_members():
+    members = {"a": Future(), "b": Future()}
+    members["a"].set_running_or_notify_cancel() # worker ne utha liya, ab cancel nahi hoga
+    combined = gather(members)
+    assert combined.cancel()
+    assert members["b"].cancelled() and not members["a"].cancelled()
+    members["a"].set_result(0.3)
+    with pytest.raises(CancelledError):
+        combined.result(timeout=1)
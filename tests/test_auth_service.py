@@ -0,0 +1,51 @@
+import uuid
+import pytest
+import auth_service
+import database
+from auth_service import RateLimited, RateLimiter, authenticate, register_user
+
+@pytest.fixture
+def user():
+    session = database.SessionLocal()
+    try:
+        email = f"{uuid.uuid4().hex}@example.com"
+        register_user(session, "Test", email, 60, "Other", "correct horse")
+    finally:
+        session.close()
+    return email
+
+@pytest.fixture(autouse=True)
+def fresh_limiter(monkeypatch):
+    monkeypatch.setattr(auth_service, "_limiter", RateLimiter(300))
+
+def test_db_connection_is_released_while_hashing(user, monkeypatch):
+    run_hash = auth_service._run_hash
+    checked_out = []
+
+    def spy(fn, *args):
+        checked_out.append(database.engine.pool.checkedout())
+        return run_hash(fn, *args)
+
+    monkeypatch.setattr(auth_service, "_run_hash", spy)
+    assert authenticate(user, "correct horse") is True
+    assert checked_out == [0]
+
+def test_ip_limited_requests_do_not_lock_out_the_email(user, monkeypatch):
+    monkeypatch.setattr(auth_service.config, "AUTH_MAX_ATTEMPTS_PER_IP", 1)
+    monkeypatch.setattr(auth_service.config, "AUTH_MAX_ATTEMPTS_PER_EMAIL", 2)
+    authenticate(user, "wrong", client_ip="203.0.113.9")
+    for _ in range(5):
+        with pytest.raises(RateLimited):
+            authenticate(user, "wrong", client_ip="203.0.113.9")
+    assert authenticate(user, "correct horse", client_ip="198.51.100.4") is True
+
+def test_limiter_forgets_idle_keys(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(auth_service.time, "monotonic", lambda: clock[0])
+    limiter = RateLimiter(60)
+    for i in range(100):
+        limiter.hit(f"email:spray{i}@example.com", 5)
+    assert len(limiter) == 100
+    clock[0] += 61
+    limiter.hit("email:someone@example.com", 5)
+    assert len(limiter) == 1
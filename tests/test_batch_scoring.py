@@ -0,0 +1,43 @@
+import os
+import numpy as np
+import pytest
+import model_loader
+from benchmarks.decode_parity import synthetic_scans
+
+@pytest.fixture
+def scan_dir(tmp_path):
+    good = synthetic_scans(256)["synthetic_256.jpg"]
+    paths = []
+    for name, data in (("a.jpg", good), ("corrupt.png", b"not an image"), ("b.jpg", good), ("truncated.jpg", good[:40]), ("c.jpg", good)):
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths.append(str(path))
+    return paths
+
+@pytest.fixture(autouse=True)
+def fake_runner(monkeypatch):
+    # model ki jagah: har scan ka mean pixel, taaki TensorFlow ki zarurat na pade
+    monkeypatch.setattr(model_loader, "load_mri_runner", lambda: lambda batch: batch.mean(axis=(1, 2, 3)))
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_unreadable_scans_do_not_stop_the_run(scan_dir, workers):
+    errors = {}
+    rows = [
+        (path, probability)
+        for chunk, probabilities in model_loader.iter_mri_batch_predictions(scan_dir, batch_size=2, workers=workers, on_error=errors.__setitem__)
+        for path, probability in zip(chunk, probabilities)
+    ]
+    assert [path for path, _ in rows] == scan_dir
+    failed = {path for path, probability in rows if np.isnan(probability)}
+    assert failed == set(errors) == {scan_dir[1], scan_dir[3]}
+    good = [probability for path, probability in rows if path not in failed]
+    assert len(good) == 3 and np.allclose(good, good[0]) and good[0] > 0
+
+def test_scan_paths_are_sorted_by_name(tmp_path):
+    from score_scans import iter_scan_paths
+    for name in ("scan_10.png", "b.JPG", "notes.txt", "a.jpeg", "scan_02.png"):
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "0.png").write_bytes(b"")
+    assert [os.path.basename(path) for path in iter_scan_paths(str(tmp_path))] == ["a.jpeg", "b.JPG", "scan_02.png", "scan_10.png"]
+    assert [os.path.relpath(path, tmp_path) for path in iter_scan_paths(str(tmp_path), recursive=True)][-1] == os.path.join("sub", "0.png")
@@ -0,0 +1,27 @@
+import json
+import pytest
+from benchmarks import suite
+
+def test_compare_flags_slower_latency_and_lower_throughput():
+    baseline = {"a.p50_ms": 10.0, "b.scans_per_s": 100.0, "c.p50_ms": 10.0, "only_old_ms": 1.0}
+    results = {"a.p50_ms": 12.0, "b.scans_per_s": 80.0, "c.p50_ms": 11.0, "only_new_ms": 1.0}
+    rows, regressions = suite.compare(results, baseline, threshold=0.15)
+    assert regressions == ["a.p50_ms", "b.scans_per_s"]
+    assert [row[0] for row in rows] == ["a.p50_ms", "b.scans_per_s", "c.p50_ms"] # sirf dono me jo hai
+    assert dict((row[0], row[3]) for row in rows)["b.scans_per_s"] == pytest.approx(0.2)
+
+def test_compare_ignores_sub_millisecond_jitter_and_honours_overrides():
+    baseline = {"db.get_user_stats.p50_ms": 0.2, "db.page.p50_ms": 10.0, "db.page_deep.p50_ms": 10.0}
+    results = {"db.get_user_stats.p50_ms": 0.4, "db.page.p50_ms": 12.0, "db.page_deep.p50_ms": 12.0}
+    # 100% slower but only +0.2 ms; lambe prefix ka override chhote wale se jeetta hai
+    _, regressions = suite.compare(results, baseline, 0.15, {"db.page": 0.5, "db.page_deep": 0.1}, min_delta_ms=0.25)
+    assert regressions == ["db.page_deep.p50_ms"]
+
+@pytest.mark.parametrize("current, exit_code", [(10.5, 0), (20.0, 1)])
+def test_main_exits_non_zero_on_regression(tmp_path, monkeypatch, current, exit_code):
+    document = {"results": {"mri.p50_ms": current}, "skipped": {}, "machine": {"platform": "test"}}
+    monkeypatch.setattr(suite, "run_suite", lambda cases, quick: document)
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": {"mri.p50_ms": 10.0}, "machine": {"platform": "test"}}))
+    assert suite.main(["-o", str(tmp_path / "out.json"), "--baseline", str(baseline)]) == exit_code
+    assert json.loads((tmp_path / "out.json").read_text())["results"] == document["results"]
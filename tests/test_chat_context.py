@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+import chat_context
+import database
+from prediction_cache import LRUCache
+
+@pytest.fixture
+def user_id():
+    session = database.SessionLocal()
+    try:
+        user = database.User(name="Chat", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        for i in range(100):
+            database.add_prediction(session, user.id, datetime(2024, 1, 1) + timedelta(days=i), (i % 10) / 10 + 0.05, f"result {i}")
+        return user.id
+    finally:
+        session.close()
+
+def test_builder_keeps_only_a_recent_window(user_id):
+    builder = chat_context.PatientContextBuilder(user_id, recent=10)
+    assert builder.refresh() == 10
+    assert len(builder.records) == 10 and builder.total == 100
+    assert builder.older.count == 90
+    assert builder.older.above_half == sum((i % 10) / 10 + 0.05 > 0.5 for i in range(90))
+    assert builder.older.first_date == datetime(2024, 1, 1)
+    context = builder.render()
+    assert "Checkup Record 100 " in context and "Summary of 90 older checkups (2024-01-01 to 2024-03-30)" in context
+
+def test_new_checkups_push_old_ones_into_the_summary(user_id):
+    builder = chat_context.PatientContextBuilder(user_id, recent=10)
+    builder.refresh()
+    session = database.SessionLocal()
+    try:
+        database.add_prediction(session, user_id, datetime(2024, 6, 1), 0.9, "new")
+    finally:
+        session.close()
+    assert builder.refresh() == 1
+    assert len(builder.records) == 10 and builder.older.count == 91
+    assert builder.render().startswith("Here is the patient's medical history")
+    assert "Checkup Record 101 " in builder.render_update(builder.records[-2].id)
+
+def test_builders_are_bounded(monkeypatch):
+    monkeypatch.setattr(chat_context, "_builders", LRUCache(2))
+    for user in (1, 2, 3):
+        chat_context.get_context_builder(user)
+    assert len(chat_context._builders) == 2
+    assert chat_context._builders.get(1) is None
+
+def test_update_resends_the_history_when_new_checkups_overflow_the_window(user_id):
+    builder = chat_context.PatientContextBuilder(user_id, recent=10)
+    builder.refresh()
+    sent_through = builder.last_id
+    session = database.SessionLocal()
+    try:
+        for i in range(15):
+            database.add_prediction(session, user_id, datetime(2024, 7, 1) + timedelta(days=i), 0.95, f"burst {i}")
+    finally:
+        session.close()
+    assert builder.refresh() == 15
+    update = builder.render_update(sent_through)
+    # pehle 5 naye checkups window se bahar hai; wo summary me gine jaane chahiye
+    assert "Summary of 105 older checkups" in update and "updated history replaces it" in update
+    assert "Checkup Record 115 " in update
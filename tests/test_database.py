@@ -0,0 +1,103 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.orm import sessionmaker
+import config
+import database
+from database import create_db_engine, get_prediction_page, migrate_schema
+
+def pragma(connection, name):
+    return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+def test_sqlite_file_engine_uses_wal_and_a_busy_timeout(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.connect() as connection:
+        assert pragma(connection, "journal_mode") == "wal"
+        assert pragma(connection, "synchronous") == 1 # NORMAL
+        assert pragma(connection, "busy_timeout") == config.DB_BUSY_TIMEOUT_MS
+    engine.dispose()
+
+def test_readers_are_not_blocked_by_an_open_write(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+        connection.exec_driver_sql("INSERT INTO t VALUES (1)")
+    writer = engine.raw_connection()
+    try:
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO t VALUES (2)")
+        with engine.connect() as reader: # WAL: commit se pehle bhi purana snapshot padh sakte hai
+            assert reader.exec_driver_sql("SELECT count(*) FROM t").scalar() == 1
+        writer.commit()
+    finally:
+        writer.close()
+    engine.dispose()
+
+def test_in_memory_engine_shares_one_database():
+    engine = create_db_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+    with engine.connect() as other:
+        assert other.exec_driver_sql("SELECT count(*) FROM t").scalar() == 0
+
+def test_migration_converts_string_dates_and_adds_indexes(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection: # jaisa purana app banata tha: date ek formatted string
+        connection.exec_driver_sql(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, email VARCHAR NOT NULL, "
+            "age INTEGER, gender VARCHAR, hashed_password VARCHAR NOT NULL)"
+        )
+        connection.exec_driver_sql(
+            "CREATE TABLE predictions (id INTEGER PRIMARY KEY, user_id INTEGER, date VARCHAR, probability FLOAT, result_text VARCHAR)"
+        )
+        connection.exec_driver_sql("INSERT INTO users VALUES (1, 'Old', 'old@example.com', 70, 'Other', 'x')")
+        connection.exec_driver_sql("INSERT INTO predictions VALUES (1, 1, '2023-12-31 23:59:59', 0.2, 'a'), (2, 1, '2024-01-02 08:00:00', 0.7, 'b')")
+
+    migrate_schema(engine)
+    migrate_schema(engine) # dobara chalana safe hai
+
+    inspector = inspect(engine)
+    assert isinstance({c["name"]: c["type"] for c in inspector.get_columns("predictions")}["date"], DateTime)
+    assert "ix_predictions_user_id_date" in {index["name"] for index in inspector.get_indexes("predictions")}
+    session = sessionmaker(bind=engine)()
+    try:
+        rows, _ = get_prediction_page(session, 1)
+        assert [(row.date, row.modality) for row in rows] == [(datetime(2024, 1, 2, 8), "mri"), (datetime(2023, 12, 31, 23, 59, 59), "mri")]
+    finally:
+        session.close()
+    engine.dispose()
+
+@pytest.fixture
+def history():
+    session = database.SessionLocal()
+    try:
+        user = database.User(name="Pages", email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        for i in range(23):
+            # har teesra checkup pichhle wale ke same second pe: cursor ko id se tie todna padta hai
+            date = datetime(2024, 3, 1) + timedelta(hours=i - i % 3 // 2)
+            database.add_prediction(session, user.id, date, 0.5, f"checkup {i}")
+        yield session, user.id
+    finally:
+        session.close()
+
+def test_keyset_pages_cover_the_history_once_newest_first(history):
+    session, user_id = history
+    seen, cursor = [], None
+    while True:
+        rows, cursor = get_prediction_page(session, user_id, limit=5, before=cursor)
+        assert len(rows) <= 5
+        seen.extend(rows)
+        if cursor is None:
+            break
+    everything = database.get_predictions_by_user_id(session, user_id)
+    assert [row.id for row in seen] == [row.id for row in everything]
+    assert len(seen) == 23
+
+def test_date_range_filter_is_end_exclusive(history):
+    session, user_id = history
+    rows, cursor = get_prediction_page(session, user_id, limit=50, start_date=datetime(2024, 3, 1, 3), end_date=datetime(2024, 3, 1, 6))
+    assert cursor is None
+    assert rows and all(datetime(2024, 3, 1, 3) <= row.date < datetime(2024, 3, 1, 6) for row in rows)
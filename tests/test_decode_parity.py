@@ -0,0 +1,29 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from benchmarks.decode_parity import TOLERANCE, bytes_tensor, legacy_tensor, synthetic_scans
+
+pytest.importorskip("cv2")
+
+SCANS = synthetic_scans()
+
+def test_fixtures_include_a_subsampled_colour_jpeg():
+    image = Image.open(io.BytesIO(SCANS["synthetic_2048_color.jpg"]))
+    assert image.mode == "RGB"
+    assert image.layer[0][1:3] == (2, 2) and image.layer[1][1:3] == (1, 1) # 4:2:0
+    pixels = np.asarray(image)
+    assert (pixels[..., 0] != pixels[..., 2]).any() # sach me rangeen, grey nahi
+
+# decoder badle to model ke inputs chupke se na badle: yahi check CI me chalta hai
+@pytest.mark.parametrize("name", sorted(SCANS))
+def test_direct_decode_matches_the_legacy_path(name):
+    legacy = legacy_tensor(SCANS[name])
+    assert legacy.shape == (128, 128) and legacy.dtype == np.float32
+    np.testing.assert_array_equal(bytes_tensor(SCANS[name], reduced=False), legacy)
+
+@pytest.mark.parametrize("name", sorted(SCANS))
+def test_reduced_decode_stays_within_tolerance(name):
+    delta = np.abs(bytes_tensor(SCANS[name], reduced=True) - legacy_tensor(SCANS[name]))
+    assert delta.mean() <= TOLERANCE
+    assert delta.max() <= 4 / 255 # kuch pixels ek-do grey level hi hilte hai
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from PIL import Image
+from gradcam import build_gradcam_runner, heatmap_to_uint8, render_overlay
+
+pytest.importorskip("cv2")
+
+@pytest.fixture
+def batch():
+    return np.random.default_rng(0).random((3, 128, 128, 1), dtype=np.float32)
+
+@pytest.mark.parametrize("layer_name", [None, "conv"])
+def test_scores_match_the_model_and_cams_are_normalized(tiny_mri_model, batch, layer_name):
+    probabilities, cams = build_gradcam_runner(tiny_mri_model, layer_name)(batch)
+    # heatmap wala forward pass wahi probability de jo normal prediction deta hai
+    np.testing.assert_allclose(probabilities, tiny_mri_model.predict(batch, verbose=0)[:, 0], atol=1e-6)
+    assert cams.shape == (3, 126, 126) # "conv" layer ka spatial size (3x3 valid)
+    assert cams.min() >= 0.0 and cams.max() <= 1.0 + 1e-6
+
+def test_unknown_layer_is_rejected(tiny_mri_model):
+    with pytest.raises(ValueError, match="missing"):
+        build_gradcam_runner(tiny_mri_model, "missing")
+
+def test_heatmap_is_stored_as_uint8_at_scan_size():
+    heatmap = heatmap_to_uint8(np.linspace(0.0, 1.0, 126 * 126, dtype=np.float32).reshape(126, 126))
+    assert heatmap.shape == (128, 128) and heatmap.dtype == np.uint8
+    assert heatmap.min() == 0 and heatmap.max() == 255
+
+def test_overlay_is_rgb_and_capped_for_display():
+    scan = Image.fromarray(np.random.default_rng(1).integers(0, 256, (1024, 768), dtype=np.uint8))
+    heatmap = np.full((128, 128), 200, dtype=np.uint8)
+    overlay = render_overlay(scan, heatmap, max_side=512)
+    assert overlay.shape == (512, 384, 3) and overlay.dtype == np.uint8
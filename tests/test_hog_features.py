@@ -0,0 +1,57 @@
+"""
+hog_features() must keep producing the features WAVE.pkl was trained on. The reference vectors
+in data/hog_reference.npz come from skimage.feature.hog with the settings documented in
+drawing_preprocessing; skimage is not a dependency, so regenerate them with
+`python tests/test_hog_features.py` in an environment that has scikit-image.
+"""
+import os
+import numpy as np
+import pytest
+from drawing_preprocessing import HOG_CELLS_PER_BLOCK, HOG_ORIENTATIONS, HOG_PIXELS_PER_CELL, hog_feature_count, hog_features
+
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hog_reference.npz")
+
+@pytest.fixture(scope="module")
+def reference():
+    with np.load(REFERENCE) as data:
+        return {name: data[name] for name in data.files}
+
+def test_drawings_match_skimage(reference):
+    features = hog_features(reference["drawings"])
+    assert features.shape == (len(reference["drawings"]), hog_feature_count())
+    np.testing.assert_allclose(features, reference["drawing_features"], rtol=0, atol=1e-6)
+
+def test_grey_image_matches_skimage(reference):
+    # binarized drawings me gradients kuch hi directions me hote hai; random grey har bin chhoota hai
+    features = hog_features(reference["grey"][np.newaxis])
+    np.testing.assert_allclose(features[0], reference["grey_features"], rtol=0, atol=1e-6)
+
+def _drawings():
+    import cv2
+    from drawing_preprocessing import DRAWING_IMAGE_SIZE
+    rng = np.random.default_rng(7)
+    xs = np.arange(10, 190)
+    wave = (100 + 40 * np.sin(xs / 14) + rng.normal(0, 2, len(xs))).astype(np.int32)
+    angles = np.linspace(0, 6 * np.pi, 400)
+    spiral = np.stack([100 + 14 * angles / np.pi * np.cos(angles), 100 + 14 * angles / np.pi * np.sin(angles)], axis=1).astype(np.int32)
+    drawings = np.empty((2, *DRAWING_IMAGE_SIZE), dtype=np.uint8)
+    for out, points in zip(drawings, (np.stack([xs, wave], axis=1), spiral)):
+        canvas = np.full(DRAWING_IMAGE_SIZE, 255, dtype=np.uint8)
+        cv2.polylines(canvas, [points], False, 0, 2)
+        cv2.threshold(canvas, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU, dst=out)
+    return drawings
+
+if __name__ == "__main__":
+    from skimage.feature import hog
+    settings = dict(
+        orientations=HOG_ORIENTATIONS, pixels_per_cell=HOG_PIXELS_PER_CELL, cells_per_block=HOG_CELLS_PER_BLOCK,
+        transform_sqrt=True, block_norm="L1",
+    )
+    drawings = _drawings()
+    grey = np.random.default_rng(11).integers(0, 256, (60, 80), dtype=np.uint8)
+    np.savez_compressed(
+        REFERENCE, drawings=drawings, grey=grey,
+        drawing_features=np.stack([hog(drawing, **settings) for drawing in drawings]).astype(np.float32),
+        grey_features=hog(grey, **settings).astype(np.float32),
+    )
+    print(f"Wrote {REFERENCE}")
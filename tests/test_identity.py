@@ -0,0 +1,15 @@
+import uuid
+import database
+import identity
+
+def test_registration_replaces_a_cached_missing_profile():
+    email = f"{uuid.uuid4().hex}@example.com"
+    assert identity._resolve(email) is None # "no such user" ab TTL tak cache me hai
+    session = database.SessionLocal()
+    try:
+        database.create_user(session, "New", email, 40, "Other", "x")
+    finally:
+        session.close()
+    assert identity._resolve(email) is None
+    identity.invalidate_identity(email)
+    assert identity._resolve(email).name == "New"
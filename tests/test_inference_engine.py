@@ -0,0 +1,96 @@
+import threading
+import time
+import numpy as np
+import pytest
+from inference_engine import InferenceQueueFull, InferenceTimeout, MRIBatchEngine
+
+SCAN = np.zeros((128, 128, 1), dtype=np.float32)
+
+@pytest.fixture
+def engine():
+    # lamba window, taaki "poora window ruka" aur "turant gaya" me saaf farak dikhe
+    engine = MRIBatchEngine(lambda batch: np.full(len(batch), 0.5, dtype=np.float32), max_batch_size=8, max_wait_ms=300)
+    yield engine
+    engine.close()
+
+def test_lone_request_does_not_wait_for_the_window(engine):
+    for _ in range(3):
+        time.sleep(0.35) # pichhle request se window bhar ka gap: engine idle hai
+        start = time.monotonic()
+        assert engine.submit(SCAN).result(timeout=5) == 0.5
+        assert time.monotonic() - start < 0.15
+
+def test_back_to_back_sequential_requests_do_not_wait_for_the_window(engine):
+    # ek ke baad ek, bina gap ke: pichhla request ho chuka hai, to kuch queue me nahi
+    start = time.monotonic()
+    for _ in range(5):
+        assert engine.submit(SCAN).result(timeout=5) == 0.5
+    assert time.monotonic() - start < 0.15
+    assert engine.stats()["batches"] == 5
+
+def test_submit_many_group_is_scored_in_one_batch(engine):
+    futures = engine.submit_many([SCAN] * 5)
+    assert [future.result(timeout=5) for future in futures] == [0.5] * 5
+    assert engine.stats()["batches"] == 1
+
+def test_requests_under_load_share_a_batch():
+    gate = threading.Event()
+    slow = MRIBatchEngine(lambda batch: gate.wait(5) and np.full(len(batch), 0.5, dtype=np.float32), max_batch_size=8, max_wait_ms=300)
+    try:
+        first = slow.submit(SCAN) # worker is busy scoring this one
+        time.sleep(0.05)
+        rest = [slow.submit(SCAN) for _ in range(4)]
+        gate.set()
+        assert [future.result(timeout=5) for future in [first, *rest]] == [0.5] * 5
+        assert slow.stats()["batches"] == 2
+    finally:
+        slow.close()
+
+def blocked_engine(**options):
+    """Engine whose worker is stuck scoring a first request until the returned event is set."""
+    gate = threading.Event()
+    engine = MRIBatchEngine(lambda batch: gate.wait(5) and np.full(len(batch), 0.5, dtype=np.float32), max_batch_size=1, **options)
+    first = engine.submit(SCAN)
+    time.sleep(0.05)
+    return engine, gate, first
+
+def test_full_queue_rejects_new_requests():
+    engine, gate, first = blocked_engine(max_queue_depth=2)
+    try:
+        queued = [engine.submit(SCAN), engine.submit(SCAN)]
+        with pytest.raises(InferenceQueueFull):
+            engine.submit(SCAN)
+        with pytest.raises(InferenceQueueFull):
+            engine.submit_many([SCAN]) # group bhi poora ya kuch nahi
+        assert engine.stats()["rejected"] == 2
+    finally:
+        gate.set()
+        engine.close()
+    assert [future.result(timeout=5) for future in [first, *queued]] == [0.5] * 3
+
+def test_requests_that_waited_too_long_time_out():
+    engine, gate, first = blocked_engine(timeout_s=0.1)
+    try:
+        late = engine.submit(SCAN)
+        time.sleep(0.2)
+        gate.set()
+        assert first.result(timeout=5) == 0.5
+        with pytest.raises(InferenceTimeout):
+            late.result(timeout=5)
+        assert engine.stats()["timed_out"] == 1
+    finally:
+        engine.close()
+
+def test_cancelled_requests_are_not_scored():
+    engine, gate, first = blocked_engine()
+    scored = []
+    predict = engine.predict_batch
+    engine.predict_batch = lambda batch: scored.append(len(batch)) or predict(batch) # agle batch se lagu
+    try:
+        cancelled = engine.submit(SCAN)
+        assert cancelled.cancel()
+        kept = engine.submit(SCAN)
+        gate.set()
+        assert kept.result(timeout=5) == 0.5 and scored == [1]
+    finally:
+        engine.close()
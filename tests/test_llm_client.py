@@ -0,0 +1,36 @@
+from llm_client import LLMClient, StubBackend
+
+CONTEXT = [
+    {"role": "user", "parts": ["You are a helpful medical assistant."]},
+    {"role": "model", "parts": ["Understood."]},
+]
+
+def make_client():
+    return LLMClient(StubBackend(), max_retries=0, cache_entries=16)
+
+def test_identical_first_question_is_served_from_cache():
+    client = make_client()
+    first = client.start_chat(CONTEXT).send_message("What is a tremor?")
+    other = client.start_chat(CONTEXT)
+    assert other.send_message("What is a tremor?") == first
+    assert other.last_stats["cached"] is True
+
+def test_follow_up_answer_is_not_shared_across_sessions():
+    client = make_client()
+    a = client.start_chat(CONTEXT)
+    a.send_message("I am Priya, my left hand shakes")
+    personal = a.send_message("What should I do next?")
+
+    b = client.start_chat(CONTEXT)
+    reply = b.send_message("What should I do next?")
+    assert b.last_stats["cached"] is False
+    assert reply != personal
+    assert len(client.backend.calls) == 3
+
+def test_repeated_question_later_in_a_conversation_is_not_stale():
+    client = make_client()
+    session = client.start_chat(CONTEXT)
+    session.send_message("What should I do next?")
+    session.send_message("My tremor got worse this week")
+    session.send_message("What should I do next?")
+    assert session.last_stats["cached"] is False
@@ -0,0 +1,55 @@
+import json
+import pytest
+import metrics
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "_histograms", {})
+    monkeypatch.setattr(metrics, "_collectors", {})
+    monkeypatch.setattr(metrics, "_enabled", True)
+
+def test_histogram_buckets_and_window_percentiles():
+    histogram = metrics.Histogram()
+    for seconds in (0.001, 0.003, 0.02, 0.02, 40.0):
+        histogram.observe(seconds)
+    assert histogram.bucket_counts[0] == 1 # le=0.001 inclusive
+    assert histogram.bucket_counts[metrics.BUCKETS.index(0.005)] == 1
+    assert histogram.bucket_counts[-1] == 1 # +Inf
+    summary = histogram.summary(60)
+    assert summary["count"] == summary["window_count"] == 5
+    assert summary["p50_ms"] == pytest.approx(20.0)
+
+def test_timer_and_timed_record_under_their_stage():
+    with metrics.timer("decode"):
+        pass
+    assert metrics.timed("infer", lambda x: x * 2)(21) == 42
+    stages = metrics.snapshot(60)["stages"]
+    assert stages["decode"]["count"] == 1 and stages["infer"]["count"] == 1
+
+def test_disabled_metrics_record_nothing():
+    metrics.set_enabled(False)
+    with metrics.timer("decode"):
+        pass
+    assert metrics.timed("infer", lambda: "ok")() == "ok"
+    metrics.observe("db_write", 0.1)
+    assert metrics.snapshot(60)["stages"] == {}
+
+def test_prometheus_text_has_cumulative_buckets_and_gauges():
+    metrics.observe("infer", 0.004)
+    metrics.observe("infer", 0.2)
+    metrics.register_collector("mri_engine", lambda: {"queue_depth": 3, "label": "skipped"})
+    metrics.register_collector("broken", lambda: 1 / 0) # ek kharab collector baaki export na roke
+    lines = metrics.to_prometheus().splitlines()
+    assert 'parkinsons_stage_duration_seconds_bucket{stage="infer",le="0.005"} 1' in lines
+    assert 'parkinsons_stage_duration_seconds_bucket{stage="infer",le="+Inf"} 2' in lines
+    assert 'parkinsons_stage_duration_seconds_count{stage="infer"} 2' in lines
+    assert "parkinsons_mri_engine_queue_depth 3" in lines
+    assert not any("label" in line for line in lines)
+
+def test_json_export_is_written_atomically(tmp_path):
+    metrics.observe("llm_call", 0.5)
+    path = str(tmp_path / "metrics.json")
+    metrics.write_file(path)
+    with open(path) as f:
+        assert json.load(f)["stages"]["llm_call"]["count"] == 1
+    assert not (tmp_path / "metrics.json.tmp").exists()
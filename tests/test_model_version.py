@@ -0,0 +1,70 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+import pytest
+import model_loader
+from inference_engine import MRIBatchEngine
+from model_registry import ModelHandle, ModelSpec
+
+class FakeManager:
+    def __init__(self, handle):
+        self.active = handle
+
+    def shadow(self, tensor, active_future):
+        pass
+
+def make_handle(version, probability):
+    engine = MRIBatchEngine(lambda batch: np.full(len(batch), probability, dtype=np.float32), max_batch_size=4, max_wait_ms=1)
+    return ModelHandle(ModelSpec(version, f"{version}.keras", "keras", version * 8), runner=None, engine=engine)
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = FakeManager(make_handle("v1", 0.25))
+    monkeypatch.setattr(model_loader, "get_model_manager", lambda: manager)
+    monkeypatch.setattr(model_loader.config, "MRI_CACHE_MAX_ENTRIES", 0)
+    monkeypatch.setattr(model_loader.config, "MRI_CACHE_PERSIST", False)
+    yield manager
+    manager.active.engine.close()
+
+@pytest.mark.parametrize("submit", [model_loader.submit_mri, model_loader.submit_mri_high_confidence])
+def test_future_carries_the_version_that_scored_it(manager, submit, monkeypatch):
+    monkeypatch.setattr(model_loader, "get_ensemble_engines", lambda: {})
+    old = manager.active
+    future = submit(np.zeros((128, 128, 1), dtype=np.float32))
+    manager.active = make_handle("v2", 0.75) # hot swap after submitting
+    try:
+        result = future.result(timeout=10)
+        assert future.model_version == "v1"
+        assert (result if isinstance(result, float) else result["probability"]) == pytest.approx(0.25)
+    finally:
+        old.engine.close()
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def key_for(self, tensor):
+        return tensor.tobytes()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, probability):
+        self.entries[key] = probability
+
+def test_cancelled_request_is_not_cached(manager, monkeypatch, caplog):
+    cache = DictCache()
+    monkeypatch.setattr(model_loader, "get_prediction_cache", lambda handle=None: cache)
+    gate = threading.Event()
+    manager.active.engine.predict_batch = lambda batch: gate.wait(5) and np.full(len(batch), 0.25, dtype=np.float32)
+    busy = model_loader.submit_mri(np.full((128, 128, 1), 0.5, dtype=np.float32))
+    time.sleep(0.05) # worker ab `busy` score kar raha hai, doosra queue me rukta hai
+    future = model_loader.submit_mri(np.zeros((128, 128, 1), dtype=np.float32))
+    with caplog.at_level(logging.ERROR, logger="concurrent.futures"):
+        assert future.cancel() # callbacks yahi, isi thread me chalte hai
+    gate.set()
+    assert busy.result(timeout=5) == 0.25
+    assert len(cache.entries) == 1
+    assert not [record for record in caplog.records if record.name == "concurrent.futures"]
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+import threading
+import model_loader
+
+def test_importing_model_loader_does_not_load_heavy_libraries():
+    # naye interpreter me: pytest ke baaki tests pehle hi tensorflow import kar chuke ho sakte hai
+    code = "import sys, model_loader; print(','.join(m for m in ('tensorflow', 'keras', 'cv2', 'joblib', 'sklearn') if m in sys.modules))"
+    root = os.path.dirname(os.path.abspath(model_loader.__file__))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+    assert result.stdout.strip() == ""
+
+def test_warmup_loads_off_the_calling_thread(monkeypatch):
+    release = threading.Event()
+    loaded_on = []
+    monkeypatch.setattr(model_loader, "get_inference_engine", lambda: loaded_on.append(threading.current_thread()) or release.wait(5))
+    warmup = model_loader.ModelWarmup()
+    assert warmup.status == "loading" # constructor model ka wait nahi karta
+    release.set()
+    assert warmup.wait(5)
+    assert loaded_on[0] is not threading.current_thread() and warmup.ready_in is not None
+
+def test_warmup_reports_a_failed_load(monkeypatch):
+    monkeypatch.setattr(model_loader, "get_inference_engine", lambda: None)
+    warmup = model_loader.ModelWarmup()
+    assert not warmup.wait(5) and warmup.status == "failed"
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from model_loader import build_mri_runner
+
+@pytest.mark.parametrize("count", [1, 3])
+def test_compiled_runner_matches_model_predict(tiny_mri_model, count):
+    batch = np.random.default_rng(count).random((count, 128, 128, 1), dtype=np.float32)
+    compiled = build_mri_runner(tiny_mri_model, "compiled")
+    predicted = build_mri_runner(tiny_mri_model, "predict")(batch)
+    assert compiled(batch).shape == (count,)
+    np.testing.assert_allclose(compiled(batch), predicted, atol=1e-6)
+
+def test_compiled_runner_traces_once_for_every_batch_size(tiny_mri_model):
+    runner = build_mri_runner(tiny_mri_model, "compiled")
+    for count in (1, 4, 2):
+        runner(np.zeros((count, 128, 128, 1), dtype=np.float32))
+    # input_signature me batch None hai: ek hi concrete function, har batch size ke liye
+    serve = next(cell.cell_contents for cell in runner.__closure__ if hasattr(cell.cell_contents, "experimental_get_tracing_count"))
+    assert serve.experimental_get_tracing_count() == 1
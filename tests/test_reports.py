@@ -0,0 +1,35 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+import pytest
+import database
+import reports
+from reports import Patient, export_history
+
+pytest.importorskip("fpdf")
+
+@pytest.fixture
+def user():
+    session = database.SessionLocal()
+    try:
+        user = database.User(name="Report", email=f"{uuid.uuid4().hex}@example.com", age=60, gender="Other", hashed_password="x")
+        session.add(user)
+        session.commit()
+        for i in range(7):
+            database.add_prediction(session, user.id, datetime(2024, 1, 1) + timedelta(days=i), 0.3, f"result {i}")
+        session.refresh(user)
+        session.expunge(user)
+        return user
+    finally:
+        session.close()
+
+@pytest.mark.parametrize("max_pages, expected", [(None, 7), (3, 3), (5, 5), (20, 7)])
+def test_history_export_keeps_the_newest_pages(user, tmp_path, monkeypatch, max_pages, expected):
+    drawn = []
+    render_history = reports.render_history
+    monkeypatch.setattr(reports, "render_history", lambda records, path: render_history((drawn.append(data.date) or data for data in records), path))
+    path = os.path.join(tmp_path, "history.pdf")
+    # page_size=2: cap keyset pages ke beech me bhi sahi kate
+    assert export_history(user.id, Patient.of(user), path, page_size=2, max_pages=max_pages) == expected
+    assert drawn == [datetime(2024, 1, 1) + timedelta(days=6 - i) for i in range(expected)]
+    assert os.path.getsize(path) > 0
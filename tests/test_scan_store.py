@@ -0,0 +1,27 @@
+import numpy as np
+import scan_store
+from benchmarks.decode_parity import synthetic_scans
+from mri_preprocessing import MRI_IMAGE_SIZE, preprocess_into
+from scan_store import ScanStore
+
+def test_given_tensor_is_stored_without_decoding_again(tmp_path, monkeypatch):
+    data = synthetic_scans(256)["synthetic_256.png"]
+    tensor = np.empty((*MRI_IMAGE_SIZE, 1), dtype=np.float32)
+    preprocess_into(data, tensor[:, :, 0])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the scan was decoded a second time")
+    monkeypatch.setattr(scan_store, "preprocess_into", fail)
+
+    store = ScanStore(str(tmp_path))
+    key, derived = store.put(data, tensor=tensor)
+    derived.result()
+    np.testing.assert_array_equal(store.load_tensor(key), tensor)
+    assert store.load_thumbnail(key) is not None
+
+def test_tensor_is_derived_when_not_given(tmp_path):
+    data = synthetic_scans(256)["synthetic_256.png"]
+    store = ScanStore(str(tmp_path))
+    key, derived = store.put(data)
+    derived.result()
+    assert store.load_tensor(key).shape == (*MRI_IMAGE_SIZE, 1)
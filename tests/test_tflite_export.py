@@ -0,0 +1,33 @@
+import importlib.util
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+@pytest.fixture
+def convert_module(tiny_mri_model, tmp_path, monkeypatch):
+    # "convert model.py" ke naam me space hai, isliye path se load karo
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "convert model.py")
+    spec = importlib.util.spec_from_file_location("convert_model", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    keras_path = str(tmp_path / "MRI.keras")
+    tiny_mri_model.save(keras_path)
+    monkeypatch.setattr(module, "NEW_MODEL_PATH", keras_path)
+    monkeypatch.setattr(module, "TFLITE_MODEL_PATH", str(tmp_path / "MRI.tflite"))
+    return module
+
+@pytest.mark.parametrize("quantize, tolerance", [("none", 1e-5), ("float16", 1e-2)])
+def test_exported_model_scores_like_keras(convert_module, tiny_mri_model, quantize, tolerance):
+    from model_loader import TFLiteRunner
+    assert convert_module.export_tflite(quantize)
+    runner = TFLiteRunner(convert_module.TFLITE_MODEL_PATH)
+    for count in (1, 3, 1): # batch size badalne pe interpreter resize hota hai
+        batch = np.random.default_rng(count).random((count, 128, 128, 1), dtype=np.float32)
+        expected = tiny_mri_model(batch, training=False).numpy()[:, 0]
+        np.testing.assert_allclose(runner(batch), expected, atol=tolerance)
+
+def test_int8_export_needs_calibration_scans(convert_module):
+    assert not convert_module.export_tflite("int8")
+    assert not os.path.exists(convert_module.TFLITE_MODEL_PATH)